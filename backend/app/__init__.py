@@ -54,8 +54,9 @@ def create_app(config_class=Config):
     app.register_blueprint(settings.bp)
     app.register_blueprint(dashboard.bp)
 
-    from .routes import ai
+    from .routes import ai, ai_jobs
     app.register_blueprint(ai.bp)
+    app.register_blueprint(ai_jobs.bp)
 
     from .routes import papers
     app.register_blueprint(papers.bp)
@@ -63,9 +64,16 @@ def create_app(config_class=Config):
     from .routes import sections
     app.register_blueprint(sections.bp)
 
+    # Incremental subject_question_stats maintenance (ORM listeners register on import)
+    from .services import stats_service
+
+    from .commands import register_commands
+    register_commands(app)
+
     # ── Apply stricter rate limits to expensive routes ──
     if limiter:
         limiter.limit("5 per minute")(ai.bp)       # AI generation: max 5 calls/min
+        limiter.limit("5 per minute", methods=['POST'])(ai_jobs.bp)  # Job submits only; status polls are cheap
         limiter.limit("10 per minute")(auth.bp)     # Auth: anti brute-force
 
     # ── Fix #6: Global JSON Error Handlers ──
@@ -86,6 +94,10 @@ def create_app(config_class=Config):
     def ratelimit_handler(e):
         return jsonify({"error": "Too many requests. Please slow down."}), 429
 
+    # Permission resolvers are memoized per request on flask.g
+    from .services.rbac_service import clear_permission_cache
+    app.teardown_request(clear_permission_cache)
+
     # ── Fix #8: Request logging after each response ──
     @app.after_request
     def log_request(response):
@@ -108,66 +120,4 @@ def create_app(config_class=Config):
             except Exception as e:
                 app.logger.error(f"Failed to run database migrations: {e}")
 
-    # Run database integrity check and auto-healing for orphaned questions on startup
-    heal_database(app)
-
     return app
-
-
-def heal_database(app):
-    with app.app_context():
-        from .models import Question, Subject, db
-        try:
-            questions = Question.query.all()
-            subjects = Subject.query.all()
-            subject_map = {s.id: s for s in subjects}
-            
-            # Map subjects by (code, semester, academic_year) for lookup
-            subject_lookup = {}
-            for s in subjects:
-                sem_number = s.semester.number if s.semester else None
-                ay_label = s.academic_year.label if s.academic_year else None
-                if sem_number and ay_label:
-                    key = (s.code, sem_number, ay_label)
-                    subject_lookup[key] = s
-                
-            healed_count = 0
-            for q in questions:
-                if q.subject_id not in subject_map:
-                    # Orphaned question found! Match via meta in editor_data
-                    meta = q.editor_data.get('meta', {}) if q.editor_data else {}
-                    subcode = meta.get('subcode')
-                    semester = meta.get('semester')
-                    academic_year = meta.get('academicYear')
-                    
-                    healed = False
-                    if subcode and semester and academic_year:
-                        try:
-                            sem_int = int(semester)
-                        except (ValueError, TypeError):
-                            sem_int = None
-                        if sem_int is not None:
-                            key = (subcode, sem_int, academic_year)
-                            if key in subject_lookup:
-                                target_subject = subject_lookup[key]
-                                q.subject_id = target_subject.id
-                                healed = True
-                                healed_count += 1
-                                app.logger.info(f"Auto-healed question {q.id}: mapped to subject {subcode} ({target_subject.id})")
-                                
-                    if not healed and subcode:
-                        # Fallback to matching by code alone
-                        fallback_subject = next((s for s in subjects if s.code == subcode), None)
-                        if fallback_subject:
-                            q.subject_id = fallback_subject.id
-                            healed_count += 1
-                            app.logger.info(f"Auto-healed question {q.id} (fallback): mapped to subject {subcode} ({fallback_subject.id})")
-                            
-            if healed_count > 0:
-                db.session.commit()
-                app.logger.info(f"Database integrity check: auto-healed {healed_count} questions.")
-            else:
-                app.logger.info("Database integrity check: No orphaned questions found.")
-        except Exception as e:
-            app.logger.error(f"Error during database integrity check: {e}")
-
@@ -0,0 +1,62 @@
+import click
+
+def register_commands(app):
+    """Maintenance commands exposed through `flask <command>`."""
+
+    @app.cli.command('rebuild-question-stats')
+    def rebuild_question_stats():
+        """Rebuild subject_question_stats from the questions table (backfill / repair)."""
+        from .services.stats_service import rebuild_subject_question_stats
+        rows = rebuild_subject_question_stats()
+        click.echo(f"Rebuilt subject question stats: {rows} (subject, status) rows.")
+
+    @app.cli.command('heal-orphans')
+    def heal_orphans():
+        """Re-attach questions whose subject no longer exists, matching on editor_data meta."""
+        from .services.integrity_service import heal_orphaned_questions
+        result = heal_orphaned_questions()
+        if not result['orphans']:
+            click.echo("Database integrity check: No orphaned questions found.")
+            return
+        click.echo(f"Healed {result['healed']} questions by subject/semester/year, "
+                   f"{result['fallbackHealed']} by subject code; {result['remaining']} still orphaned.")
+
+    @app.cli.command('backfill-bloom')
+    @click.option('--chunk-size', default=500, show_default=True, help='Questions per chunk/transaction.')
+    @click.option('--restart', is_flag=True, help='Ignore an unfinished checkpoint and start from the beginning.')
+    def backfill_bloom(chunk_size, restart):
+        """Recompute Bloom level and difficulty for every question (chunked, resumable)."""
+        from .services.backfill_service import run_bloom_backfill
+
+        def report(summary):
+            click.echo(f"  {summary['processed']} processed, {summary['updated']} updated "
+                       f"({summary['rowsPerSecond']:.0f} rows/s)")
+
+        summary = run_bloom_backfill(chunk_size=chunk_size, restart=restart, progress=report)
+        if summary['resumedFrom']:
+            click.echo(f"Resumed after question {summary['resumedFrom']}.")
+        click.echo(f"Backfill complete! Updated {summary['updated']} of {summary['processed']} questions "
+                   f"in {summary['elapsed']:.1f}s.")
+
+    @app.cli.command('reap-ai-jobs')
+    @click.option('--timeout', type=float, default=None, help='Seconds after which a pending job is stale (default AI_JOB_TIMEOUT).')
+    def reap_ai_jobs(timeout):
+        """Mark QUEUED/RUNNING AI jobs whose worker died as FAILED."""
+        from .services.ai_job_service import reap_stale_jobs
+        click.echo(f"Marked {reap_stale_jobs(timeout)} stale AI job(s) as FAILED.")
+
+    @app.cli.command('index-embeddings')
+    @click.option('--subject-id', default=None, help='Only index this subject (default: every subject).')
+    def index_embeddings(subject_id):
+        """Embed every question that has no embedding for the active AI provider's model."""
+        import uuid
+        from .models import Subject
+        from .services.ai_provider import get_active_ai_provider
+        from .services.embedding_service import ensure_subject_indexed
+        from .services.rbac_service import get_settings
+
+        provider = get_active_ai_provider(get_settings())
+        subject_ids = [uuid.UUID(subject_id)] if subject_id else [s.id for s in Subject.query.all()]
+        written = sum(ensure_subject_indexed(sid, provider) for sid in subject_ids)
+        click.echo(f"Indexed {written} question embeddings across {len(subject_ids)} subject(s) "
+                   f"for {provider.embedding_model_key}.")
@@ -21,3 +21,36 @@ class Config:
         "pool_pre_ping": True,    # Test connections before use (essential for Neon serverless)
     }
 
+    # Queue saved questions for background embedding so duplicate checks only embed the new text
+    EMBED_QUESTIONS_ON_SAVE = os.getenv("EMBED_QUESTIONS_ON_SAVE", "true").lower() == "true"
+
+    # Upper bound (seconds) for the auto-generate paper solver
+    PAPER_SOLVER_TIME_LIMIT = float(os.getenv("PAPER_SOLVER_TIME_LIMIT", "5"))
+
+    # Seconds between checks of the system_settings change stamp (writes in this process invalidate immediately)
+    SETTINGS_CACHE_TTL = float(os.getenv("SETTINGS_CACHE_TTL", "5"))
+
+    # Captcha store shared by all gunicorn workers on the host ("sqlite") or per process ("memory")
+    CAPTCHA_STORE_BACKEND = os.getenv("CAPTCHA_STORE_BACKEND", "sqlite")
+    # sqlite file of the shared store (default: captcha.sqlite3 in the app's instance folder, mode 0600)
+    CAPTCHA_STORE_PATH = os.getenv("CAPTCHA_STORE_PATH")
+    # Pre-rendered captcha challenges kept ready per worker (0 renders every captcha in the request)
+    CAPTCHA_POOL_SIZE = int(os.getenv("CAPTCHA_POOL_SIZE", "20"))
+
+    # Allow the offline STUB provider (canned questions, hash embeddings) to be selected, for load tests only
+    AI_STUB_ENABLED = os.getenv("AI_STUB_ENABLED", "false").lower() == "true"
+    # Background threads per worker process running queued AI generation jobs (0 runs them inline)
+    AI_JOB_WORKERS = int(os.getenv("AI_JOB_WORKERS", "4"))
+    # QUEUED/RUNNING jobs older than this many seconds are marked FAILED (their worker died)
+    AI_JOB_TIMEOUT = float(os.getenv("AI_JOB_TIMEOUT", "900"))
+    # Submissions are rejected with 429 while this many jobs are QUEUED/RUNNING (0 disables the cap)
+    AI_JOB_MAX_PENDING = int(os.getenv("AI_JOB_MAX_PENDING", "100"))
+
+    # Text embeddings kept in memory per worker in front of the embedding_cache table
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "20000"))
+    # Background threads per worker embedding questions the duplicate check finds unindexed (0 runs inline)
+    EMBEDDING_INDEX_WORKERS = int(os.getenv("EMBEDDING_INDEX_WORKERS", "1"))
+
+    # Opt-in cache of generated papers for identical prompts: seconds to keep a response (0 disables)
+    AI_RESPONSE_CACHE_TTL = float(os.getenv("AI_RESPONSE_CACHE_TTL", "0"))
+    AI_RESPONSE_CACHE_SIZE = int(os.getenv("AI_RESPONSE_CACHE_SIZE", "256"))
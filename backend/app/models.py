@@ -1,7 +1,8 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import JSON
+from sqlalchemy import JSON, DDL, event
 from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import validates
 from .db import db
 
 # Use generic Uuid from SQLAlchemy logic (Flask-SQLAlchemy 3.x+)
@@ -67,6 +68,12 @@ class User(db.Model):
     profile_picture = db.Column(db.String(255), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # creatorName ILIKE '%...%' filter (needs the pg_trgm extension, see below)
+        db.Index('ix_users_name_trgm', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
+
     def to_dict(self):
         return {
             "id": str(self.id),
@@ -170,6 +177,10 @@ class Question(db.Model):
     bloom_level = db.Column(db.String(20), nullable=False, default="understand")
     editor_data = db.Column(JSON().with_variant(JSONB, 'postgresql'), nullable=False)
     status = db.Column(db.String(20), nullable=False, default="DRAFT") # 'DRAFT', 'PENDING_EXPERT', 'PENDING_HOD', 'APPROVED', etc.
+    # Typed copy of the marks held in editor_data (set whenever editor_data is assigned)
+    marks = db.Column(db.Float, nullable=True)
+    # Plain text of the editor_data blocks for q= search (set whenever editor_data is assigned)
+    search_text = db.Column(db.Text, nullable=True)
     review_comments = db.Column(db.Text, nullable=True)
     reviewed_by = db.Column(db.Uuid, db.ForeignKey('users.id'), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -179,6 +190,27 @@ class Question(db.Model):
     creator = db.relationship('User', foreign_keys=[creator_id], backref='questions')
     reviewer = db.relationship('User', foreign_keys=[reviewed_by], backref='reviewed_questions')
 
+    __table_args__ = (
+        db.Index('ix_questions_subject_status_difficulty_marks', 'subject_id', 'status', 'difficulty', 'marks'),
+        # Listing order (created_at desc, id desc) is served by a backward scan of these
+        db.Index('ix_questions_subject_created', 'subject_id', 'created_at', 'id'),
+        db.Index('ix_questions_creator_created', 'creator_id', 'created_at'),
+        # Auto-generate candidate pool: only approved questions, range-scanned on marks
+        db.Index('ix_questions_approved_subject_marks', 'subject_id', 'marks',
+                 postgresql_where=db.text("status = 'APPROVED'"), sqlite_where=db.text("status = 'APPROVED'")),
+        # Full-text search on Postgres; SQLite uses the questions_fts table below
+        db.Index('ix_questions_search_tsv', db.text("to_tsvector('english', coalesce(search_text, ''))"),
+                 postgresql_using='gin').ddl_if(dialect='postgresql'),
+    )
+
+    @validates('editor_data')
+    def _sync_derived_columns(self, key, editor_data):
+        from .services.validation_service import editor_data_marks
+        from .services.bloom_service import extract_text_from_editor_data
+        self.marks = editor_data_marks(editor_data)
+        self.search_text = extract_text_from_editor_data(editor_data)
+        return editor_data
+
     def to_dict(self):
         sub_code = self.subject.code if self.subject else None
         ay_label = self.subject.academic_year.label if self.subject and self.subject.academic_year else None
@@ -203,6 +235,7 @@ class Question(db.Model):
             "source": self.source,
             "difficulty": self.difficulty,
             "bloomLevel": self.bloom_level,
+            "marks": self.marks,
             "editorData": self.editor_data,
             "status": self.status,
             "reviewComments": self.review_comments,
@@ -210,6 +243,88 @@ class Question(db.Model):
             "createdAt": self.created_at.isoformat()
         }
 
+# SQLite fallback for q= search: a contentless FTS5 index over questions.search_text, kept in
+# sync by triggers (the same statements are in the search_text migration). questions has no
+# INTEGER PRIMARY KEY, so its implicit rowid may change on VACUUM; FTS documents are keyed on
+# questions_fts_keys.docid, which is stable, and mapped back to questions.id there.
+QUESTIONS_FTS_DDL = (
+    "CREATE TABLE questions_fts_keys (docid INTEGER PRIMARY KEY, question_id CHAR(32) NOT NULL UNIQUE)",
+    "CREATE VIRTUAL TABLE questions_fts USING fts5(search_text, content='', tokenize='porter unicode61')",
+    "CREATE TRIGGER questions_fts_ai AFTER INSERT ON questions BEGIN "
+    "INSERT INTO questions_fts_keys(question_id) VALUES (new.id); "
+    "INSERT INTO questions_fts(rowid, search_text) "
+    "SELECT docid, new.search_text FROM questions_fts_keys WHERE question_id = new.id; END",
+    "CREATE TRIGGER questions_fts_ad AFTER DELETE ON questions BEGIN "
+    "INSERT INTO questions_fts(questions_fts, rowid, search_text) "
+    "SELECT 'delete', docid, old.search_text FROM questions_fts_keys WHERE question_id = old.id; "
+    "DELETE FROM questions_fts_keys WHERE question_id = old.id; END",
+    "CREATE TRIGGER questions_fts_au AFTER UPDATE OF search_text ON questions BEGIN "
+    "INSERT INTO questions_fts(questions_fts, rowid, search_text) "
+    "SELECT 'delete', docid, old.search_text FROM questions_fts_keys WHERE question_id = old.id; "
+    "INSERT INTO questions_fts(rowid, search_text) "
+    "SELECT docid, new.search_text FROM questions_fts_keys WHERE question_id = new.id; END",
+)
+
+for _statement in QUESTIONS_FTS_DDL:
+    event.listen(Question.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+for _table in ('questions_fts', 'questions_fts_keys'):
+    event.listen(Question.__table__, 'before_drop', DDL(f'DROP TABLE IF EXISTS {_table}').execute_if(dialect='sqlite'))
+event.listen(db.metadata, 'before_create', DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
+
+class SubjectQuestionStat(db.Model):
+    """
+    Materialized question counts per (subject, status), kept in step with the questions
+    table by app.services.stats_service. No FK on subject_id: orphaned questions are counted too.
+    """
+    __tablename__ = 'subject_question_stats'
+
+    subject_id = db.Column(db.Uuid, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    question_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class QuestionEmbedding(db.Model):
+    """
+    Stored embedding of a question's text, keyed by question id and the content hash of that
+    text so it is only recomputed when the text (or the embedding model) changes.
+    """
+    __tablename__ = 'question_embeddings'
+
+    question_id = db.Column(db.Uuid, db.ForeignKey('questions.id', ondelete='CASCADE'), primary_key=True)
+    model_key = db.Column(db.String(150), nullable=False, index=True)
+    content_hash = db.Column(db.String(64), nullable=False)
+    dimensions = db.Column(db.Integer, nullable=False)
+    vector = db.Column(db.LargeBinary, nullable=False)  # float32 bytes
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class EmbeddingCacheEntry(db.Model):
+    """
+    Content-addressed embedding: the vector of any text whose normalized sha256 is content_hash,
+    under one embedding model. Shared by every feature that embeds text (see EmbeddingCache).
+    """
+    __tablename__ = 'embedding_cache'
+
+    model_key = db.Column(db.String(150), primary_key=True)
+    content_hash = db.Column(db.String(64), primary_key=True)
+    dimensions = db.Column(db.Integer, nullable=False)
+    vector = db.Column(db.LargeBinary, nullable=False)  # float32 bytes
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class JobCheckpoint(db.Model):
+    """
+    Progress marker for resumable maintenance jobs (e.g. the Bloom backfill).
+    last_key is the keyset position of the last committed chunk.
+    """
+    __tablename__ = 'job_checkpoints'
+
+    name = db.Column(db.String(50), primary_key=True)
+    last_key = db.Column(db.String(64), nullable=True)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    updated = db.Column(db.Integer, nullable=False, default=0)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class Paper(db.Model):
     __tablename__ = 'papers'
 
@@ -223,6 +338,10 @@ class Paper(db.Model):
     sections = db.relationship('Section', backref='paper', cascade='all, delete-orphan', order_by='Section.order_index', lazy=True)
     usages = db.relationship('QuestionUsage', backref='paper', cascade='all, delete-orphan', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_papers_subject_created', 'subject_id', 'created_at'),
+    )
+
     def to_dict(self):
         return {
             "id": str(self.id),
@@ -244,6 +363,10 @@ class Section(db.Model):
 
     paper_questions = db.relationship('PaperQuestion', backref='section', cascade='all, delete-orphan', order_by='PaperQuestion.order_index', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_sections_paper_order', 'paper_id', 'order_index'),
+    )
+
     def to_dict(self):
         return {
             "id": str(self.id),
@@ -268,13 +391,15 @@ class PaperQuestion(db.Model):
     id = db.Column(db.Uuid, primary_key=True, default=uuid.uuid4)
     paper_id = db.Column(db.Uuid, db.ForeignKey('papers.id'), nullable=False)
     section_id = db.Column(db.Uuid, db.ForeignKey('sections.id'), nullable=False)
-    question_id = db.Column(db.Uuid, db.ForeignKey('questions.id'), nullable=False)
+    question_id = db.Column(db.Uuid, db.ForeignKey('questions.id'), nullable=False, index=True)
     order_index = db.Column(db.Integer, nullable=False, default=0)
 
     question = db.relationship('Question')
 
     __table_args__ = (
+        # Also serves paper_id lookups (leading column)
         db.UniqueConstraint('paper_id', 'question_id', name='unique_paper_question'),
+        db.Index('ix_paper_questions_section_order', 'section_id', 'order_index'),
     )
 
 class QuestionUsage(db.Model):
@@ -282,12 +407,15 @@ class QuestionUsage(db.Model):
 
     id = db.Column(db.Uuid, primary_key=True, default=uuid.uuid4)
     question_id = db.Column(db.Uuid, db.ForeignKey('questions.id'), nullable=False, index=True)
-    paper_id = db.Column(db.Uuid, db.ForeignKey('papers.id'), nullable=False)
+    paper_id = db.Column(db.Uuid, db.ForeignKey('papers.id'), nullable=False, index=True)
     subject_id = db.Column(db.Uuid, db.ForeignKey('subjects.id'), nullable=False, index=True)
     used_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     __table_args__ = (
         db.UniqueConstraint('question_id', 'paper_id', name='unique_question_paper_usage'),
+        db.Index('ix_question_usages_subject_used', 'subject_id', 'used_at'),
+        # Per-question recency probe of the recently used EXISTS in the bank listing
+        db.Index('ix_question_usages_question_used', 'question_id', 'used_at'),
     )
 
 class AILog(db.Model):
@@ -303,6 +431,40 @@ class AILog(db.Model):
     admin = db.relationship('User', foreign_keys=[admin_user_id])
     question = db.relationship('Question', foreign_keys=[question_id])
 
+class AIJob(db.Model):
+    """
+    Background AI generation request (see ai_job_service). payload holds the prepared prompt spec;
+    result holds the response body once SUCCEEDED, and ai_log_id links the provider exchange.
+    """
+    __tablename__ = 'ai_jobs'
+
+    id = db.Column(db.Uuid, primary_key=True, default=uuid.uuid4)
+    user_id = db.Column(db.Uuid, db.ForeignKey('users.id'), nullable=False, index=True)
+    job_type = db.Column(db.String(30), nullable=False)  # PAPER, QUESTION
+    status = db.Column(db.String(20), nullable=False, default="QUEUED", index=True)  # QUEUED, RUNNING, SUCCEEDED, FAILED
+    payload = db.Column(db.JSON, nullable=False)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    ai_log_id = db.Column(db.Uuid, db.ForeignKey('ai_logs.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    ai_log = db.relationship('AILog', foreign_keys=[ai_log_id])
+
+    def to_dict(self):
+        return {
+            "jobId": str(self.id),
+            "jobType": self.job_type,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "aiLogId": str(self.ai_log_id) if self.ai_log_id else None,
+            "createdAt": self.created_at.isoformat() if self.created_at else None,
+            "startedAt": self.started_at.isoformat() if self.started_at else None,
+            "finishedAt": self.finished_at.isoformat() if self.finished_at else None
+        }
+
 
 class SystemSetting(db.Model):
     __tablename__ = 'system_settings'
@@ -323,7 +485,7 @@ class QuestionReviewStep(db.Model):
     __tablename__ = 'question_review_steps'
 
     id = db.Column(db.Uuid, primary_key=True, default=uuid.uuid4)
-    question_id = db.Column(db.Uuid, db.ForeignKey('questions.id'), nullable=False)
+    question_id = db.Column(db.Uuid, db.ForeignKey('questions.id'), nullable=False, index=True)
     stage_name = db.Column(db.String(50), nullable=False) # e.g. 'SUBJECT_EXPERT', 'HOD'
     reviewer_id = db.Column(db.Uuid, db.ForeignKey('users.id'), nullable=True)
     status = db.Column(db.String(20), nullable=False, default='PENDING') # 'PENDING', 'APPROVED', 'REVISION_NEEDED'
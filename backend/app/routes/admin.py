@@ -158,6 +158,16 @@ def assign_subject():
     
     return jsonify({'message': 'Subject assigned successfully'}), 201
 
+@bp.route('/captcha-metrics', methods=['GET'])
+def captcha_metrics():
+    from ..services.captcha_service import get_captcha_pool
+    return jsonify(get_captcha_pool().metrics()), 200
+
+@bp.route('/ai-provider-metrics', methods=['GET'])
+def ai_provider_metrics():
+    from ..services.ai_provider import provider_metrics
+    return jsonify(provider_metrics.snapshot()), 200
+
 @bp.route('/course-outcomes', methods=['POST'])
 def create_course_outcome():
     data = request.get_json()
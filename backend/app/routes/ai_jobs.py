@@ -0,0 +1,68 @@
+import uuid
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..services.rbac_service import get_permission_resolver
+
+bp = Blueprint('ai_jobs', __name__, url_prefix='/api/ai/jobs')
+
+@bp.route('', methods=['POST'])
+@jwt_required()
+def submit_ai_job():
+    """
+    Queues a paper ("PAPER", same body as /admin/ai/generate-paper) or question ("QUESTION", same
+    body as /api/ai/generate-question) generation and returns its id immediately.
+    """
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+
+        from ..services.ai_job_service import submit_job, JobQueueFull, RETRY_AFTER_SECONDS
+        try:
+            job = submit_job(user_id, data.get('type'), data)
+        except JobQueueFull as e:
+            return jsonify({'error': str(e)}), 429, {'Retry-After': str(RETRY_AFTER_SECONDS)}
+        except PermissionError as e:
+            return jsonify({'error': str(e)}), 403
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 404
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify({'jobId': str(job.id), 'status': job.status}), 202, {'Retry-After': str(RETRY_AFTER_SECONDS)}
+
+    except Exception as e:
+        print(f"AI Job Submit Error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/<job_id>', methods=['GET'])
+@jwt_required()
+def get_ai_job(job_id):
+    """
+    Job status and, once SUCCEEDED, its result. `?wait=N` long-polls up to N seconds (max 5);
+    unfinished jobs are answered with a Retry-After hint for the next poll.
+    """
+    try:
+        j_uuid = uuid.UUID(job_id)
+    except ValueError:
+        return jsonify({'error': 'Invalid job id format'}), 400
+
+    try:
+        wait = float(request.args.get('wait', 0))
+    except ValueError:
+        return jsonify({'error': 'wait must be a number of seconds'}), 400
+
+    from ..services.ai_job_service import get_job, PENDING_STATUSES, RETRY_AFTER_SECONDS
+    job = get_job(j_uuid)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    # Ownership is checked before long-polling so nobody can hold a worker on another user's job
+    resolver = get_permission_resolver(get_jwt_identity())
+    if job.user_id != resolver.user_id and not resolver.is_admin:
+        return jsonify({'error': 'Unauthorized: This job belongs to another user.'}), 403
+
+    if wait > 0:
+        job = get_job(j_uuid, wait=wait)
+    if job.status in PENDING_STATUSES:
+        return jsonify(job.to_dict()), 200, {'Retry-After': str(RETRY_AFTER_SECONDS)}
+    return jsonify(job.to_dict())
@@ -1,41 +1,20 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token
 import bcrypt
-import time as _time
 import re
 from ..models import User, db
-from captcha.image import ImageCaptcha
-import base64
-import io
 import uuid
+from ..services.captcha_service import get_captcha_store, get_captcha_pool
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
 
-# Store (text, timestamp) tuples to enable TTL-based cleanup
-CAPTCHA_STORE = {}
-CAPTCHA_TTL_SECONDS = 300  # 5 minutes
-
-def _cleanup_expired_captchas():
-    """Remove CAPTCHAs older than 5 minutes to prevent memory leak."""
-    now = _time.time()
-    expired = [k for k, (_, ts) in CAPTCHA_STORE.items() if now - ts > CAPTCHA_TTL_SECONDS]
-    for k in expired:
-        del CAPTCHA_STORE[k]
-
 @bp.route('/captcha', methods=['GET'])
 def get_captcha():
-    _cleanup_expired_captchas()  # Purge stale entries on every new request
-
-    image = ImageCaptcha(width=280, height=90)
-    captcha_text = str(uuid.uuid4())[:6].upper()
-    data = image.generate(captcha_text)
-    
-    # Convert to base64
-    image_io = io.BytesIO(data.read())
-    encoded_img = base64.b64encode(image_io.getvalue()).decode('ascii')
+    # Pre-rendered by the pool's background thread; renders inline only when the pool is drained
+    captcha_text, encoded_img = get_captcha_pool().take()
     
     captcha_id = str(uuid.uuid4())
-    CAPTCHA_STORE[captcha_id] = (captcha_text, _time.time())
+    get_captcha_store().put(captcha_id, captcha_text)
     
     return jsonify({
         'captchaId': captcha_id,
@@ -49,17 +28,9 @@ def verify_captcha(captcha_id, captcha_input):
     if not captcha_id or not captcha_input:
         return False
     
-    entry = CAPTCHA_STORE.get(captcha_id)
-    if not entry:
-        return False
-    
-    stored_code, created_at = entry
-    
-    # Remove used captcha
-    del CAPTCHA_STORE[captcha_id]
-    
-    # Reject if expired
-    if _time.time() - created_at > CAPTCHA_TTL_SECONDS:
+    # Single use: the store forgets the code and rejects expired ones
+    stored_code = get_captcha_store().pop(captcha_id)
+    if not stored_code:
         return False
     
     return stored_code.upper() == captcha_input.upper()
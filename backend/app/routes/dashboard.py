@@ -2,7 +2,8 @@ import uuid
 from datetime import datetime
 from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from ..models import db, User, Subject, FacultyAssignment, Question, Paper
+from sqlalchemy.orm import joinedload
+from ..models import db, User, Subject, FacultyAssignment, Paper
 
 bp = Blueprint('dashboard', __name__, url_prefix='/api/dashboard')
 
@@ -49,6 +50,17 @@ def get_academic_dashboard():
             'staffTracker': []
         }
 
+        # Materialized per-subject question counts, read once and shared by every tracker below
+        from ..services.stats_service import get_subject_question_stats
+        question_stats = None
+        empty_stats = {'total': 0, 'approved': 0, 'pendingReview': 0}
+
+        def load_question_stats():
+            nonlocal question_stats
+            if question_stats is None:
+                question_stats = get_subject_question_stats()
+            return question_stats
+
         # 1. FACULTY: Fetch assigned subjects
         fac_subject_ids = {a.subject_id for a in assignments if a.role_type == 'FACULTY' and a.subject_id}
 
@@ -70,7 +82,8 @@ def get_academic_dashboard():
         expert_subjects = Subject.query.filter(Subject.id.in_(expert_subject_ids)).all() if expert_subject_ids else []
 
         for sub in expert_subjects:
-            pending_count = Question.query.filter(Question.subject_id == sub.id, Question.status != 'APPROVED').count()
+            sub_stats = load_question_stats().get(sub.id, empty_stats)
+            pending_count = sub_stats['total'] - sub_stats['approved']
             result['expertSubjects'].append({
                 'id': str(sub.id),
                 'code': sub.code,
@@ -84,8 +97,9 @@ def get_academic_dashboard():
             target_dept = list(hod_depts)[0] if hod_depts else (user.department or 'CSE')
             
             total_subjects = Subject.query.count()
-            total_questions = Question.query.count()
-            approved_questions = Question.query.filter_by(status='APPROVED').count()
+            all_stats = load_question_stats().values()
+            total_questions = sum(st['total'] for st in all_stats)
+            approved_questions = sum(st['approved'] for st in all_stats)
 
             result['hodStats'] = {
                 'department': target_dept,
@@ -98,7 +112,7 @@ def get_academic_dashboard():
         # 4. COE: Fetch paper list
         if 'COE' in active_roles or user.role in ['SUPER_ADMIN', 'ADMIN']:
             # Fetch last 5 exam papers
-            papers = Paper.query.order_by(Paper.created_at.desc()).limit(5).all()
+            papers = Paper.query.options(joinedload(Paper.subject)).order_by(Paper.created_at.desc()).limit(5).all()
             result['coePapers'] = [{
                 'id': str(p.id),
                 'title': p.title,
@@ -110,10 +124,12 @@ def get_academic_dashboard():
         # 5. STAFF: Central review tracker
         if 'STAFF' in active_roles or user.role in ['SUPER_ADMIN', 'ADMIN']:
             all_subjects = Subject.query.all()
+            stats = load_question_stats()
             for sub in all_subjects:
-                total = Question.query.filter_by(subject_id=sub.id).count()
-                approved = Question.query.filter_by(subject_id=sub.id, status='APPROVED').count()
-                pending = Question.query.filter_by(subject_id=sub.id, status='PENDING_REVIEW').count()
+                sub_stats = stats.get(sub.id, empty_stats)
+                total = sub_stats['total']
+                approved = sub_stats['approved']
+                pending = sub_stats['pendingReview']
                 result['staffTracker'].append({
                     'subjectCode': sub.code,
                     'subjectName': sub.name,
@@ -5,14 +5,17 @@ from ..models import db, Paper, Section, PaperQuestion, QuestionUsage, Question,
 
 bp = Blueprint('papers', __name__, url_prefix='/api/papers')
 
-def get_paper_or_404(paper_id):
-    import uuid
-    try:
-        p_uuid = uuid.UUID(str(paper_id))
-    except ValueError:
-        return None
-    paper = Paper.query.get(p_uuid)
-    return paper
+# Upper bound on candidate papers created by one auto-generate call
+AUTO_GENERATE_MAX_PAPERS = 5
+
+def get_paper_or_404(paper_id, options=None):
+    from ..services.serialization_service import load_paper
+    return load_paper(paper_id, options)
+
+def get_paper_for_serialization(paper_id):
+    """Paper with sections -> questions -> subject/CO/creator eagerly loaded for to_dict/exports."""
+    from ..services.serialization_service import paper_serialization_options
+    return get_paper_or_404(paper_id, paper_serialization_options())
 
 # A. Create Draft
 @bp.route('/draft', methods=['POST'])
@@ -79,7 +82,7 @@ def create_draft():
 @bp.route('/<paper_id>', methods=['GET'])
 @jwt_required()
 def get_paper(paper_id):
-    paper = get_paper_or_404(paper_id)
+    paper = get_paper_for_serialization(paper_id)
     if not paper: return jsonify({'error': 'Paper not found'}), 404
 
     from .auth import check_subject_access
@@ -132,10 +135,9 @@ def reorder_sections(paper_id):
     
     ordered_ids = request.json.get('orderedSectionIds', [])
     try:
-        for idx, s_id in enumerate(ordered_ids):
-            sec = Section.query.filter_by(paper_id=paper_id, id=s_id).first()
-            if sec: sec.order_index = idx
-        db.session.commit()
+        # One CASE update for the whole ordering
+        from ..services.paper_service import reorder_sections as apply_section_order
+        apply_section_order(paper.id, ordered_ids)
         return jsonify({'message': 'Sections reordered'}), 200
     except Exception as e:
         db.session.rollback()
@@ -158,34 +160,20 @@ def move_question(paper_id):
     q_id = data.get('questionId')
     from_sec_id = data.get('fromSectionId')
     to_sec_id = data.get('toSectionId')
-    new_index = data.get('newIndex', 0)
-
     try:
-        # Find the question in old section
-        pq = PaperQuestion.query.filter_by(paper_id=paper_id, section_id=from_sec_id, question_id=q_id).first()
-        if not pq: return jsonify({'error': 'Question not found in source section'}), 404
-
-        # Validate destination section exists inside this paper
-        dest_sec = Section.query.filter_by(id=to_sec_id, paper_id=paper_id).first()
-        if not dest_sec: return jsonify({'error': 'Destination section invalid'}), 400
-
-        # Change section assignment
-        pq.section_id = to_sec_id
-        pq.order_index = new_index
+        new_index = int(data.get('newIndex', 0))
+    except (ValueError, TypeError):
+        return jsonify({'error': 'newIndex must be an integer'}), 400
 
-        # Normalize the order indices of the destination section
-        # Shift everything >= new_index up by 1 (except the one we just moved)
-        dest_pqs = PaperQuestion.query.filter(
-            PaperQuestion.section_id == to_sec_id,
-            PaperQuestion.question_id != q_id,
-            PaperQuestion.order_index >= new_index
-        ).all()
-
-        for dest_pq in dest_pqs:
-            dest_pq.order_index += 1
-
-        db.session.commit()
+    try:
+        # The move and the shift of destination rows at or after new_index are one UPDATE
+        from ..services.paper_service import move_paper_question
+        move_paper_question(paper.id, q_id, from_sec_id, to_sec_id, new_index)
         return jsonify({'message': 'Question moved cleanly'}), 200
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -194,7 +182,7 @@ def move_question(paper_id):
 @bp.route('/<paper_id>/finalize', methods=['PUT'])
 @jwt_required()
 def finalize_paper(paper_id):
-    paper = get_paper_or_404(paper_id)
+    paper = get_paper_for_serialization(paper_id)
     if not paper: return jsonify({'error': 'Paper not found'}), 404
 
     from .auth import check_subject_access
@@ -220,8 +208,8 @@ def finalize_paper(paper_id):
         if not total_marks:
             return jsonify({'error': 'totalMarks is required to finalize paper.'}), 400
             
-        pqs = PaperQuestion.query.filter_by(paper_id=paper_id).all()
-        questions = [pq.question for pq in pqs]
+        from ..services.serialization_service import load_paper_questions
+        questions = load_paper_questions(paper.id)
         
         from ..services.validation_service import validate_question_paper
         validation = validate_question_paper(questions, total_marks)
@@ -231,11 +219,10 @@ def finalize_paper(paper_id):
         paper.status = 'FINALIZED'
         
         # Tracking usages natively
-        pqs = PaperQuestion.query.filter_by(paper_id=paper_id).all()
-        for pq in pqs:
+        for q in questions:
             usage = QuestionUsage(
-                question_id=pq.question_id,
-                paper_id=paper_id,
+                question_id=q.id,
+                paper_id=paper.id,
                 subject_id=paper.subject_id,
                 used_at=datetime.utcnow()
             )
@@ -261,8 +248,8 @@ def validate_paper(paper_id):
     data = request.get_json() or {}
     total_marks = data.get('totalMarks', 100)
     
-    pqs = PaperQuestion.query.filter_by(paper_id=paper_id).all()
-    questions = [pq.question for pq in pqs]
+    from ..services.serialization_service import load_paper_questions
+    questions = load_paper_questions(paper.id)
     
     from ..services.validation_service import validate_question_paper
     result = validate_question_paper(questions, total_marks)
@@ -286,8 +273,8 @@ def validate_draft():
     questions = Question.query.filter(Question.id.in_(parsed_ids)).all()
 
     from .auth import check_subject_access
-    for q in questions:
-        if not check_subject_access(q.subject_id):
+    for subject_id in {q.subject_id for q in questions}:
+        if not check_subject_access(subject_id):
             return jsonify({'error': 'You do not have access to some questions in the draft'}), 403
 
     from ..services.validation_service import validate_question_paper
@@ -316,81 +303,73 @@ def auto_generate_paper():
     except ValueError:
         return jsonify({'error': 'Invalid subjectId format'}), 400
         
-    questions = Question.query.filter_by(subject_id=sub_uuid, status='APPROVED').all()
-    if not questions:
+    approved = Question.query.filter_by(subject_id=sub_uuid, status='APPROVED')
+    # Candidate pool straight from the (subject_id, status, difficulty, marks) index: only
+    # questions whose marks can be part of a paper of this total are loaded
+    questions = approved.filter(Question.marks > 0, Question.marks <= total_marks).all()
+    if not questions and not db.session.query(approved.exists()).scalar():
         return jsonify({'error': 'No approved questions found for this subject. Ensure questions are reviewed and approved first.'}), 400
-        
-    import random
-    from ..services.validation_service import validate_question_paper
-    
-    # Pre-calculate marks for efficiency
-    for q in questions:
-        ed = q.editor_data or {}
-        marks_str = ed.get('marks') or ed.get('meta', {}).get('marks')
-        try:
-            q._mark_val = float(marks_str) if marks_str else 0
-        except:
-            q._mark_val = 0
 
-    valid_subset = None
-    max_attempts = 2000
-    
-    for _ in range(max_attempts):
-        subset = []
-        current_marks = 0
-        
-        # Bias the shuffle slightly towards target_difficulty
-        if random.random() > 0.5:
-             questions.sort(key=lambda q: 0 if (q.difficulty or 'MEDIUM').upper() == target_difficulty else 1)
-        else:
-             random.shuffle(questions)
-             
-        for q in questions:
-            if current_marks + q._mark_val <= total_marks:
-                subset.append(q)
-                current_marks += q._mark_val
-                if current_marks == total_marks:
-                    break
-                    
-        if current_marks == total_marks:
-            val_res = validate_question_paper(subset, total_marks)
-            if val_res['valid']:
-                valid_subset = subset
-                break
-                
-    if not valid_subset:
-        return jsonify({'error': 'Could not find a combination of questions satisfying the 40/30/30 distribution and Bloom coverage rules. Add more varied questions to the bank.'}), 400
-        
     try:
-        subject = Subject.query.get(sub_uuid)
-        paper = Paper(
-            subject_id=sub_uuid,
-            title=f"Auto-Generated Paper ({total_marks} Marks)",
-            status="DRAFT",
-            created_at=datetime.utcnow()
-        )
-        db.session.add(paper)
-        db.session.flush()
+        count = int(data.get('count', 1))
+        seed = data.get('seed')
+        seed = int(seed) if seed is not None else None
+    except (ValueError, TypeError):
+        return jsonify({'error': 'count and seed must be integers'}), 400
+    count = max(1, min(count, AUTO_GENERATE_MAX_PAPERS))
+
+    # Exact knapsack search over marks, difficulty floors and Bloom coverage (bounded by a time limit)
+    from flask import current_app
+    from ..services.paper_generation_service import solve_paper
+    solution = solve_paper(
+        questions, total_marks,
+        count=count,
+        seed=seed,
+        target_difficulty=target_difficulty,
+        time_limit=current_app.config.get('PAPER_SOLVER_TIME_LIMIT', 5.0)
+    )
+    if not solution['papers']:
+        return jsonify({
+            'error': solution['reason'],
+            'provenInfeasible': solution['feasible'] is False,
+            'details': solution['details']
+        }), 400
 
-        section = Section(
-            paper_id=paper.id,
-            title="Section A",
-            order_index=0
-        )
-        db.session.add(section)
-        db.session.flush()
-        
-        for idx, q in enumerate(valid_subset):
-            pq = PaperQuestion(
+    try:
+        paper_ids = []
+        for variant, selected in enumerate(solution['papers'], start=1):
+            title = f"Auto-Generated Paper ({total_marks} Marks)"
+            if len(solution['papers']) > 1:
+                title += f" - Variant {variant}"
+            paper = Paper(
+                subject_id=sub_uuid,
+                title=title,
+                status="DRAFT",
+                created_at=datetime.utcnow()
+            )
+            db.session.add(paper)
+            db.session.flush()
+
+            section = Section(
                 paper_id=paper.id,
-                section_id=section.id,
-                question_id=q.id,
-                order_index=idx
+                title="Section A",
+                order_index=0
             )
-            db.session.add(pq)
+            db.session.add(section)
+            db.session.flush()
+            
+            for idx, q in enumerate(selected):
+                pq = PaperQuestion(
+                    paper_id=paper.id,
+                    section_id=section.id,
+                    question_id=q.id,
+                    order_index=idx
+                )
+                db.session.add(pq)
+            paper_ids.append(str(paper.id))
             
         db.session.commit()
-        return jsonify({'paperId': str(paper.id)}), 201
+        return jsonify({'paperId': paper_ids[0], 'paperIds': paper_ids}), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -398,7 +377,7 @@ def auto_generate_paper():
 @bp.route('/<paper_id>/export/docx', methods=['GET'])
 @jwt_required()
 def export_paper_docx(paper_id):
-    paper = get_paper_or_404(paper_id)
+    paper = get_paper_for_serialization(paper_id)
     if not paper:
         return jsonify({'error': 'Paper not found'}), 404
 
@@ -425,7 +404,7 @@ def export_paper_docx(paper_id):
 @bp.route('/<paper_id>/export/latex', methods=['GET'])
 @jwt_required()
 def export_paper_latex(paper_id):
-    paper = get_paper_or_404(paper_id)
+    paper = get_paper_for_serialization(paper_id)
     if not paper:
         return jsonify({'error': 'Paper not found'}), 404
 
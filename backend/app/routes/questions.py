@@ -61,7 +61,7 @@ def create_bulk_questions():
     questions = data.get('questions', [])
     co_ids = data.get('coIds', [])
     
-    if not subject_id or not questions:
+    if not subject_id or not questions or not isinstance(questions, list):
         return jsonify({'error': 'Missing subjectId or questions list'}), 400
         
     try:
@@ -91,66 +91,15 @@ def create_bulk_questions():
         if not s_uuid:
             return jsonify({'error': 'Invalid subjectId format'}), 400
 
-        # Optional metadata
-        difficulty = data.get('difficulty', 'MEDIUM').upper()
-        if difficulty not in ["EASY", "MEDIUM", "HARD"]:
-            difficulty = "MEDIUM"
-
-        # Simple bulk creation logic
-        saved_count = 0
-
-        assigned_co_id = parse_uuid(co_ids[0]) if co_ids else None
-            
-        from datetime import datetime
-        import time
-
-        from ..services.bloom_service import classify_bloom_level, map_to_difficulty
-
-        for q_item in questions:
-            q_text = q_item.get('text')
-            if not q_text: 
-                continue
-                
-            q_marks = q_item.get('marks')
-            
-            computed_bloom_level = classify_bloom_level(q_text)
-            computed_difficulty = map_to_difficulty(computed_bloom_level)
-
-            # Construct minimal EditorJS block
-            editor_data = {
-                "time": int(time.time() * 1000),
-                "blocks": [
-                    {
-                        "id": "genAI" + str(saved_count),
-                        "type": "paragraph",
-                        "data": { "text": q_text }
-                    }
-                ],
-                "version": "2.28.0",
-                "meta": {
-                    "marks": q_marks,
-                    "difficulty": computed_difficulty,
-                    "bloomLevel": computed_bloom_level
-                }
-            }
-            
-            q_co_id = parse_uuid(q_item.get('courseOutcomeId')) or assigned_co_id
-
-            new_q = Question(
-                subject_id=s_uuid,
-                course_outcome_id=q_co_id, # Optional
-                creator_id=u_uuid,
-                source="AI",
-                difficulty=computed_difficulty,
-                bloom_level=computed_bloom_level,
-                editor_data=editor_data,
-                created_at=datetime.utcnow()
+        from ..services.question_service import bulk_insert_questions
+        try:
+            saved_count, results = bulk_insert_questions(
+                s_uuid, u_uuid, questions, default_co_id=parse_uuid(co_ids[0]) if co_ids else None
             )
-            db.session.add(new_q)
-            saved_count += 1
-            
-        db.session.commit()
-        return jsonify({"message": f"Saved {saved_count} questions", "count": saved_count}), 201
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 404
+
+        return jsonify({"message": f"Saved {saved_count} questions", "count": saved_count, "results": results}), 201
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -159,9 +108,6 @@ def create_bulk_questions():
 @bp.route('', methods=['GET'])
 @jwt_required()
 def get_questions():
-    from datetime import datetime, timedelta
-    from ..models import Paper, QuestionUsage, db
-
     # Allow filtering by subject_id
     subject_id_str = request.args.get('subjectId')
     subject_id = None
@@ -190,26 +136,9 @@ def get_questions():
     page = request.args.get('page', type=int)
     limit = request.args.get('limit', type=int)
     creator_name = request.args.get('creatorName')
-    
-    recently_used_ids_str = set()
-    recently_used_ids_obj = set()
-
-    if subject_id:
-        last_papers = Paper.query.filter_by(subject_id=subject_id).order_by(Paper.created_at.desc()).limit(3).all()
-        paper_ids = [p.id for p in last_papers]
-        
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        
-        usages_query = QuestionUsage.query.filter(
-            QuestionUsage.subject_id == subject_id,
-            db.or_(
-                QuestionUsage.paper_id.in_(paper_ids) if paper_ids else db.false(),
-                QuestionUsage.used_at >= thirty_days_ago
-            )
-        ).all()
-        
-        recently_used_ids_obj = {u.question_id for u in usages_query}
-        recently_used_ids_str = {str(u.question_id) for u in usages_query}
+    min_marks = request.args.get('minMarks', type=float)
+    max_marks = request.args.get('maxMarks', type=float)
+    search = request.args.get('q')
 
     from flask_jwt_extended import get_jwt
     from .auth import check_subject_access
@@ -245,8 +174,11 @@ def get_questions():
             pass
             
             if not assigned_ids:
-                return jsonify([]), 200
-            query = query.filter(Question.subject_id.in_(assigned_ids))
+                # Nothing visible, but answered in the shape of the requested mode (cursor, page or list)
+                from sqlalchemy import false
+                query = query.filter(false())
+            else:
+                query = query.filter(Question.subject_id.in_(assigned_ids))
 
     if subject_id:
         query = query.filter_by(subject_id=subject_id)
@@ -263,22 +195,61 @@ def get_questions():
         query = query.filter_by(difficulty=difficulty)
     if source:
         query = query.filter_by(source=source)
+    if min_marks is not None:
+        query = query.filter(Question.marks >= min_marks)
+    if max_marks is not None:
+        query = query.filter(Question.marks <= max_marks)
     if creator_id:
         query = query.filter_by(creator_id=creator_id)
     if creator_name:
         from ..models import User
         query = query.filter(Question.creator.has(User.name.ilike(f'%{creator_name}%')))
-        
-    if not include_used and recently_used_ids_obj:
-        query = query.filter(Question.id.notin_(list(recently_used_ids_obj)))
-        
+
+    # Recently used questions are excluded (NOT EXISTS) or flagged (EXISTS) in the same SELECT
+    recently_used = None
+    if subject_id:
+        recent = question_service.recently_used_condition(subject_id)
+        if include_used:
+            recently_used = recent
+        else:
+            query = query.filter(~recent)
+
+    # q= full-text search: best matches first, newest first among equal ranks
+    order = [Question.created_at.desc()]
+    if search:
+        from ..services.search_service import apply_text_search
+        query, search_rank = apply_text_search(query, search)
+        if search_rank is not None:
+            order.insert(0, search_rank)
+
+    # Keyset (cursor) mode: ?cursor= for the first page, then the returned nextCursor (q= filters only)
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        include_editor_data = request.args.get('includeEditorData', 'false').lower() == 'true'
+        try:
+            page_data = question_service.get_questions_page(
+                query, cursor=cursor, limit=limit,
+                include_editor_data=include_editor_data,
+                recently_used=recently_used
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(page_data), 200
+
+    from ..services.serialization_service import question_serialization_options
+    query = query.options(*question_serialization_options())
+    if recently_used is not None:
+        query = query.add_columns(recently_used.label('is_recently_used'))
+
+    def serialize(row):
+        q, is_recently_used = row if recently_used is not None else (row, False)
+        q_dict = q.to_dict()
+        q_dict['isRecentlyUsed'] = bool(is_recently_used)
+        return q_dict
+
     if page and limit:
-        questions_paginated = query.order_by(Question.created_at.desc()).paginate(page=page, per_page=limit, error_out=False)
-        results = []
-        for q in questions_paginated.items:
-            q_dict = q.to_dict()
-            q_dict['isRecentlyUsed'] = str(q.id) in recently_used_ids_str
-            results.append(q_dict)
+        questions_paginated = query.order_by(*order).paginate(page=page, per_page=limit, error_out=False)
+        results = [serialize(row) for row in questions_paginated.items]
             
         return jsonify({
             'questions': results,
@@ -287,15 +258,8 @@ def get_questions():
             'pages': questions_paginated.pages
         }), 200
     else:
-        questions = query.order_by(Question.created_at.desc()).all()
-        
-        results = []
-        for q in questions:
-            q_dict = q.to_dict()
-            q_dict['isRecentlyUsed'] = str(q.id) in recently_used_ids_str
-            results.append(q_dict)
-            
-        return jsonify(results), 200
+        rows = query.order_by(*order).all()
+        return jsonify([serialize(row) for row in rows]), 200
 
 @bp.route('/<question_id>', methods=['GET'])
 @jwt_required()
@@ -307,7 +271,8 @@ def get_single_question(question_id):
             q_uuid = uuid.UUID(str(question_id))
         except ValueError:
             return jsonify({'error': 'Invalid question ID format'}), 400
-        question = Question.query.get(q_uuid)
+        from ..services.serialization_service import load_question
+        question = load_question(q_uuid)
         if not question:
             return jsonify({'error': 'Question not found'}), 404
 
@@ -446,6 +411,10 @@ def update_question(question_id):
             question.review_comments = data['reviewComments']
             
         db.session.commit()
+
+        if 'editorData' in data:
+            from ..services.embedding_service import schedule_question_indexing
+            schedule_question_indexing([question.id])
         return jsonify({'message': 'Question updated successfully', 'question': question.to_dict()}), 200
 
     except Exception as e:
@@ -475,23 +444,12 @@ def analyze_bloom():
                 'tips': {}
             })
             
-        from ..services.bloom_service import classify_bloom_level, map_to_difficulty, BLOOM_KEYWORDS
-        
-        normalized = q_text.lower()
-        import string
-        translator = str.maketrans('', '', string.punctuation)
-        normalized_clean = normalized.translate(translator)
+        from ..services.bloom_service import classify_many, BLOOM_KEYWORDS
         
-        keywords_found = []
-        for level, keywords in BLOOM_KEYWORDS.items():
-            for kw in keywords:
-                import re
-                pattern = r'\b' + re.escape(kw) + r'\b'
-                if re.search(pattern, normalized_clean):
-                    keywords_found.append(kw)
-                    
-        bloom_level = classify_bloom_level(q_text)
-        difficulty = map_to_difficulty(bloom_level)
+        analysis = classify_many([q_text])[0]
+        keywords_found = analysis['keywordsFound']
+        bloom_level = analysis['bloomLevel']
+        difficulty = analysis['difficulty']
         
         suggestions = []
         if keywords_found:
@@ -510,6 +468,7 @@ def analyze_bloom():
             'bloomLevel': bloom_level,
             'difficulty': difficulty,
             'keywordsFound': keywords_found,
+            'scores': analysis['scores'],
             'suggestions': suggestions,
             'tips': BLOOM_KEYWORDS
         }), 200
@@ -97,10 +97,9 @@ def reorder_questions(section_id):
     
     ordered_ids = request.json.get('orderedQuestionIds', [])
     try:
-        for idx, q_id in enumerate(ordered_ids):
-            pq = PaperQuestion.query.filter_by(section_id=section_id, question_id=q_id).first()
-            if pq: pq.order_index = idx
-        db.session.commit()
+        # One CASE update for the whole ordering
+        from ..services.paper_service import reorder_section_questions
+        reorder_section_questions(section.id, ordered_ids)
         return jsonify({'message': 'Reordered successfully'}), 200
     except Exception as e:
         db.session.rollback()
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt
 from ..models import db, SystemSetting
+from ..services.rbac_service import get_settings as load_settings, invalidate_settings_cache
 
 bp = Blueprint('settings', __name__, url_prefix='/api/settings')
 
@@ -25,9 +26,7 @@ def check_super_admin_privilege():
 @bp.route('', methods=['GET'])
 def get_settings():
     try:
-        settings = SystemSetting.query.all()
-        result = {s.key: s.value for s in settings}
-        return jsonify(result), 200
+        return jsonify(load_settings()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -47,10 +46,10 @@ def update_settings():
                 db.session.add(setting)
         
         db.session.commit()
+        invalidate_settings_cache()
         
         # Return all settings after update
-        settings = SystemSetting.query.all()
-        result = {s.key: s.value for s in settings}
+        result = load_settings()
         return jsonify({'message': 'Settings updated successfully', 'settings': result}), 200
 
     except Exception as e:
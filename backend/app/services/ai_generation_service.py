@@ -0,0 +1,435 @@
+import json
+import logging
+import time
+import uuid
+from ..db import db
+from ..models import Question, Subject, CourseOutcome, AILog
+from .rbac_service import has_subject_permission
+
+logger = logging.getLogger(__name__)
+
+# Existing questions listed in the do-not-repeat block of each prompt
+PAPER_CONTEXT_QUESTIONS = 30
+QUESTION_CONTEXT_QUESTIONS = 20
+
+# Prompt building and result handling for AI generation, shared by the synchronous endpoints in
+# routes/ai.py and the background job queue (ai_job_service). prepare_* run in the request: they
+# check permissions, validate input and return a JSON-serializable spec; run_* call the provider.
+# Errors follow the question_service convention: PermissionError -> 403, ValueError -> 400,
+# LookupError -> 404.
+
+def _existing_question_texts(subject_id, query_text, k):
+    """
+    Texts of the (at most) k existing questions closest to `query_text`, for the prompt's
+    do-not-repeat list. Ranked against the subject's stored embeddings when there are any
+    (one embedding call, usually cached), otherwise the k most recent questions; either way
+    only those k rows are read.
+    """
+    from .embedding_service import find_similar_questions, question_text
+
+    ids = []
+    try:
+        from .ai_provider import get_active_ai_provider
+        from .rbac_service import get_settings
+        provider = get_active_ai_provider(get_settings())
+        matches = find_similar_questions(subject_id, query_text, provider, top_k=k, ensure_indexed=False)
+        ids = [question_id for question_id, _ in matches]
+    except Exception as e:
+        logger.warning(f"Similar-question retrieval failed, using latest questions: {e}")
+
+    columns = db.session.query(Question.id, Question.editor_data)
+    if ids:
+        rows = dict(columns.filter(Question.id.in_(ids)).all())
+        editor_datas = [rows[question_id] for question_id in ids if question_id in rows]
+    else:
+        editor_datas = [
+            editor_data for _, editor_data in
+            columns.filter(Question.subject_id == subject_id)
+            .order_by(Question.created_at.desc(), Question.id.desc())
+            .limit(k)
+        ]
+
+    texts = []
+    for editor_data in editor_datas:
+        q_text = question_text(editor_data)
+        if q_text:
+            texts.append(q_text)
+    return texts
+
+def prepare_paper_generation(user_id, data):
+    subject_id = data.get('subjectId')
+
+    # Verify Contextual Permissions: Admin, Super Admin, or COE for this subject
+    if not has_subject_permission(user_id, subject_id, ['COE']):
+        raise PermissionError('Unauthorized: Only COE or Administrators can generate question papers.')
+
+    co_ids = data.get('courseOutcomeIds', [])
+    difficulty = data.get('difficulty', 'medium')
+    course_specs = data.get('courseSpecifications', '')
+    marks_distribution = data.get('marksDistribution', {"short": 5, "long": 3})
+
+    try:
+        s_uuid = uuid.UUID(str(subject_id)) if subject_id else None
+    except ValueError:
+        raise ValueError('Invalid subjectId format')
+
+    parsed_co_ids = []
+    for cid in co_ids:
+        try:
+            parsed_co_ids.append(uuid.UUID(str(cid)))
+        except ValueError:
+            pass
+
+    subject = db.session.get(Subject, s_uuid) if s_uuid else None
+    if not subject:
+        raise LookupError('Subject not found')
+
+    cos = CourseOutcome.query.filter(CourseOutcome.id.in_(parsed_co_ids)).all()
+    co_list = [f"{co.co_code}: {co.description}" for co in cos]
+
+    # Fetch the existing questions closest to these outcomes to prevent duplication
+    retrieval_query = " ".join([subject.name] + [co.description or "" for co in cos] + [course_specs[:1000]])
+    existing_q_texts = _existing_question_texts(s_uuid, retrieval_query, PAPER_CONTEXT_QUESTIONS)
+
+    existing_questions_block = ""
+    if existing_q_texts:
+        capped = existing_q_texts[:PAPER_CONTEXT_QUESTIONS]
+        numbered = [f"  {i+1}. {t[:200]}" for i, t in enumerate(capped)]
+        existing_questions_block = (
+            "\n\n=== EXISTING QUESTIONS IN DATABASE (DO NOT REPEAT OR PARAPHRASE THESE) ===\n"
+            + "\n".join(numbered)
+            + "\n=== END OF EXISTING QUESTIONS ===\n"
+        )
+
+    num_short = marks_distribution.get('short', 0)
+    num_long = marks_distribution.get('long', 0)
+
+    syllabus_section = ""
+    if course_specs.strip():
+        syllabus_section = f"""
+=== SYLLABUS / COURSE SPECIFICATIONS (MANDATORY CONTEXT) ===
+{course_specs.strip()}
+=== END OF SYLLABUS ===
+
+CRITICAL: Every question you generate MUST be directly traceable to a topic, concept, 
+or learning outcome listed in the syllabus above. Do NOT invent topics outside this scope.
+"""
+
+    system_prompt = """You are an expert university examination paper setter with deep subject-matter expertise. 
+Your task is to create high-quality, original examination questions that are:
+- Factually accurate and academically rigorous
+- Directly connected to the provided syllabus and course outcomes
+- Proportional in depth and complexity to the marks assigned
+- Completely unique — never repeating or paraphrasing existing questions
+
+STRICT RULES:
+1. OUTPUT FORMAT: Return strictly VALID JSON only. No markdown, no code fences, no explanations.
+2. SYLLABUS ADHERENCE: Every question must test a concept explicitly covered in the syllabus.
+3. NO REPETITION: If existing questions are provided, your generated questions must be semantically 
+   different — not rephrased, reworded, or restructured versions of them.
+4. FACTUAL ACCURACY: Do not generate questions with incorrect premises, made-up terminology, 
+   or misleading statements. Each question must be answerable by a student who has studied the syllabus.
+5. MARKS-QUALITY ALIGNMENT: The complexity and expected answer length must match the marks:
+   - 2-3 marks: Single-concept recall or definition (1-2 sentence answer expected)
+   - 5 marks: Conceptual explanation or short comparison (half-page answer expected)
+   - 8-10 marks: Analytical question requiring worked examples, diagrams, or multi-step reasoning (1-2 page answer)
+   - 12+ marks: Comprehensive question with sub-parts covering multiple concepts (2+ page answer)
+6. DIVERSITY AND CO ADHERENCE: Every question must target exactly one of the provided Course Outcomes. If multiple Course Outcomes are listed, spread questions across them. If only one Course Outcome is provided, all questions must target that single outcome. Do NOT generate questions testing concepts outside the provided course outcomes."""
+
+    user_prompt = f"""Generate an examination question paper for the following subject.
+
+SUBJECT: {subject.name}
+
+COURSE OUTCOMES TO ASSESS (MANDATORY CONSTRAINT):
+Only generate questions that directly assess the following Course Outcomes. Do not generate questions for any other topics or other course outcomes.
+{chr(10).join(f"  - {co}" for co in co_list)}
+{syllabus_section}
+OVERALL DIFFICULTY LEVEL: {difficulty}
+
+REQUIREMENTS:
+- Section A: Exactly {num_short} Short Answer Questions
+  * Each question should be answerable in 2-5 sentences
+  * Assign marks: 2, 3, or 5 per question (matching question depth)
+  * Test recall, definitions, basic understanding, or simple applications
+  * Each question must map to one of the provided course outcomes above
+
+- Section B: Exactly {num_long} Long Answer Questions
+  * Each question should require detailed explanation, derivation, or analysis
+  * Assign marks: 8, 10, or 12 per question (matching question depth)
+  * May include sub-parts (a, b, c) for higher-mark questions
+  * Test higher-order thinking: analysis, evaluation, design, or comparison
+  * Each question must map to one of the provided course outcomes above
+{existing_questions_block}
+RETURN THIS EXACT JSON STRUCTURE (Include the "coCode" property for each question to specify which Course Outcome it belongs to, using the format e.g. "CO1", "CO2"):
+{{
+  "sectionA": [
+    {{"text": "question text here", "marks": 5, "coCode": "CO1"}},
+    ...
+  ],
+  "sectionB": [
+    {{"text": "question text here", "marks": 10, "coCode": "CO2"}},
+    ...
+  ],
+  "totalQuestions": {num_short + num_long}
+}}"""
+
+    return {
+        'systemPrompt': system_prompt,
+        'userPrompt': user_prompt,
+        'coCodeToId': {co.co_code: str(co.id) for co in cos},
+        'defaultCourseOutcomeId': co_ids[0] if co_ids else None,
+        # Regenerate with "fresh": true to skip the response cache
+        'fresh': bool(data.get('fresh'))
+    }
+
+PAPER_SECTIONS = ('sectionA', 'sectionB')
+
+def _map_course_outcome(question, spec):
+    co_code = question.get('coCode')
+    if co_code and co_code in spec['coCodeToId']:
+        question['courseOutcomeId'] = spec['coCodeToId'][co_code]
+    else:
+        question['courseOutcomeId'] = spec['defaultCourseOutcomeId']
+    return question
+
+def _strip_code_fences(text):
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0]
+    elif "```" in text:
+        text = text.split("```")[1].split("```")[0]
+    return text.strip()
+
+def _parse_paper(text):
+    return json.loads(text.strip())
+
+def run_paper_generation(spec, provider):
+    """Calls the provider and maps each question's coCode to a courseOutcomeId. Returns (result, raw text)."""
+    # Only completions that parse are cached
+    generated_text = provider.generate_questions(
+        spec['systemPrompt'], spec['userPrompt'], use_cache=not spec.get('fresh'), validate=_parse_paper
+    )
+
+    result = _parse_paper(generated_text)
+
+    for section in PAPER_SECTIONS:
+        for q in result.get(section, []):
+            _map_course_outcome(q, spec)
+
+    return result, generated_text
+
+class PaperStreamParser:
+    """
+    Incremental scanner over a streamed paper completion. feed() returns the (section, question)
+    pairs whose JSON object closed inside the fragment, i.e. every object nested directly in a
+    top-level array such as "sectionA": [...]. Text outside the top-level object (markdown fences,
+    chatter) is ignored; each character is scanned once.
+    """
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = None
+        self._last_string = None
+        self._key = None
+        self._section = None
+        self._object_start = None
+
+    def feed(self, fragment):
+        completed = []
+        for ch in fragment:
+            position = len(self._buffer)
+            self._buffer.append(ch)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == '\\':
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = ''.join(self._buffer[self._string_start + 1:position])
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = position
+            elif ch == ':' and self._depth == 1:
+                self._key = self._last_string
+            elif ch in '{[':
+                self._depth += 1
+                if ch == '[' and self._depth == 2:
+                    self._section = self._key
+                elif ch == '{' and self._depth == 3:
+                    self._object_start = position
+            elif ch in '}]' and self._depth > 0:
+                if ch == '}' and self._depth == 3 and self._object_start is not None:
+                    raw = ''.join(self._buffer[self._object_start:position + 1])
+                    self._object_start = None
+                    try:
+                        completed.append((self._section, json.loads(raw)))
+                    except json.JSONDecodeError:
+                        pass
+                self._depth -= 1
+        return completed
+
+    @property
+    def text(self):
+        return ''.join(self._buffer)
+
+def stream_paper_generation(spec, provider):
+    """
+    Streams a paper from the provider. Yields ('question', {section, index, question}) as soon as
+    each question's JSON object is complete, then ('done', result) with the same body as
+    run_paper_generation. Raises ValueError if the completion is not valid JSON.
+    """
+    parser = PaperStreamParser()
+    counts = {}
+    for fragment in provider.stream_questions(spec['systemPrompt'], spec['userPrompt']):
+        for section, question in parser.feed(fragment):
+            if section not in PAPER_SECTIONS or not isinstance(question, dict):
+                continue
+            index = counts.get(section, 0)
+            counts[section] = index + 1
+            yield 'question', {'section': section, 'index': index, 'question': _map_course_outcome(question, spec)}
+
+    try:
+        result = json.loads(_strip_code_fences(parser.text))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"AI response was not valid JSON: {e}")
+    for section in PAPER_SECTIONS:
+        for q in result.get(section, []):
+            _map_course_outcome(q, spec)
+    yield 'done', result
+
+def prepare_question_generation(user_id, data):
+    subject_id = data.get('subjectId')
+    
+    # Verify Contextual Permissions: Admin, Super Admin, or Faculty/Subject Expert for this subject
+    if not has_subject_permission(user_id, subject_id, ['FACULTY', 'SUBJECT_EXPERT']):
+        raise PermissionError('Unauthorized: Only Faculty or Subject Experts assigned to this subject can generate questions.')
+
+    topic = data.get('topic')
+    difficulty = data.get('difficulty', 'MEDIUM').upper()
+    marks = data.get('marks', 5)
+
+    if difficulty not in ['EASY', 'MEDIUM', 'HARD']:
+        raise ValueError('Invalid difficulty level. Must be EASY, MEDIUM, or HARD.')
+
+    if not subject_id or not topic:
+        raise ValueError('Missing subjectId or topic field.')
+
+    try:
+        s_uuid = uuid.UUID(str(subject_id))
+    except ValueError:
+        raise ValueError('Invalid subjectId format')
+        
+    subject = db.session.get(Subject, s_uuid)
+    if not subject:
+        raise LookupError('Subject not found')
+
+    existing_q_texts = _existing_question_texts(s_uuid, f"{subject.name} {topic}", QUESTION_CONTEXT_QUESTIONS)
+
+    existing_block = ""
+    if existing_q_texts:
+        capped = existing_q_texts[:QUESTION_CONTEXT_QUESTIONS]
+        numbered = [f"  {i+1}. {t[:150]}" for i, t in enumerate(capped)]
+        existing_block = (
+            "\n\nEXISTING QUESTIONS (DO NOT repeat, rephrase, or paraphrase any of these):\n"
+            + "\n".join(numbered) + "\n"
+        )
+
+    if marks <= 3:
+        depth_guide = "This is a low-mark question. Expect a 1-2 sentence answer. Test a single concept, definition, or factual recall."
+    elif marks <= 5:
+        depth_guide = "This is a mid-mark question. Expect a half-page answer. Test conceptual understanding, comparison, or a short explanation with an example."
+    elif marks <= 10:
+        depth_guide = "This is a high-mark question. Expect a 1-2 page answer. Test analytical thinking, worked examples, derivations, or multi-step reasoning."
+    else:
+        depth_guide = "This is a comprehensive question. Expect a 2+ page answer. Include sub-parts (a, b, c) covering multiple related concepts."
+
+    system_prompt = """You are an expert university examination question setter. 
+Generate factually accurate, academically rigorous questions that are:
+- Directly relevant to the specified topic and subject
+- Proportional in depth and complexity to the assigned marks
+- Original and not a rephrasing of any existing question provided
+Return strictly VALID JSON only. No markdown, no code fences, no explanations."""
+
+    user_prompt = f"""Create ONE examination question.
+
+Subject: {subject.name}
+Topic: {topic}
+Difficulty: {difficulty}
+Marks: {marks}
+
+QUALITY GUIDELINE: {depth_guide}
+{existing_block}
+Return exactly this JSON: {{ "text": "Your question here" }}"""
+
+    return {
+        'userId': str(user_id),
+        'subjectId': str(subject.id),
+        'marks': marks,
+        'systemPrompt': system_prompt,
+        'userPrompt': user_prompt
+    }
+
+def _clean_generated_text(generated_text):
+    clean_text = generated_text
+    if '```json' in clean_text:
+        clean_text = clean_text.split('```json')[1].split('```')[0]
+    elif '```' in clean_text:
+        clean_text = clean_text.split('```')[1].split('```')[0]
+        
+    try:
+        json_data = json.loads(clean_text)
+        return json_data.get('text', clean_text)
+    except json.JSONDecodeError:
+        return clean_text
+
+def run_question_generation(spec, provider):
+    """
+    Generates one question, saves it as a DRAFT together with its AILog entry and commits.
+    Returns (question, log_entry).
+    """
+    generated_text = provider.generate_questions(spec['systemPrompt'], spec['userPrompt'])
+    q_text = _clean_generated_text(generated_text)
+
+    # Dynamic taxonomy estimations using service layers
+    computed_bloom = provider.classify_bloom_level(q_text)
+    computed_difficulty = provider.estimate_difficulty(q_text)
+
+    user_id = uuid.UUID(spec['userId'])
+    new_q = Question(
+        subject_id=uuid.UUID(spec['subjectId']),
+        editor_data={
+            "time": int(time.time()),
+            "blocks": [{"type": "paragraph", "data": {"text": q_text}}],
+            "marks": spec['marks'],
+            "meta": {
+                "bloomLevel": computed_bloom,
+                "difficulty": computed_difficulty
+            }
+        },
+        creator_id=user_id,
+        source="AI",
+        difficulty=computed_difficulty,
+        bloom_level=computed_bloom,
+        status="DRAFT" # Starts as draft
+    )
+    db.session.add(new_q)
+    db.session.flush()
+
+    log_entry = AILog(
+        admin_user_id=user_id,
+        question_id=new_q.id,
+        input_prompt=spec['userPrompt'],
+        generated_text=generated_text
+    )
+    db.session.add(log_entry)
+    
+    db.session.commit()
+
+    from .embedding_service import schedule_question_indexing
+    schedule_question_indexing([new_q.id])
+    return new_q, log_entry
@@ -0,0 +1,195 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update, func, or_, and_
+from ..db import db
+from ..models import AIJob, AILog
+from .ai_generation_service import (
+    prepare_paper_generation, run_paper_generation,
+    prepare_question_generation, run_question_generation
+)
+from .rbac_service import to_uuid
+
+logger = logging.getLogger(__name__)
+
+JOB_TYPES = {
+    'PAPER': prepare_paper_generation,
+    'QUESTION': prepare_question_generation,
+}
+FINISHED_STATUSES = ('SUCCEEDED', 'FAILED')
+PENDING_STATUSES = ('QUEUED', 'RUNNING')
+# Long-polls hold a request thread, so keep them short; pending responses carry Retry-After instead
+MAX_WAIT_SECONDS = 5
+RETRY_AFTER_SECONDS = 2
+DB_POLL_INTERVAL = 0.5
+# Seconds between stale-job sweeps per process
+REAP_INTERVAL = 60
+
+class JobQueueFull(Exception):
+    """Too many jobs are QUEUED/RUNNING (AI_JOB_MAX_PENDING); the caller should retry later."""
+
+class AIJobRunner:
+    """
+    Per-process pool running AI jobs off the request thread. Workers are started lazily, so each
+    gunicorn worker gets its own pool after the fork. Futures of jobs submitted by this process are
+    kept so long-polls can wait on them directly; jobs owned by another process are polled in the DB.
+    """
+    def __init__(self, app, max_workers):
+        self.app = app
+        self.max_workers = max_workers
+        self._executor = None
+        self._futures = {}
+        self._last_reap = None
+
+    def reap_if_due(self):
+        """Runs reap_stale_jobs() on first use after startup and then at most every REAP_INTERVAL seconds."""
+        now = time.monotonic()
+        if self._last_reap is not None and now - self._last_reap < REAP_INTERVAL:
+            return
+        self._last_reap = now
+        reap_stale_jobs()
+
+    def submit(self, job_id):
+        if self.max_workers <= 0:
+            # Inline mode (tests, single-threaded debugging): run in the submitting request
+            run_job(job_id)
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ai-job')
+        future = self._executor.submit(self._run_in_context, job_id)
+        self._futures[job_id] = future
+        future.add_done_callback(lambda _: self._futures.pop(job_id, None))
+
+    def _run_in_context(self, job_id):
+        with self.app.app_context():
+            run_job(job_id)
+
+    def wait(self, job_id, timeout):
+        """Blocks until a job of this process finishes. Returns False if the job is not running here."""
+        future = self._futures.get(job_id)
+        if future is None:
+            return False
+        wait_futures([future], timeout=timeout)
+        return True
+
+def get_job_runner():
+    runner = current_app.extensions.get('ai_job_runner')
+    if runner is None:
+        runner = current_app.extensions['ai_job_runner'] = AIJobRunner(
+            current_app._get_current_object(), current_app.config.get('AI_JOB_WORKERS', 4)
+        )
+    return runner
+
+def submit_job(user_id, job_type, data):
+    """
+    Validates the request in the caller's context (same errors as the synchronous endpoints:
+    PermissionError, ValueError, LookupError), stores the prepared prompts on a QUEUED job and
+    hands it to the worker pool. Returns the job.
+    """
+    prepare = JOB_TYPES.get((job_type or '').upper())
+    if prepare is None:
+        raise ValueError(f"Invalid job type. Must be one of: {', '.join(JOB_TYPES)}.")
+
+    runner = get_job_runner()
+    runner.reap_if_due()
+    max_pending = current_app.config.get('AI_JOB_MAX_PENDING', 0)
+    if max_pending > 0:
+        pending = db.session.query(func.count(AIJob.id)).filter(AIJob.status.in_(PENDING_STATUSES)).scalar()
+        if pending >= max_pending:
+            raise JobQueueFull(f"Too many AI jobs in progress ({pending}). Try again shortly.")
+
+    spec = prepare(user_id, data)
+    job = AIJob(user_id=to_uuid(user_id), job_type=job_type.upper(), status='QUEUED', payload=spec)
+    db.session.add(job)
+    db.session.commit()
+
+    runner.submit(job.id)
+    return job
+
+def reap_stale_jobs(timeout=None):
+    """
+    Marks QUEUED jobs created, and RUNNING jobs started, more than `timeout` seconds ago
+    (AI_JOB_TIMEOUT by default) as FAILED. Jobs only run in the pool of the process that
+    accepted them, so these are jobs whose worker restarted or crashed. Returns the count.
+    """
+    timeout = current_app.config.get('AI_JOB_TIMEOUT', 900) if timeout is None else timeout
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=timeout)
+    stmt = (
+        update(AIJob)
+        .where(or_(
+            and_(AIJob.status == 'QUEUED', AIJob.created_at < cutoff),
+            and_(AIJob.status == 'RUNNING', AIJob.started_at < cutoff)
+        ))
+        .values(status='FAILED', finished_at=now,
+                error=f"Job did not finish within {timeout:g}s; its worker stopped. Please submit it again.")
+        .execution_options(synchronize_session=False)
+    )
+    reaped = db.session.execute(stmt).rowcount
+    db.session.commit()
+    if reaped:
+        logger.warning(f"Marked {reaped} stale AI job(s) as FAILED")
+    return reaped
+
+def run_job(job_id):
+    """Runs one QUEUED job to completion, recording the result or the error on the job row."""
+    from .ai_provider import get_active_ai_provider
+    from .rbac_service import get_settings
+
+    job = db.session.get(AIJob, job_id)
+    if job is None or job.status != 'QUEUED':
+        return
+    job.status = 'RUNNING'
+    job.started_at = datetime.utcnow()
+    db.session.commit()
+
+    try:
+        provider = get_active_ai_provider(get_settings())
+        if job.job_type == 'PAPER':
+            result, generated_text = run_paper_generation(job.payload, provider)
+            log_entry = AILog(
+                admin_user_id=job.user_id,
+                input_prompt=job.payload['userPrompt'],
+                generated_text=generated_text
+            )
+            db.session.add(log_entry)
+            db.session.flush()
+        else:
+            new_q, log_entry = run_question_generation(job.payload, provider)
+            result = {"message": "Successfully generated and logged AI Question", "question": new_q.to_dict()}
+
+        job.result = result
+        job.ai_log_id = log_entry.id
+        job.status = 'SUCCEEDED'
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"AI job {job_id} failed: {e}")
+        job = db.session.get(AIJob, job_id)
+        job.error = str(e)
+        job.status = 'FAILED'
+
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+def get_job(job_id, wait=0):
+    """
+    Loads a job, optionally long-polling up to `wait` seconds (capped at MAX_WAIT_SECONDS) for it to
+    finish. Returns None when the job does not exist.
+    """
+    get_job_runner().reap_if_due()
+    job = db.session.get(AIJob, job_id)
+    if job is None or job.status in FINISHED_STATUSES or wait <= 0:
+        return job
+
+    deadline = time.monotonic() + min(wait, MAX_WAIT_SECONDS)
+    if not get_job_runner().wait(job_id, timeout=deadline - time.monotonic()):
+        while time.monotonic() < deadline:
+            time.sleep(min(DB_POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+            db.session.rollback()  # end the read transaction so the worker's commit is visible
+            if db.session.query(AIJob.status).filter(AIJob.id == job_id).scalar() in FINISHED_STATUSES:
+                break
+
+    db.session.rollback()
+    return db.session.query(AIJob).populate_existing().filter(AIJob.id == job_id).first()
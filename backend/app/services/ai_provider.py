@@ -2,19 +2,284 @@ import os
 import json
 import math
 import time
+import hashlib
+import threading
 import requests
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from requests.adapters import HTTPAdapter
+
+# Connections kept alive per host in each provider's pooled session
+HTTP_POOL_SIZE = int(os.getenv('AI_HTTP_POOL_SIZE', '10'))
+# Texts per embedding request, and how many of those requests may be in flight at once
+EMBED_BATCH_SIZE = int(os.getenv('AI_EMBED_BATCH_SIZE', '64'))
+EMBED_CONCURRENCY = int(os.getenv('AI_EMBED_CONCURRENCY', '4'))
+
+def _is_auth_error(exc) -> bool:
+    err_str = str(exc).lower()
+    return "401" in err_str or "403" in err_str or "unauthorized" in err_str or "expired" in err_str
+
+def create_http_session(pool_size: int = HTTP_POOL_SIZE) -> requests.Session:
+    """Keep-alive session whose connection pool is sized for `pool_size` concurrent requests per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def iter_sse_data(response):
+    """Payloads of the `data:` lines of a streamed Server-Sent Events response, up to [DONE]."""
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith('data:'):
+            continue
+        data = line[len('data:'):].strip()
+        if data == '[DONE]':
+            return
+        yield json.loads(data)
+
+class ProviderMetrics:
+    """Call counts, errors and wall time per (provider, operation), shared by all requests of a process."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, provider_name, operation, seconds, error=False):
+        with self._lock:
+            stats = self._stats.setdefault((provider_name, operation), {'calls': 0, 'errors': 0, 'seconds': 0.0})
+            stats['calls'] += 1
+            stats['errors'] += int(error)
+            stats['seconds'] += seconds
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for (provider_name, operation), stats in self._stats.items():
+                result.setdefault(provider_name, {})[operation] = {
+                    'calls': stats['calls'],
+                    'errors': stats['errors'],
+                    'totalMs': round(stats['seconds'] * 1000, 2),
+                    'avgMs': round(stats['seconds'] * 1000 / stats['calls'], 2)
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+provider_metrics = ProviderMetrics()
+
+class ResponseCache:
+    """
+    TTL + LRU cache of generated text by prompt key (see AIProvider.response_cache_key).
+    Disabled when ttl or max_entries is 0.
+    """
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, text):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def metrics(self):
+        with self._lock:
+            looked_up = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRate': round(self.hits / looked_up, 4) if looked_up else None
+            }
+
+def get_response_cache():
+    from flask import current_app
+    cache = current_app.extensions.get('ai_response_cache')
+    if cache is None:
+        cache = current_app.extensions['ai_response_cache'] = ResponseCache(
+            current_app.config.get('AI_RESPONSE_CACHE_TTL', 0),
+            current_app.config.get('AI_RESPONSE_CACHE_SIZE', 256)
+        )
+    return cache
 
 # Abstract Base Class for AI Providers
 class AIProvider(ABC):
+    provider_name = "CUSTOM"
+
+    _session = None
+    _session_lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """Pooled keep-alive session, created on first use and reused for the provider's lifetime."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = create_http_session()
+        return self._session
+
+    @contextmanager
+    def timed(self, operation: str):
+        """Records the wall time of the wrapped provider call in provider_metrics."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            provider_metrics.record(self.provider_name, operation, time.perf_counter() - started, error=True)
+            raise
+        provider_metrics.record(self.provider_name, operation, time.perf_counter() - started)
+
+    def _post(self, operation: str, url: str, **kwargs) -> requests.Response:
+        with self.timed(operation):
+            return self.session.post(url, **kwargs)
+
+    def _embed_batched(self, texts: list, embed_batch, dimensions: int) -> list:
+        """
+        Embeds `texts` with `embed_batch(chunk) -> vectors`, EMBED_BATCH_SIZE texts per call and up to
+        EMBED_CONCURRENCY calls in flight. Only a chunk whose call fails is retried text by text; texts
+        that still fail, and every text after an authentication error, get a zero vector.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        chunks = [texts[i:i + EMBED_BATCH_SIZE] for i in range(0, len(texts), EMBED_BATCH_SIZE)]
+        auth_failed = threading.Event()
+
+        def embed_chunk(chunk):
+            if auth_failed.is_set():
+                return [[0.0] * dimensions for _ in chunk]
+            try:
+                vectors = embed_batch(chunk)
+                if len(vectors) != len(chunk):
+                    raise ValueError(f"expected {len(chunk)} embeddings, got {len(vectors)}")
+                return vectors
+            except Exception as e:
+                if _is_auth_error(e):
+                    print(f"{self.provider_name} embedding unauthorized or expired: {e}. Failing fast.")
+                    auth_failed.set()
+                    return [[0.0] * dimensions for _ in chunk]
+                if len(chunk) == 1:
+                    print(f"{self.provider_name} embedding failed: {e}")
+                    return [[0.0] * dimensions]
+                print(f"{self.provider_name} batch embedding failed: {e}. Retrying {len(chunk)} texts individually.")
+                return [vector for text in chunk for vector in embed_chunk([text])]
+
+        if len(chunks) == 1:
+            return embed_chunk(chunks[0])
+        with ThreadPoolExecutor(max_workers=min(EMBED_CONCURRENCY, len(chunks))) as pool:
+            return [vector for vectors in pool.map(embed_chunk, chunks) for vector in vectors]
+
+    @property
+    def embedding_model_id(self) -> str:
+        return "default"
+
+    @property
+    def embedding_model_key(self) -> str:
+        """Identifies the embedding space; vectors stored under different keys are never compared."""
+        return f"{self.provider_name}:{self.embedding_model_id}"
+
+    # Sampling temperature of generate_questions (None: provider default)
+    generation_temperature = None
+
+    @property
+    def generation_model_id(self) -> str:
+        return "default"
+
+    def response_cache_key(self, system_prompt: str, user_prompt: str) -> str:
+        # endpoint_url keeps two servers that expose the same model name apart
+        parts = [self.provider_name, getattr(self, 'endpoint_url', None) or '', self.generation_model_id,
+                 repr(self.generation_temperature), system_prompt, user_prompt]
+        return hashlib.sha256("\x1f".join(parts).encode('utf-8')).hexdigest()
+
+    def generate_questions(self, system_prompt: str, user_prompt: str, use_cache: bool = False, validate=None) -> str:
+        """
+        Generates raw text response (expected to be JSON format) for question generation.
+        With use_cache, and the response cache enabled (AI_RESPONSE_CACHE_TTL), an identical
+        prompt to the same model within the TTL is answered without calling the provider.
+        A fresh completion is only cached once validate(text) returns without raising, so a
+        truncated or malformed answer is never replayed.
+        """
+        from flask import has_app_context
+        cache = get_response_cache() if use_cache and has_app_context() else None
+        if cache is None or not cache.enabled:
+            return self._generate(system_prompt, user_prompt)
+
+        key = self.response_cache_key(system_prompt, user_prompt)
+        text = cache.get(key)
+        if text is None:
+            text = self._generate(system_prompt, user_prompt)
+            if validate is not None:
+                validate(text)
+            cache.put(key, text)
+        return text
+
     @abstractmethod
-    def generate_questions(self, system_prompt: str, user_prompt: str) -> str:
-        """Generates raw text response (expected to be JSON format) for question generation."""
+    def _generate(self, system_prompt: str, user_prompt: str) -> str:
+        """Calls the provider for one completion (no caching)."""
         pass
 
-    @abstractmethod
+    def stream_questions(self, system_prompt: str, user_prompt: str):
+        """
+        Yields the completion as text fragments while the model produces it. Providers without a
+        streaming API yield the whole completion at once.
+        """
+        yield self._generate(system_prompt, user_prompt)
+
     def get_embeddings(self, texts: list) -> list:
-        """Returns a list of vector embeddings for the provided list of texts."""
+        """
+        Returns a list of vector embeddings for the provided list of texts. Inside an app context
+        texts go through the embedding cache first and only the misses reach _embed().
+        """
+        from flask import has_app_context
+        if not has_app_context():
+            return self._embed(texts)
+
+        from .embedding_service import get_embedding_cache, content_hash
+        cache = get_embedding_cache()
+        hashes = [content_hash(text) for text in texts]
+        found = cache.get_many(self.embedding_model_key, hashes)
+
+        # Each distinct missing text is embedded once, even if repeated in the batch
+        to_embed = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in found and text_hash not in to_embed:
+                to_embed[text_hash] = text
+        if to_embed:
+            fresh = dict(zip(to_embed, self._embed(list(to_embed.values()))))
+            cache.put_many(self.embedding_model_key, fresh)
+            found.update(fresh)
+
+        return [found[text_hash].tolist() if hasattr(found[text_hash], 'tolist') else found[text_hash]
+                for text_hash in hashes]
+
+    @abstractmethod
+    def _embed(self, texts: list) -> list:
+        """Calls the provider for the embeddings of `texts` (no caching)."""
         pass
 
     @abstractmethod
@@ -30,26 +295,47 @@ class AIProvider(ABC):
 
 # Hugging Face Inference API Provider
 class HuggingFaceProvider(AIProvider):
+    provider_name = "HUGGING_FACE"
+
     def __init__(self, api_key: str = None, endpoint_url: str = None):
         self.api_key = api_key or os.getenv('HF_API_KEY')
         self.endpoint_url = endpoint_url or "https://api-inference.huggingface.co/models/"
+        self._clients = {}
 
-    def generate_questions(self, system_prompt: str, user_prompt: str) -> str:
+    def _client(self, model_id: str):
         # Import from routes.ai first so that test mocks work
         try:
             from app.routes.ai import InferenceClient
         except ImportError:
             from huggingface_hub import InferenceClient
 
-        model_id = os.getenv('HF_MODEL_QP', 'Qwen/Qwen2.5-7B-Instruct')
-        client = InferenceClient(model=model_id, token=self.api_key)
+        # Keyed by class as well, so a patched InferenceClient never reuses a real client
+        key = (InferenceClient, model_id)
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = InferenceClient(model=model_id, token=self.api_key)
+        return client
+
+    @property
+    def embedding_model_id(self) -> str:
+        return os.getenv('HF_MODEL_DUP', 'sentence-transformers/all-MiniLM-L6-v2')
+
+    generation_temperature = 0.5
+
+    @property
+    def generation_model_id(self) -> str:
+        return os.getenv('HF_MODEL_QP', 'Qwen/Qwen2.5-7B-Instruct')
+
+    def _generate(self, system_prompt: str, user_prompt: str) -> str:
+        client = self._client(self.generation_model_id)
         
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ]
         
-        output = client.chat_completion(messages=messages, max_tokens=2500, temperature=0.5)
+        with self.timed('generate'):
+            output = client.chat_completion(messages=messages, max_tokens=2500, temperature=self.generation_temperature)
         generated_text = output.choices[0].message.content.strip()
         
         # Clean up any potential markdown wraps
@@ -60,53 +346,42 @@ class HuggingFaceProvider(AIProvider):
             
         return generated_text.strip()
 
-    def get_embeddings(self, texts: list) -> list:
+    def stream_questions(self, system_prompt: str, user_prompt: str):
+        client = self._client(self.generation_model_id)
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        with self.timed('stream'):
+            for chunk in client.chat_completion(messages=messages, max_tokens=2500,
+                                                temperature=self.generation_temperature, stream=True):
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+
+    @staticmethod
+    def _normalize_embedding(emb):
+        if hasattr(emb, 'tolist'):
+            emb = emb.tolist()
+        if isinstance(emb, list) and len(emb) == 1 and isinstance(emb[0], list):
+            emb = emb[0]
+        return emb
+
+    def _embed(self, texts: list) -> list:
         if not self.api_key or not self.api_key.strip():
             return [[0.0] * 384 for _ in texts]
 
-        try:
-            from app.routes.ai import InferenceClient
-        except ImportError:
-            from huggingface_hub import InferenceClient
+        client = self._client(self.embedding_model_id)
 
-        model_id = os.getenv('HF_MODEL_DUP', 'sentence-transformers/all-MiniLM-L6-v2')
-        client = InferenceClient(model=model_id, token=self.api_key)
-        
-        try:
-            res = client.feature_extraction(texts)
-            if hasattr(res, 'tolist'):
-                embeddings = res.tolist()
-            else:
-                embeddings = list(res)
-                
-            normalized = []
-            for emb in embeddings:
-                if isinstance(emb, list) and len(emb) == 1 and isinstance(emb[0], list):
-                    emb = emb[0]
-                normalized.append(emb)
-            return normalized
-        except Exception as e:
-            print(f"HuggingFace batch embedding extraction failed: {e}. Falling back to individual queries.")
-            embeddings = []
-            api_failed = False
-            for text in texts:
-                if api_failed:
-                    embeddings.append([0.0] * 384)
-                    continue
-                try:
-                    emb = client.feature_extraction(text)
-                    if hasattr(emb, 'tolist'):
-                        emb = emb.tolist()
-                    if isinstance(emb, list) and len(emb) == 1 and isinstance(emb[0], list):
-                        emb = emb[0]
-                    embeddings.append(emb)
-                except Exception as ex:
-                    err_str = str(ex).lower()
-                    if "401" in err_str or "unauthorized" in err_str or "expired" in err_str:
-                        print(f"HuggingFace API unauthorized or expired in fallback: {ex}. Failing fast.")
-                        api_failed = True
-                    embeddings.append([0.0] * 384)
-            return embeddings
+        def embed_batch(chunk):
+            with self.timed('embed'):
+                res = client.feature_extraction(chunk if len(chunk) > 1 else chunk[0])
+            if len(chunk) == 1:
+                return [self._normalize_embedding(res)]
+            embeddings = res.tolist() if hasattr(res, 'tolist') else list(res)
+            return [self._normalize_embedding(emb) for emb in embeddings]
+
+        return self._embed_batched(texts, embed_batch, 384)
 
     def classify_bloom_level(self, question_text: str) -> str:
         from .bloom_service import classify_bloom_level as kw_classify
@@ -119,14 +394,24 @@ class HuggingFaceProvider(AIProvider):
 
 # Google Gemini Provider
 class GeminiProvider(AIProvider):
+    provider_name = "GEMINI"
+
     def __init__(self, api_key: str = None, endpoint_url: str = None):
         self.api_key = api_key or os.getenv('GEMINI_API_KEY')
 
-    def generate_questions(self, system_prompt: str, user_prompt: str) -> str:
+    @property
+    def embedding_model_id(self) -> str:
+        return "embedding-001"
+
+    @property
+    def generation_model_id(self) -> str:
+        return "gemini-pro"
+
+    def _generate(self, system_prompt: str, user_prompt: str) -> str:
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY not found in environment variables")
         
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent?key={self.api_key}"
+        url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.generation_model_id}:generateContent?key={self.api_key}"
         payload = {
             "contents": [{
                 "parts": [{
@@ -135,7 +420,7 @@ class GeminiProvider(AIProvider):
             }]
         }
         
-        response = requests.post(url, json=payload, timeout=60)
+        response = self._post('generate', url, json=payload, timeout=60)
         if response.status_code != 200:
             raise Exception(f"Gemini API generation failed: {response.text}")
             
@@ -152,26 +437,47 @@ class GeminiProvider(AIProvider):
             
         return text
 
-    def get_embeddings(self, texts: list) -> list:
+    def stream_questions(self, system_prompt: str, user_prompt: str):
+        if not self.api_key:
+            raise ValueError("GEMINI_API_KEY not found in environment variables")
+
+        url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.generation_model_id}:streamGenerateContent?alt=sse&key={self.api_key}"
+        payload = {
+            "contents": [{
+                "parts": [{
+                    "text": f"{system_prompt}\n\nUser Request: {user_prompt}"
+                }]
+            }]
+        }
+        with self.timed('stream'):
+            response = self.session.post(url, json=payload, timeout=60, stream=True)
+            if response.status_code != 200:
+                raise Exception(f"Gemini API streaming failed: {response.text}")
+            for event in iter_sse_data(response):
+                for candidate in event.get('candidates', [])[:1]:
+                    for part in candidate.get('content', {}).get('parts', []):
+                        if part.get('text'):
+                            yield part['text']
+
+    def _embed(self, texts: list) -> list:
         if not self.api_key:
             return [[0.0] * 768] * len(texts)
-            
-        embeddings = []
-        for text in texts:
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/embedding-001:embedContent?key={self.api_key}"
+
+        url = f"https://generativelanguage.googleapis.com/v1beta/models/embedding-001:batchEmbedContents?key={self.api_key}"
+
+        def embed_batch(chunk):
             payload = {
-                "model": "models/embedding-001",
-                "content": {
-                    "parts": [{"text": text}]
-                }
+                "requests": [
+                    {"model": "models/embedding-001", "content": {"parts": [{"text": text}]}}
+                    for text in chunk
+                ]
             }
-            response = requests.post(url, json=payload, timeout=20)
-            if response.status_code == 200:
-                emb = response.json().get('embedding', {}).get('values', [])
-                embeddings.append(emb)
-            else:
-                embeddings.append([0.0] * 768)
-        return embeddings
+            response = self._post('embed', url, json=payload, timeout=20)
+            if response.status_code != 200:
+                raise Exception(f"Gemini batch embedding failed ({response.status_code}): {response.text}")
+            return [emb.get('values', []) for emb in response.json().get('embeddings', [])]
+
+        return self._embed_batched(texts, embed_batch, 768)
 
     def classify_bloom_level(self, question_text: str) -> str:
         from .bloom_service import classify_bloom_level as kw_classify
@@ -184,19 +490,31 @@ class GeminiProvider(AIProvider):
 
 # On-Premise OpenAI-Compatible Provider (e.g. vLLM, Ollama, Local llama.cpp)
 class OnPremiseProvider(AIProvider):
+    provider_name = "ON_PREMISE"
+
     def __init__(self, api_key: str = None, endpoint_url: str = None):
         self.endpoint_url = endpoint_url or os.getenv('LOCAL_AI_URL', 'http://localhost:11434/v1')
         self.api_key = api_key or os.getenv('LOCAL_AI_KEY', '')
 
+    @property
+    def embedding_model_id(self) -> str:
+        return os.getenv('LOCAL_AI_EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+
     def _get_headers(self):
         headers = {"Content-Type": "application/json"}
         if self.api_key:
             headers["Authorization"] = f"Bearer {self.api_key}"
         return headers
 
-    def generate_questions(self, system_prompt: str, user_prompt: str) -> str:
+    generation_temperature = 0.3
+
+    @property
+    def generation_model_id(self) -> str:
+        return os.getenv('LOCAL_AI_MODEL', 'qwen2.5-7b')
+
+    def _generate(self, system_prompt: str, user_prompt: str) -> str:
         url = f"{self.endpoint_url.rstrip('/')}/chat/completions"
-        model = os.getenv('LOCAL_AI_MODEL', 'qwen2.5-7b')
+        model = self.generation_model_id
         
         payload = {
             "model": model,
@@ -204,12 +522,12 @@ class OnPremiseProvider(AIProvider):
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            "temperature": 0.3,
+            "temperature": self.generation_temperature,
             "response_format": {"type": "json_object"}
         }
         
         try:
-            response = requests.post(url, headers=self._get_headers(), json=payload, timeout=90)
+            response = self._post('generate', url, headers=self._get_headers(), json=payload, timeout=90)
             if response.status_code != 200:
                 raise Exception(f"On-Premise server failed ({response.status_code}): {response.text}")
             
@@ -229,30 +547,119 @@ class OnPremiseProvider(AIProvider):
                 "prompt": f"System: {system_prompt}\nUser: {user_prompt}\nAssistant:",
                 "max_tokens": 1500
             }
-            response = requests.post(fallback_url, headers=self._get_headers(), json=payload_raw, timeout=90)
+            response = self._post('generate', fallback_url, headers=self._get_headers(), json=payload_raw, timeout=90)
             if response.status_code != 200:
                 raise Exception(f"On-Premise raw fallback failed: {response.text}")
             return response.json()['choices'][0]['text'].strip()
 
-    def get_embeddings(self, texts: list) -> list:
+    def stream_questions(self, system_prompt: str, user_prompt: str):
+        url = f"{self.endpoint_url.rstrip('/')}/chat/completions"
+        payload = {
+            "model": self.generation_model_id,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "temperature": self.generation_temperature,
+            "stream": True
+        }
+        with self.timed('stream'):
+            response = self.session.post(url, headers=self._get_headers(), json=payload, timeout=90, stream=True)
+            if response.status_code != 200:
+                raise Exception(f"On-Premise server failed ({response.status_code}): {response.text}")
+            for event in iter_sse_data(response):
+                choices = event.get('choices') or [{}]
+                delta = (choices[0].get('delta') or {}).get('content')
+                if delta:
+                    yield delta
+
+    def _embed(self, texts: list) -> list:
         url = f"{self.endpoint_url.rstrip('/')}/embeddings"
-        model = os.getenv('LOCAL_AI_EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
-        
-        embeddings = []
-        for text in texts:
+        model = self.embedding_model_id
+
+        def embed_batch(chunk):
             payload = {
                 "model": model,
-                "input": text
+                "input": chunk
             }
-            try:
-                response = requests.post(url, headers=self._get_headers(), json=payload, timeout=20)
-                if response.status_code == 200:
-                    emb = response.json().get('data', [{}])[0].get('embedding', [])
-                    embeddings.append(emb)
-                else:
-                    embeddings.append([0.0] * 384)
-            except Exception:
-                embeddings.append([0.0] * 384)
+            response = self._post('embed', url, headers=self._get_headers(), json=payload, timeout=20)
+            if response.status_code != 200:
+                raise Exception(f"On-Premise embedding failed ({response.status_code}): {response.text}")
+            # OpenAI-compatible servers tag each item with the index of its input
+            data = sorted(response.json().get('data', []), key=lambda item: item.get('index', 0))
+            return [item.get('embedding', []) for item in data]
+
+        return self._embed_batched(texts, embed_batch, 384)
+
+    def classify_bloom_level(self, question_text: str) -> str:
+        from .bloom_service import classify_bloom_level as kw_classify
+        return kw_classify(question_text)
+
+    def estimate_difficulty(self, question_text: str) -> str:
+        from .bloom_service import map_to_difficulty, classify_bloom_level
+        return map_to_difficulty(classify_bloom_level(question_text))
+
+
+# Offline stub provider for load-testing the generation job queue without a model
+class StubProvider(AIProvider):
+    provider_name = "STUB"
+
+    def __init__(self, api_key: str = None, endpoint_url: str = None):
+        # Simulated model latency in seconds
+        self.latency = float(os.getenv('AI_STUB_LATENCY', '0'))
+
+    @property
+    def embedding_model_id(self) -> str:
+        return "hash-64"
+
+    @property
+    def generation_model_id(self) -> str:
+        return "stub"
+
+    def _generate(self, system_prompt: str, user_prompt: str) -> str:
+        if self.latency:
+            with self.timed('generate'):
+                time.sleep(self.latency)
+        return self._respond(user_prompt)
+
+    def stream_questions(self, system_prompt: str, user_prompt: str):
+        text = self._respond(user_prompt)
+        fragments = [text[i:i + 16] for i in range(0, len(text), 16)]
+        for fragment in fragments:
+            if self.latency:
+                time.sleep(self.latency / len(fragments))
+            yield fragment
+
+    def _respond(self, user_prompt: str) -> str:
+        import re
+        co_codes = re.findall(r'^\s*-\s*(CO\d+):', user_prompt, re.MULTILINE) or [None]
+        num_short = re.search(r'Section A: Exactly (\d+)', user_prompt)
+        num_long = re.search(r'Section B: Exactly (\d+)', user_prompt)
+        if not num_short and not num_long:
+            topic = re.search(r'^Topic: (.*)$', user_prompt, re.MULTILINE)
+            return json.dumps({"text": f"Explain the key ideas of {topic.group(1) if topic else 'the topic'}."})
+
+        def make(count, marks, label):
+            return [
+                {"text": f"Stub {label} question {i + 1}.", "marks": marks, "coCode": co_codes[i % len(co_codes)]}
+                for i in range(count)
+            ]
+        short_count = int(num_short.group(1)) if num_short else 0
+        long_count = int(num_long.group(1)) if num_long else 0
+        return json.dumps({
+            "sectionA": make(short_count, 5, "short"),
+            "sectionB": make(long_count, 10, "long"),
+            "totalQuestions": short_count + long_count
+        })
+
+    def _embed(self, texts: list) -> list:
+        import hashlib
+        embeddings = []
+        for text in texts:
+            vec = [0.0] * 64
+            for word in (text or "").lower().split():
+                vec[int(hashlib.md5(word.encode()).hexdigest(), 16) % 64] += 1.0
+            embeddings.append(vec)
         return embeddings
 
     def classify_bloom_level(self, question_text: str) -> str:
@@ -264,6 +671,53 @@ class OnPremiseProvider(AIProvider):
         return map_to_difficulty(classify_bloom_level(question_text))
 
 
+PROVIDER_CLASSES = {
+    "HUGGING_FACE": HuggingFaceProvider,
+    "GEMINI": GeminiProvider,
+    "ON_PREMISE": OnPremiseProvider,
+}
+
+# Only selectable under TESTING or with AI_STUB_ENABLED, so a setting can never route production to canned output
+STUB_PROVIDER_CLASSES = {
+    "STUB": StubProvider,
+}
+
+def _provider_class(provider_name: str):
+    from flask import current_app, has_app_context
+    if provider_name in STUB_PROVIDER_CLASSES and has_app_context() and (
+        current_app.config.get('TESTING') or current_app.config.get('AI_STUB_ENABLED')
+    ):
+        return STUB_PROVIDER_CLASSES[provider_name]
+    return PROVIDER_CLASSES.get(provider_name, HuggingFaceProvider)
+
+class ProviderRegistry:
+    """
+    One provider instance per (provider, endpoint) in each process, so pooled sessions and model
+    clients survive across requests. Instances created before a fork are discarded in the child.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._providers = {}
+        self._pid = os.getpid()
+
+    def get(self, provider_name: str, endpoint_url: str = None) -> AIProvider:
+        provider_class = _provider_class(provider_name)
+        key = (provider_class, endpoint_url)
+        with self._lock:
+            if self._pid != os.getpid():
+                self._providers = {}
+                self._pid = os.getpid()
+            provider = self._providers.get(key)
+            if provider is None:
+                provider = self._providers[key] = provider_class(endpoint_url=endpoint_url)
+            return provider
+
+    def clear(self):
+        with self._lock:
+            self._providers = {}
+
+provider_registry = ProviderRegistry()
+
 # Helper Factory function to retrieve active AI Provider based on settings
 def get_active_ai_provider(db_settings: dict = None) -> AIProvider:
     provider_name = "HUGGING_FACE"
@@ -276,9 +730,4 @@ def get_active_ai_provider(db_settings: dict = None) -> AIProvider:
         provider_name = os.getenv('ACTIVE_AI_PROVIDER', 'HUGGING_FACE')
         endpoint_url = os.getenv('AI_ENDPOINT_URL', None)
         
-    if provider_name == "GEMINI":
-        return GeminiProvider(endpoint_url=endpoint_url)
-    elif provider_name == "ON_PREMISE":
-        return OnPremiseProvider(endpoint_url=endpoint_url)
-    else:
-        return HuggingFaceProvider(endpoint_url=endpoint_url)
+    return provider_registry.get(provider_name, endpoint_url)
@@ -0,0 +1,108 @@
+import time
+import uuid
+from datetime import datetime
+from sqlalchemy import update
+from ..db import db
+from ..models import Question, JobCheckpoint
+from .bloom_service import extract_text_from_editor_data, classify_many
+
+BLOOM_BACKFILL_JOB = 'bloom-backfill'
+DEFAULT_CHUNK_SIZE = 500
+
+def get_checkpoint(name, restart=False):
+    """
+    Loads the checkpoint of a job. A finished job (or restart=True) starts over from the beginning;
+    an unfinished one resumes after its last committed chunk.
+    """
+    checkpoint = db.session.get(JobCheckpoint, name)
+    if checkpoint is None:
+        checkpoint = JobCheckpoint(name=name, processed=0, updated=0, started_at=datetime.utcnow())
+        db.session.add(checkpoint)
+    elif restart or checkpoint.completed_at:
+        checkpoint.last_key = None
+        checkpoint.processed = 0
+        checkpoint.updated = 0
+        checkpoint.started_at = datetime.utcnow()
+        checkpoint.completed_at = None
+    db.session.commit()
+    return checkpoint
+
+def _bloom_changes(row, classification):
+    """UPDATE parameters for a question whose stored classification is stale, else None."""
+    bloom_level = classification['bloomLevel']
+    difficulty = classification['difficulty']
+    editor_data = row.editor_data or {}
+    meta = editor_data.get('meta') or {}
+    if (row.bloom_level == bloom_level and row.difficulty == difficulty
+            and meta.get('bloomLevel') == bloom_level and meta.get('difficulty') == difficulty):
+        return None
+
+    return {
+        'id': row.id,
+        'bloom_level': bloom_level,
+        'difficulty': difficulty,
+        'editor_data': {**editor_data, 'meta': {**meta, 'bloomLevel': bloom_level, 'difficulty': difficulty}}
+    }
+
+def run_bloom_backfill(chunk_size=DEFAULT_CHUNK_SIZE, restart=False, progress=None, max_chunks=None):
+    """
+    Recomputes bloom_level / difficulty (and the editor_data meta copy) for every question.
+
+    Questions are streamed in primary-key order, `chunk_size` rows at a time. Only rows whose
+    classification changes are written, with one executemany UPDATE per chunk. Each chunk commits
+    together with the job checkpoint, so an interrupted run resumes where it stopped.
+    `progress` is called with the running summary after every chunk; `max_chunks` stops early
+    (leaving the checkpoint open) and is mainly useful for batching runs and tests.
+    """
+    checkpoint = get_checkpoint(BLOOM_BACKFILL_JOB, restart=restart)
+    last_id = uuid.UUID(checkpoint.last_key) if checkpoint.last_key else None
+    summary = {
+        'resumedFrom': checkpoint.last_key,
+        'processed': 0,
+        'updated': 0,
+        'chunks': 0,
+        'elapsed': 0.0,
+        'rowsPerSecond': 0.0,
+        'completed': False
+    }
+    started = time.monotonic()
+
+    while True:
+        query = (
+            db.session.query(Question.id, Question.editor_data, Question.bloom_level, Question.difficulty)
+            .order_by(Question.id)
+        )
+        if last_id is not None:
+            query = query.filter(Question.id > last_id)
+        rows = query.limit(chunk_size).all()
+        if not rows:
+            break
+
+        classifications = classify_many([extract_text_from_editor_data(row.editor_data) for row in rows])
+        changes = [c for c in (_bloom_changes(row, cl) for row, cl in zip(rows, classifications)) if c]
+        if changes:
+            # ORM bulk UPDATE by primary key: a single executemany per chunk
+            db.session.execute(update(Question), changes)
+
+        last_id = rows[-1].id
+        checkpoint.last_key = str(last_id)
+        checkpoint.processed += len(rows)
+        checkpoint.updated += len(changes)
+        db.session.commit()
+
+        summary['processed'] += len(rows)
+        summary['updated'] += len(changes)
+        summary['chunks'] += 1
+        summary['elapsed'] = time.monotonic() - started
+        summary['rowsPerSecond'] = summary['processed'] / summary['elapsed'] if summary['elapsed'] else 0.0
+        if progress:
+            progress(dict(summary))
+
+        if max_chunks and summary['chunks'] >= max_chunks:
+            return summary
+
+    checkpoint.completed_at = datetime.utcnow()
+    db.session.commit()
+    summary['elapsed'] = time.monotonic() - started
+    summary['completed'] = True
+    return summary
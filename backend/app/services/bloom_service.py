@@ -60,25 +60,33 @@ def normalize_text(text):
     # Remove extra whitespaces
     return " ".join(text.split())
 
-def classify_bloom_level(question_text):
+# Keyword -> the level(s) it counts towards (a few verbs belong to more than one level)
+KEYWORD_LEVELS = {}
+for _level, _keywords in BLOOM_KEYWORDS.items():
+    for _kw in _keywords:
+        KEYWORD_LEVELS.setdefault(_kw, []).append(_level)
+
+# One alternation over every keyword, longest first so phrases like "give examples" win,
+# with word boundaries so we don't match substrings inside other words
+BLOOM_PATTERN = re.compile(
+    r'\b(?:' + '|'.join(re.escape(kw) for kw in sorted(KEYWORD_LEVELS, key=len, reverse=True)) + r')\b'
+)
+
+def analyze_text(question_text):
     """
-    Classify the given question text into a Bloom's Taxonomy level.
+    Single pass of BLOOM_PATTERN over the normalized text.
+    Returns (scores per level, matched keywords in BLOOM_KEYWORDS order).
     """
-    if not question_text:
-        return "understand"
-        
-    normalized = normalize_text(question_text)
     scores = {level: 0 for level in BLOOM_KEYWORDS}
-    
-    # Check for keywords using substring matching (with word boundaries)
-    for level, keywords in BLOOM_KEYWORDS.items():
-        for kw in keywords:
-            # We want to match whole words or phrases (e.g. "give examples")
-            # Using regex with \b (word boundary) ensures we don't match substrings inside other words
-            pattern = r'\b' + re.escape(kw) + r'\b'
-            matches = re.findall(pattern, normalized)
-            scores[level] += len(matches)
-            
+    matched = set()
+    for kw in BLOOM_PATTERN.findall(normalize_text(question_text)):
+        matched.add(kw)
+        for level in KEYWORD_LEVELS[kw]:
+            scores[level] += 1
+    keywords_found = [kw for kw in KEYWORD_LEVELS if kw in matched]
+    return scores, keywords_found
+
+def level_from_scores(scores):
     # Find the maximum score
     max_score = max(scores.values())
     
@@ -94,6 +102,32 @@ def classify_bloom_level(question_text):
     
     return top_levels[0]
 
+def classify_bloom_level(question_text):
+    """
+    Classify the given question text into a Bloom's Taxonomy level.
+    """
+    if not question_text:
+        return "understand"
+    scores, _ = analyze_text(question_text)
+    return level_from_scores(scores)
+
+def classify_many(texts):
+    """
+    Batch entry point for bulk save, backfills and /analyze-bloom.
+    Returns one {'bloomLevel', 'difficulty', 'scores', 'keywordsFound'} dict per text.
+    """
+    results = []
+    for text in texts:
+        scores, keywords_found = analyze_text(text) if text else ({level: 0 for level in BLOOM_KEYWORDS}, [])
+        bloom_level = level_from_scores(scores)
+        results.append({
+            "bloomLevel": bloom_level,
+            "difficulty": map_to_difficulty(bloom_level),
+            "scores": scores,
+            "keywordsFound": keywords_found
+        })
+    return results
+
 def map_to_difficulty(level):
     """
     Map Bloom's taxonomy level to difficulty rating.
@@ -130,3 +164,20 @@ def extract_text_from_editor_data(editor_data):
             text_parts.append(clean_text)
             
     return " ".join(text_parts)
+
+def extract_text_from_blocks(blocks):
+    """
+    Plain text of the header/paragraph/list/math blocks of an Editor.js document,
+    one block per line (used for AI prompts and embeddings).
+    """
+    text_parts = []
+    for block in blocks:
+        data = block.get('data', {})
+        if block['type'] in ['header', 'paragraph']:
+            text_parts.append(data.get('text', ''))
+        elif block['type'] == 'list':
+            items = data.get('items', [])
+            text_parts.extend(items)
+        elif block['type'] == 'math':
+            text_parts.append(data.get('latex', '') or data.get('mathml', ''))
+    return "\n".join(text_parts)
@@ -0,0 +1,261 @@
+import base64
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+CAPTCHA_TTL_SECONDS = 300  # 5 minutes
+
+class CaptchaStore(ABC):
+    """Issued captcha codes by id. Codes are single-use: pop() removes them."""
+
+    def __init__(self, ttl=CAPTCHA_TTL_SECONDS):
+        self.ttl = ttl
+
+    @abstractmethod
+    def put(self, captcha_id, code):
+        ...
+
+    @abstractmethod
+    def pop(self, captcha_id):
+        """Returns the code and forgets it, or None when unknown or expired."""
+
+class MemoryCaptchaStore(CaptchaStore):
+    """
+    Per-process store for single-worker setups and tests. Entries share one TTL, so insertion order
+    is expiry order: expired ids are dropped from the left of a deque, O(1) amortized per issue.
+    """
+    def __init__(self, ttl=CAPTCHA_TTL_SECONDS):
+        super().__init__(ttl)
+        self._codes = {}
+        self._expiry = deque()
+        self._lock = threading.Lock()
+
+    def _purge(self, now):
+        while self._expiry and self._expiry[0][0] <= now:
+            _, captcha_id = self._expiry.popleft()
+            entry = self._codes.get(captcha_id)
+            if entry and entry[1] <= now:
+                del self._codes[captcha_id]
+
+    def put(self, captcha_id, code):
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._purge(now)
+            self._codes[captcha_id] = (code, expires_at)
+            self._expiry.append((expires_at, captcha_id))
+
+    def pop(self, captcha_id):
+        with self._lock:
+            entry = self._codes.pop(captcha_id, None)
+        if not entry or entry[1] <= time.time():
+            return None
+        return entry[0]
+
+    def __len__(self):
+        return len(self._codes)
+
+class SQLiteCaptchaStore(CaptchaStore):
+    """
+    Store shared by every worker on the host through one SQLite file (WAL mode), so a captcha issued
+    by one gunicorn worker verifies on any other. Expired rows are deleted through the expires_at
+    index at most once per `purge_interval` seconds.
+    """
+    def __init__(self, path, ttl=CAPTCHA_TTL_SECONDS, purge_interval=30):
+        super().__init__(ttl)
+        self.path = path
+        self._secure_file(path)
+        self.purge_interval = purge_interval
+        self._local = threading.local()
+        self._last_purge = 0.0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS captchas "
+                "(id TEXT PRIMARY KEY, code TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_captchas_expires_at ON captchas (expires_at)")
+
+    @staticmethod
+    def _secure_file(path):
+        """
+        Creates the store file readable by this user only (SQLite gives its -wal/-shm files the same
+        mode) and refuses a file someone else owns, which could have been planted to read or seed codes.
+        """
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if hasattr(os, 'getuid') and os.fstat(fd).st_uid != os.getuid():
+                raise PermissionError(f"Captcha store {path} is owned by another user")
+            if hasattr(os, 'fchmod'):
+                os.fchmod(fd, 0o600)
+        finally:
+            os.close(fd)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def put(self, captcha_id, code):
+        now = time.time()
+        conn = self._connect()
+        if now - self._last_purge > self.purge_interval:
+            self._last_purge = now
+            conn.execute("DELETE FROM captchas WHERE expires_at <= ?", (now,))
+        conn.execute("INSERT OR REPLACE INTO captchas (id, code, expires_at) VALUES (?, ?, ?)",
+                     (captcha_id, code, now + self.ttl))
+
+    def pop(self, captcha_id):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT code, expires_at FROM captchas WHERE id = ?", (captcha_id,)).fetchone()
+            if row:
+                conn.execute("DELETE FROM captchas WHERE id = ?", (captcha_id,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if not row or row[1] <= time.time():
+            return None
+        return row[0]
+
+def create_captcha_store(config, instance_path=None):
+    """
+    Builds the configured store. The sqlite file defaults to the app's instance folder (never a
+    shared temp dir); without CAPTCHA_STORE_PATH or an instance path the sqlite backend is refused.
+    """
+    backend = (config.get('CAPTCHA_STORE_BACKEND') or 'memory').lower()
+    ttl = config.get('CAPTCHA_TTL_SECONDS', CAPTCHA_TTL_SECONDS)
+    if backend == 'sqlite':
+        path = config.get('CAPTCHA_STORE_PATH')
+        if not path:
+            if not instance_path:
+                raise ValueError("CAPTCHA_STORE_PATH is required for the sqlite captcha store")
+            os.makedirs(instance_path, mode=0o700, exist_ok=True)
+            path = os.path.join(instance_path, 'captcha.sqlite3')
+        return SQLiteCaptchaStore(path, ttl=ttl)
+    return MemoryCaptchaStore(ttl=ttl)
+
+# Guards the lazy per-app setup so concurrent first requests build one store
+_store_lock = threading.Lock()
+
+def get_captcha_store():
+    store = current_app.extensions.get('captcha_store')
+    if store is None:
+        with _store_lock:
+            store = current_app.extensions.get('captcha_store')
+            if store is None:
+                store = current_app.extensions['captcha_store'] = create_captcha_store(
+                    current_app.config, current_app.instance_path
+                )
+    return store
+
+def render_captcha(image=None):
+    """Renders one challenge. Returns (code, base64 PNG)."""
+    from captcha.image import ImageCaptcha
+    image = image or ImageCaptcha(width=280, height=90)
+    code = str(uuid.uuid4())[:6].upper()
+    data = image.generate(code)
+    return code, base64.b64encode(data.getvalue()).decode('ascii')
+
+class CaptchaPool:
+    """
+    Bounded pool of pre-rendered challenges, topped up by a daemon thread so /auth/captcha only pops
+    a ready image. The thread starts lazily on first use (i.e. inside each gunicorn worker) and is
+    woken after every take; an empty pool falls back to rendering inline and counts a miss.
+    """
+    def __init__(self, size, refill_interval=5.0):
+        self.size = size
+        self.refill_interval = refill_interval
+        self._ready = queue.Queue(maxsize=max(size, 1))
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.hits = 0
+        self.misses = 0
+        self.rendered = 0
+        self.render_seconds = 0.0
+
+    def _render(self, image=None):
+        started = time.perf_counter()
+        challenge = render_captcha(image)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.rendered += 1
+            self.render_seconds += elapsed
+        return challenge
+
+    def _refill_loop(self):
+        from captcha.image import ImageCaptcha
+        image = ImageCaptcha(width=280, height=90)
+        while True:
+            try:
+                while not self._ready.full():
+                    self._ready.put_nowait(self._render(image))
+            except queue.Full:
+                pass
+            except Exception as e:
+                logger.warning(f"Captcha pool refill failed: {e}")
+            self._wakeup.wait(self.refill_interval)
+            self._wakeup.clear()
+
+    def start(self):
+        if self.size <= 0:
+            return
+        with self._lock:
+            # is_alive() also restarts the worker in a process forked after it was started
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._refill_loop, name='captcha-pool', daemon=True)
+                self._thread.start()
+
+    def take(self):
+        """Returns (code, base64 PNG)."""
+        self.start()
+        try:
+            challenge = self._ready.get_nowait()
+            with self._lock:
+                self.hits += 1
+        except queue.Empty:
+            with self._lock:
+                self.misses += 1
+            challenge = self._render()
+        self._wakeup.set()
+        return challenge
+
+    def metrics(self):
+        with self._lock:
+            served = self.hits + self.misses
+            return {
+                'poolSize': self.size,
+                'ready': self._ready.qsize(),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRate': round(self.hits / served, 4) if served else None,
+                'rendered': self.rendered,
+                'avgRenderMs': round(self.render_seconds * 1000 / self.rendered, 2) if self.rendered else None
+            }
+
+# One pool (and so one refill thread and one set of metrics) per app, however many requests race to create it
+_pool_lock = threading.Lock()
+
+def get_captcha_pool():
+    pool = current_app.extensions.get('captcha_pool')
+    if pool is None:
+        with _pool_lock:
+            pool = current_app.extensions.get('captcha_pool')
+            if pool is None:
+                pool = current_app.extensions['captcha_pool'] = CaptchaPool(current_app.config.get('CAPTCHA_POOL_SIZE', 0))
+    return pool
@@ -0,0 +1,436 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+from flask import current_app
+from sqlalchemy import and_, func, insert
+from sqlalchemy.orm import load_only
+from ..db import db
+from ..models import Question, QuestionEmbedding, EmbeddingCacheEntry
+from .bloom_service import extract_text_from_blocks
+
+logger = logging.getLogger(__name__)
+
+# Questions embedded per provider call when (re)indexing a subject bank
+INDEX_BATCH_SIZE = 256
+# Retry delay after a question's embedding fails: doubles per failure up to the maximum (seconds)
+FAILURE_BACKOFF_BASE = 60
+FAILURE_BACKOFF_MAX = 24 * 3600
+
+def question_text(editor_data):
+    if not editor_data or not isinstance(editor_data, dict):
+        return ""
+    return extract_text_from_blocks(editor_data.get('blocks', [])).strip()
+
+def content_hash(text):
+    """sha256 of the whitespace-normalized text; embeddings are reused while it is unchanged."""
+    normalized = " ".join((text or "").split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+def to_vector(embedding):
+    if isinstance(embedding, list) and len(embedding) == 1 and isinstance(embedding[0], list):
+        embedding = embedding[0]
+    return np.asarray(embedding, dtype=np.float32).ravel()
+
+class EmbeddingCache:
+    """
+    Embeddings by (model_key, content_hash), so a text is sent to a provider once per model.
+    An in-process LRU of `max_entries` vectors sits in front of the embedding_cache table.
+    Table writes use their own connection, so cached vectors persist whatever the caller's
+    transaction does. Zero vectors (unconfigured or failing provider) are never cached.
+    """
+    LOOKUP_CHUNK = 500
+
+    def __init__(self, max_entries=20000):
+        self.max_entries = max_entries
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def _remember(self, key, vec):
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def get_many(self, model_key, hashes):
+        """Returns {content_hash: float32 vector} for the hashes that are cached."""
+        found = {}
+        with self._lock:
+            for text_hash in hashes:
+                vec = self._lru.get((model_key, text_hash))
+                if vec is not None:
+                    self._lru.move_to_end((model_key, text_hash))
+                    found[text_hash] = vec
+        memory_hits = len(found)
+
+        missing = list({h for h in hashes if h not in found})
+        try:
+            for start in range(0, len(missing), self.LOOKUP_CHUNK):
+                rows = db.session.query(EmbeddingCacheEntry.content_hash, EmbeddingCacheEntry.vector).filter(
+                    EmbeddingCacheEntry.model_key == model_key,
+                    EmbeddingCacheEntry.content_hash.in_(missing[start:start + self.LOOKUP_CHUNK])
+                )
+                for text_hash, blob in rows:
+                    found[text_hash] = np.frombuffer(blob, dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed: {e}")
+
+        with self._lock:
+            for text_hash in missing:
+                if text_hash in found:
+                    self._remember((model_key, text_hash), found[text_hash])
+            self.hits += memory_hits
+            self.db_hits += len(found) - memory_hits
+            self.misses += len(missing) - (len(found) - memory_hits)
+        return found
+
+    def put_many(self, model_key, vectors):
+        """Caches {content_hash: embedding}; skips empty and all-zero vectors."""
+        entries = {}
+        for text_hash, embedding in vectors.items():
+            vec = to_vector(embedding)
+            if vec.size and np.any(vec):
+                entries[text_hash] = vec
+        if not entries:
+            return
+
+        with self._lock:
+            for text_hash, vec in entries.items():
+                self._remember((model_key, text_hash), vec)
+
+        now = datetime.utcnow()
+        rows = [
+            {'model_key': model_key, 'content_hash': text_hash, 'dimensions': int(vec.size),
+             'vector': vec.tobytes(), 'created_at': now}
+            for text_hash, vec in entries.items()
+        ]
+        try:
+            with db.engine.begin() as connection:
+                dialect = connection.dialect.name
+                if dialect == 'postgresql':
+                    from sqlalchemy.dialects.postgresql import insert as dialect_insert
+                elif dialect == 'sqlite':
+                    from sqlalchemy.dialects.sqlite import insert as dialect_insert
+                else:
+                    dialect_insert = None
+                if dialect_insert is not None:
+                    # A concurrent worker may have cached the same text; either vector is fine
+                    connection.execute(dialect_insert(EmbeddingCacheEntry.__table__).on_conflict_do_nothing(), rows)
+                else:
+                    connection.execute(insert(EmbeddingCacheEntry.__table__), rows)
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+
+    def metrics(self):
+        with self._lock:
+            looked_up = self.hits + self.db_hits + self.misses
+            return {
+                'entries': len(self._lru),
+                'maxEntries': self.max_entries,
+                'hits': self.hits,
+                'dbHits': self.db_hits,
+                'misses': self.misses,
+                'hitRate': round((self.hits + self.db_hits) / looked_up, 4) if looked_up else None
+            }
+
+def get_embedding_cache():
+    cache = current_app.extensions.get('embedding_cache')
+    if cache is None:
+        cache = current_app.extensions['embedding_cache'] = EmbeddingCache(
+            current_app.config.get('EMBEDDING_CACHE_SIZE', 20000)
+        )
+    return cache
+
+class EmbeddingFailures:
+    """
+    Per-process backoff for questions whose embedding failed (zero vector or provider error), keyed
+    by (model_key, question_id), so catch-up indexing does not resend them on every run.
+    """
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def record(self, model_key, question_ids):
+        now = time.monotonic()
+        with self._lock:
+            for question_id in question_ids:
+                failures = self._entries.get((model_key, question_id), (0, 0))[0] + 1
+                delay = min(FAILURE_BACKOFF_BASE * 2 ** (failures - 1), FAILURE_BACKOFF_MAX)
+                self._entries[(model_key, question_id)] = (failures, now + delay)
+
+    def clear(self, model_key, question_ids):
+        with self._lock:
+            for question_id in question_ids:
+                self._entries.pop((model_key, question_id), None)
+
+    def backing_off(self, model_key, question_id):
+        entry = self._entries.get((model_key, question_id))
+        return entry is not None and entry[1] > time.monotonic()
+
+def get_embedding_failures():
+    failures = current_app.extensions.get('embedding_failures')
+    if failures is None:
+        failures = current_app.extensions['embedding_failures'] = EmbeddingFailures()
+    return failures
+
+def index_questions(questions, provider):
+    """
+    Makes sure every question has an embedding for the provider's model and its current text.
+    Only questions whose content hash (or model) changed are sent to the provider, in one batch.
+    Returns the number of embeddings written; the caller commits.
+    """
+    pending = []
+    for q in questions:
+        text = question_text(q.editor_data)
+        if text:
+            pending.append((q.id, text, content_hash(text)))
+    if not pending:
+        return 0
+
+    model_key = provider.embedding_model_key
+    existing = {
+        e.question_id: e for e in
+        QuestionEmbedding.query.filter(QuestionEmbedding.question_id.in_([p[0] for p in pending])).all()
+    }
+    stale = [
+        p for p in pending
+        if p[0] not in existing
+        or existing[p[0]].content_hash != p[2]
+        or existing[p[0]].model_key != model_key
+    ]
+    if not stale:
+        return 0
+
+    failures = get_embedding_failures()
+    try:
+        vectors = provider.get_embeddings([p[1] for p in stale])
+    except Exception:
+        failures.record(model_key, [p[0] for p in stale])
+        raise
+    written = 0
+    failed = []
+    now = datetime.utcnow()
+    for (question_id, _, text_hash), embedding in zip(stale, vectors):
+        vec = to_vector(embedding)
+        # Providers return zero vectors when unconfigured or failing; never persist those
+        if vec.size == 0 or not np.any(vec):
+            failed.append(question_id)
+            continue
+        row = existing.get(question_id)
+        if row is None:
+            row = QuestionEmbedding(question_id=question_id)
+            db.session.add(row)
+        row.model_key = model_key
+        row.content_hash = text_hash
+        row.dimensions = int(vec.size)
+        row.vector = vec.tobytes()
+        row.updated_at = now
+        written += 1
+    failures.record(model_key, failed)
+    failed = set(failed)
+    failures.clear(model_key, [p[0] for p in stale if p[0] not in failed])
+    return written
+
+def ensure_subject_indexed(subject_id, provider):
+    """
+    Embeds (in batches) every question of the subject that has no embedding for the active model yet,
+    except questions still backing off after a failed embedding. A failing batch is logged and skipped.
+    """
+    model_key = provider.embedding_model_key
+    failures = get_embedding_failures()
+    missing = (
+        Question.query
+        .options(load_only(Question.id, Question.editor_data))
+        .outerjoin(QuestionEmbedding, and_(
+            QuestionEmbedding.question_id == Question.id,
+            QuestionEmbedding.model_key == model_key
+        ))
+        .filter(Question.subject_id == subject_id, QuestionEmbedding.question_id.is_(None))
+        .all()
+    )
+    missing = [q for q in missing if not failures.backing_off(model_key, q.id)]
+    written = 0
+    for start in range(0, len(missing), INDEX_BATCH_SIZE):
+        try:
+            written += index_questions(missing[start:start + INDEX_BATCH_SIZE], provider)
+        except Exception as e:
+            logger.warning(f"Embedding batch for subject {subject_id} failed: {e}")
+    if written:
+        db.session.commit()
+    return written
+
+def index_question_ids(question_ids, provider):
+    """Embeds the given questions for their current text in INDEX_BATCH_SIZE batches, committing each batch."""
+    question_ids = list(question_ids)
+    written = 0
+    for start in range(0, len(question_ids), INDEX_BATCH_SIZE):
+        batch = (
+            Question.query
+            .options(load_only(Question.id, Question.editor_data))
+            .filter(Question.id.in_(question_ids[start:start + INDEX_BATCH_SIZE]))
+            .all()
+        )
+        try:
+            written += index_questions(batch, provider)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Embedding batch of saved questions failed: {e}")
+    return written
+
+class SubjectIndexer:
+    """
+    Runs embedding work off the request thread: ensure_subject_indexed() with one pending run per
+    subject, and index_question_ids() for freshly saved questions. Like the AI job pool, workers
+    start lazily per process; with max_workers <= 0 the work happens inline (tests).
+    """
+    def __init__(self, app, max_workers):
+        self.app = app
+        self.max_workers = max_workers
+        self._executor = None
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def schedule(self, subject_id):
+        self._submit(_index_subject, subject_id, pending_key=subject_id)
+
+    def schedule_questions(self, question_ids):
+        if question_ids:
+            self._submit(_index_questions, list(question_ids))
+
+    def _submit(self, fn, arg, pending_key=None):
+        if self.max_workers <= 0:
+            fn(arg)
+            return
+        with self._lock:
+            if pending_key is not None:
+                if pending_key in self._pending:
+                    return
+                self._pending.add(pending_key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='embed-index')
+        self._executor.submit(self._run_in_context, fn, arg, pending_key)
+
+    def _run_in_context(self, fn, arg, pending_key):
+        try:
+            with self.app.app_context():
+                fn(arg)
+        except Exception as e:
+            logger.warning(f"Background embedding indexing failed: {e}")
+        finally:
+            if pending_key is not None:
+                with self._lock:
+                    self._pending.discard(pending_key)
+
+def _active_provider():
+    from .ai_provider import get_active_ai_provider
+    from .rbac_service import get_settings
+    return get_active_ai_provider(get_settings())
+
+def _index_subject(subject_id):
+    return ensure_subject_indexed(subject_id, _active_provider())
+
+def _index_questions(question_ids):
+    return index_question_ids(question_ids, _active_provider())
+
+_indexer_lock = threading.Lock()
+
+def get_subject_indexer():
+    indexer = current_app.extensions.get('subject_indexer')
+    if indexer is None:
+        with _indexer_lock:
+            indexer = current_app.extensions.get('subject_indexer')
+            if indexer is None:
+                indexer = current_app.extensions['subject_indexer'] = SubjectIndexer(
+                    current_app._get_current_object(), current_app.config.get('EMBEDDING_INDEX_WORKERS', 1)
+                )
+    return indexer
+
+def schedule_subject_indexing(subject_id):
+    """Queues catch-up embedding of the subject's unindexed questions (see SubjectIndexer)."""
+    get_subject_indexer().schedule(subject_id)
+
+def schedule_question_indexing(question_ids):
+    """
+    Queues embedding of freshly saved (created or edited) questions on the background indexer, so
+    saves never wait on the provider. A no-op when EMBED_QUESTIONS_ON_SAVE is off.
+    """
+    if current_app.config.get('EMBED_QUESTIONS_ON_SAVE', True):
+        get_subject_indexer().schedule_questions(question_ids)
+
+def _subject_embeddings_query(subject_id, model_key, *columns):
+    return (
+        db.session.query(*columns)
+        .join(Question, Question.id == QuestionEmbedding.question_id)
+        .filter(Question.subject_id == subject_id, QuestionEmbedding.model_key == model_key)
+    )
+
+def get_subject_matrix(subject_id, model_key):
+    """
+    Per-subject matrix of L2-normalized embeddings, cached per process and rebuilt only when
+    the subject's (count, max(updated_at)) stamp moves. Returns {dimensions: (ids, matrix)}.
+    """
+    stamp = tuple(_subject_embeddings_query(
+        subject_id, model_key,
+        func.count(QuestionEmbedding.question_id), func.max(QuestionEmbedding.updated_at)
+    ).one())
+
+    cache = current_app.extensions.setdefault('question_embedding_index', {})
+    key = (subject_id, model_key)
+    entry = cache.get(key)
+    if entry and entry['stamp'] == stamp:
+        return entry['by_dims']
+
+    grouped = {}
+    for question_id, dims, blob in _subject_embeddings_query(
+        subject_id, model_key,
+        QuestionEmbedding.question_id, QuestionEmbedding.dimensions, QuestionEmbedding.vector
+    ):
+        ids, vectors = grouped.setdefault(dims, ([], []))
+        ids.append(question_id)
+        vectors.append(np.frombuffer(blob, dtype=np.float32))
+
+    by_dims = {}
+    for dims, (ids, vectors) in grouped.items():
+        matrix = np.vstack(vectors)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        by_dims[dims] = (ids, matrix / norms)
+
+    cache[key] = {'stamp': stamp, 'by_dims': by_dims}
+    return by_dims
+
+def find_similar_questions(subject_id, text, provider, top_k=10, ensure_indexed=True):
+    """
+    Cosine similarity of `text` against the whole subject bank with one matrix-vector product.
+    Costs one embedding call for `text`. Returns [(question_id, score)] best first.
+    With ensure_indexed=False only questions that already have an embedding are considered.
+    """
+    if ensure_indexed:
+        ensure_subject_indexed(subject_id, provider)
+    by_dims = get_subject_matrix(subject_id, provider.embedding_model_key)
+    if not by_dims:
+        return []
+
+    query_vec = to_vector(provider.get_embeddings([text])[0])
+    norm = np.linalg.norm(query_vec)
+    if norm == 0 or query_vec.size not in by_dims:
+        return []
+
+    ids, matrix = by_dims[query_vec.size]
+    scores = matrix @ (query_vec / norm)
+    k = min(top_k, len(ids))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [(ids[i], float(scores[i])) for i in top]
@@ -6,6 +6,11 @@ from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.oxml import OxmlElement, parse_xml
 from docx.oxml.ns import nsdecls, qn
+from .validation_service import question_marks
+
+def _format_marks(marks):
+    """5.0 -> '5', 2.5 -> '2.5'"""
+    return str(int(marks)) if float(marks).is_integer() else str(marks)
 
 def add_formatted_text(paragraph, html_text):
     """
@@ -190,15 +195,9 @@ def generate_docx(paper):
     paper_title = paper.title
     
     # Calculate Total Marks
-    total_marks = 0
-    for sec in paper.sections:
-        for pq in sec.paper_questions:
-            ed = pq.question.editor_data or {}
-            marks_str = ed.get('marks') or ed.get('meta', {}).get('marks')
-            try:
-                total_marks += int(float(marks_str)) if marks_str else 0
-            except:
-                pass
+    total_marks = sum(
+        int(question_marks(pq.question)) for sec in paper.sections for pq in sec.paper_questions
+    )
                 
     meta_table = doc.add_table(rows=3, cols=2)
     meta_table.alignment = WD_ALIGN_PARAGRAPH.CENTER
@@ -258,14 +257,7 @@ def generate_docx(paper):
         sec_title_p.paragraph_format.space_after = Pt(8)
         
         # Calculate section marks
-        sec_marks = 0
-        for pq in sec.paper_questions:
-            ed = pq.question.editor_data or {}
-            marks_str = ed.get('marks') or ed.get('meta', {}).get('marks')
-            try:
-                sec_marks += int(float(marks_str)) if marks_str else 0
-            except:
-                pass
+        sec_marks = sum(int(question_marks(pq.question)) for pq in sec.paper_questions)
                 
         # Format Section Title, e.g., SECTION A: Questions [Total: 20 Marks]
         sec_title_text = f"{sec.title.upper()} ({sec_marks} Marks)"
@@ -277,7 +269,7 @@ def generate_docx(paper):
         for pq in sec.paper_questions:
             question = pq.question
             ed = question.editor_data or {}
-            marks_str = ed.get('marks') or ed.get('meta', {}).get('marks') or "0"
+            marks_str = _format_marks(question_marks(question))
             co_code = question.course_outcome.co_code if question.course_outcome else ""
             
             # Question wrapper layout
@@ -464,15 +456,9 @@ def generate_latex(paper):
     paper_title = _escape_latex(paper.title)
     
     # Calculate Total Marks
-    total_marks = 0
-    for sec in paper.sections:
-        for pq in sec.paper_questions:
-            ed = pq.question.editor_data or {}
-            marks_str = ed.get('marks') or ed.get('meta', {}).get('marks')
-            try:
-                total_marks += int(float(marks_str)) if marks_str else 0
-            except:
-                pass
+    total_marks = sum(
+        int(question_marks(pq.question)) for sec in paper.sections for pq in sec.paper_questions
+    )
     
     # Build the document
     lines = []
@@ -535,14 +521,7 @@ def generate_latex(paper):
     q_counter = 1
     for sec in paper.sections:
         # Calculate section marks
-        sec_marks = 0
-        for pq in sec.paper_questions:
-            ed = pq.question.editor_data or {}
-            marks_str = ed.get('marks') or ed.get('meta', {}).get('marks')
-            try:
-                sec_marks += int(float(marks_str)) if marks_str else 0
-            except:
-                pass
+        sec_marks = sum(int(question_marks(pq.question)) for pq in sec.paper_questions)
         
         sec_title = _escape_latex(sec.title.upper())
         lines.append(f'\\section*{{\\underline{{{sec_title} ({sec_marks} Marks)}}}}')
@@ -552,7 +531,7 @@ def generate_latex(paper):
         for pq in sec.paper_questions:
             question = pq.question
             ed = question.editor_data or {}
-            marks_str = ed.get('marks') or ed.get('meta', {}).get('marks') or '0'
+            marks_str = _format_marks(question_marks(question))
             co_code = question.course_outcome.co_code if question.course_outcome else ''
             
             # Question number and marks tag
@@ -0,0 +1,91 @@
+import logging
+from sqlalchemy import update, select, exists, func, case, cast, Integer
+from sqlalchemy.orm import aliased
+from ..db import db
+from ..models import Question, Subject, Semester, AcademicYear
+
+logger = logging.getLogger(__name__)
+
+def _meta(field):
+    return Question.editor_data[('meta', field)].as_string()
+
+def _meta_int(field):
+    """
+    The meta field as an integer, following Python's int(): surrounding whitespace, a sign and
+    leading zeros are accepted ("03", " 3"); anything else is NULL instead of a cast error.
+    """
+    text = func.trim(_meta(field))
+    if db.engine.dialect.name == 'postgresql':
+        # At most 9 digits, so the cast can never overflow an integer
+        is_int = text.op('~')(r'^[+-]?[0-9]{1,9}$')
+    else:
+        unsigned = case((func.substr(text, 1, 1).in_(['+', '-']), func.substr(text, 2)), else_=text)
+        is_int = (unsigned != '') & unsigned.op('NOT GLOB')('*[^0-9]*')
+    return case((is_int, cast(text, Integer)))
+
+def _orphan_condition():
+    # Anti-join: the question's subject row no longer exists
+    existing = aliased(Subject)
+    return ~exists().where(existing.id == Question.subject_id)
+
+def count_orphaned_questions():
+    return db.session.query(func.count(Question.id)).filter(_orphan_condition()).scalar()
+
+def heal_orphaned_questions():
+    """
+    Re-attaches questions whose subject was deleted/recreated, entirely in SQL:
+    1. UPDATE ... FROM subjects/semesters/academic_years matched on editor_data meta
+       (subcode, semester, academicYear);
+    2. fallback for the rest: first subject with the same code as meta.subcode.
+    Core UPDATEs bypass the ORM stats listeners, so the stats rollup is rebuilt when anything moved.
+    Returns {'orphans', 'healed', 'fallbackHealed', 'remaining'}.
+    """
+    orphans = count_orphaned_questions()
+    if not orphans:
+        return {'orphans': 0, 'healed': 0, 'fallbackHealed': 0, 'remaining': 0}
+
+    # Semester is stored as a JSON number or string depending on the client; compare as an integer
+    exact = (
+        update(Question)
+        .where(
+            _orphan_condition(),
+            Subject.semester_id == Semester.id,
+            Subject.academic_year_id == AcademicYear.id,
+            Subject.code == _meta('subcode'),
+            Semester.number == _meta_int('semester'),
+            AcademicYear.label == _meta('academicYear')
+        )
+        .values(subject_id=Subject.id)
+        .execution_options(synchronize_session=False)
+    )
+    healed = db.session.execute(exact).rowcount
+
+    by_code = aliased(Subject)
+    fallback_subject = (
+        select(by_code.id)
+        .where(by_code.code == _meta('subcode'))
+        .order_by(by_code.created_at, by_code.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    fallback = (
+        update(Question)
+        .where(_orphan_condition(), _meta('subcode').is_not(None), fallback_subject.is_not(None))
+        .values(subject_id=fallback_subject)
+        .execution_options(synchronize_session=False)
+    )
+    fallback_healed = db.session.execute(fallback).rowcount
+    db.session.commit()
+
+    if healed or fallback_healed:
+        from .stats_service import rebuild_subject_question_stats
+        rebuild_subject_question_stats()
+
+    result = {
+        'orphans': orphans,
+        'healed': healed,
+        'fallbackHealed': fallback_healed,
+        'remaining': count_orphaned_questions()
+    }
+    logger.info(f"Database integrity check: {result}")
+    return result
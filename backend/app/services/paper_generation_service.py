@@ -0,0 +1,332 @@
+import math
+import random
+import time
+from fractions import Fraction
+import numpy as np
+from .validation_service import (
+    difficulty_minimums, question_difficulty, question_bloom, question_marks,
+    LOW_BLOOM_LEVELS, MEDIUM_BLOOM_LEVELS, HIGH_BLOOM_LEVELS
+)
+
+# Exact selection engine for auto-generated papers.
+#
+# Each difficulty group gets a knapsack table over (question count, integer marks) whose cells hold
+# the set of Bloom coverage masks reachable with that many questions and marks. Coverage masks are
+# 3 bits (low / medium / high Bloom band), so a set of masks fits in one uint8 bitset and a table
+# update for one question is a single vectorized lookup + OR over the whole table.
+#
+# The 40/30/30 floors always add up to at least n - 2 for a paper of n questions, so for every paper
+# size only a handful of (easy, medium, hard, other) count splits exist. Each split is checked exactly
+# by convolving the group rows over marks, which makes "no paper exists" a proof rather than a guess.
+#
+# Fractional marks (2.5, 0.25, ...) are solved exactly by counting in units of 1/scale, where scale is
+# the common denominator of the pool. Marks that cannot be scaled within the limits below are left out,
+# and a search that then finds nothing is reported as not proven (feasible=None) instead of infeasible.
+
+LOW_BLOOM, MEDIUM_BLOOM, HIGH_BLOOM = 1, 2, 4
+FULL_COVERAGE = LOW_BLOOM | MEDIUM_BLOOM | HIGH_BLOOM
+FULL_COVERAGE_BIT = 1 << FULL_COVERAGE
+
+DIFFICULTY_GROUPS = ('EASY', 'MEDIUM', 'HARD', 'OTHER')
+
+DEFAULT_TIME_LIMIT = 5.0
+# Attempts per requested paper when sampling distinct candidates
+DISTINCT_ATTEMPTS = 20
+# Largest denominator of a fractional mark, and largest scaled total, the solver accepts
+MAX_MARKS_DENOMINATOR = 20
+MAX_SCALED_TOTAL = 20000
+
+class SolverTimeout(Exception):
+    pass
+
+def _build_tables():
+    sets = np.arange(256)
+    # OR_SHIFT[b][S] = {s | b for s in S}
+    or_shift = np.zeros((8, 256), dtype=np.uint8)
+    # OR_PRODUCT[S1][S2] = {a | b for a in S1 for b in S2}
+    or_product = np.zeros((256, 256), dtype=np.uint8)
+    for a in range(8):
+        has_a = (sets >> a) & 1 == 1
+        for b in range(8):
+            or_shift[b][has_a] |= np.uint8(1 << (a | b))
+            has_b = (sets >> b) & 1 == 1
+            or_product[np.ix_(has_a, has_b)] |= np.uint8(1 << (a | b))
+    return or_shift, or_product
+
+OR_SHIFT, OR_PRODUCT = _build_tables()
+
+def bloom_mask(q):
+    bloom = question_bloom(q)
+    if bloom in LOW_BLOOM_LEVELS:
+        return LOW_BLOOM
+    if bloom in MEDIUM_BLOOM_LEVELS:
+        return MEDIUM_BLOOM
+    if bloom in HIGH_BLOOM_LEVELS:
+        return HIGH_BLOOM
+    return 0
+
+def difficulty_group(q):
+    diff = question_difficulty(q)
+    return diff if diff in DIFFICULTY_GROUPS[:3] else 'OTHER'
+
+def _mask_bits(mask_set):
+    return [m for m in range(8) if (int(mask_set) >> m) & 1]
+
+def _combine(row_a, row_b, total_marks):
+    """Marks convolution of two rows: out[t] = union over i of row_a[i] x row_b[t - i]."""
+    out = np.zeros(total_marks + 1, dtype=np.uint8)
+    ia = np.flatnonzero(row_a)
+    ib = np.flatnonzero(row_b)
+    if ia.size and ib.size:
+        sums = ia[:, None] + ib[None, :]
+        values = OR_PRODUCT[row_a[ia][:, None], row_b[ib][None, :]]
+        keep = sums <= total_marks
+        np.bitwise_or.at(out, sums[keep], values[keep])
+    return out
+
+def _sets_at_total(row_a, row_b, total_marks):
+    """Mask set reachable by splitting exactly `total_marks` between the two rows."""
+    return int(np.bitwise_or.reduce(OR_PRODUCT[row_a, row_b[::-1]]))
+
+class _GroupTable:
+    """
+    Knapsack table for one difficulty group: table[count][marks] = bitset of reachable Bloom masks.
+    Interchangeable questions (same marks, same Bloom band) are pooled, and every table layer is kept
+    so a concrete selection can be walked back from any reachable cell.
+    """
+    def __init__(self, entries, max_count, total_marks, deadline):
+        self.max_count = max_count
+        self.total_marks = total_marks
+        self.pools = {}
+        for q, marks, mask in entries:
+            self.pools.setdefault((marks, mask), []).append(q)
+
+        self.items = []
+        for (marks, mask), pool in sorted(self.pools.items()):
+            copies = min(len(pool), max_count, total_marks // marks)
+            self.items.extend([(marks, mask)] * copies)
+
+        table = np.zeros((max_count + 1, total_marks + 1), dtype=np.uint8)
+        table[0, 0] = 1
+        self.layers = []
+        for marks, mask in self.items:
+            if time.monotonic() > deadline:
+                raise SolverTimeout()
+            self.layers.append(table)
+            nxt = table.copy()
+            nxt[1:, marks:] |= OR_SHIFT[mask][table[:-1, :total_marks + 1 - marks]]
+            table = nxt
+        self.table = table
+
+    def row(self, count):
+        if count > self.max_count:
+            return np.zeros(self.total_marks + 1, dtype=np.uint8)
+        return self.table[count]
+
+    def pick(self, count, marks, mask, rng):
+        """Random concrete questions realising (count, marks, mask)."""
+        taken = {}
+        for i in range(len(self.items) - 1, -1, -1):
+            item_marks, item_mask = self.items[i]
+            before = self.layers[i]
+            can_skip = (int(before[count, marks]) >> mask) & 1
+            prev_masks = []
+            if count and marks >= item_marks:
+                prev_masks = [
+                    p for p in _mask_bits(before[count - 1, marks - item_marks])
+                    if p | item_mask == mask
+                ]
+            if prev_masks and (not can_skip or rng.random() < 0.5):
+                key = (item_marks, item_mask)
+                taken[key] = taken.get(key, 0) + 1
+                count -= 1
+                marks -= item_marks
+                mask = rng.choice(prev_masks)
+
+        picked = []
+        for key, k in taken.items():
+            picked.extend(rng.sample(self.pools[key], k))
+        return picked
+
+def _count_splits(n, available):
+    """(easy, medium, hard, other) counts meeting the floors for a paper of n questions."""
+    floors = difficulty_minimums(n)
+    slack = n - sum(floors)
+    for d_easy in range(slack + 1):
+        for d_medium in range(slack + 1 - d_easy):
+            for d_hard in range(slack + 1 - d_easy - d_medium):
+                split = (floors[0] + d_easy, floors[1] + d_medium, floors[2] + d_hard,
+                         slack - d_easy - d_medium - d_hard)
+                if all(c <= available[g] for c, g in zip(split, DIFFICULTY_GROUPS)):
+                    yield split
+
+def _choose_cells(rows, total_marks, rng):
+    """Random (marks, mask) per group so marks add up to total_marks and masks cover all bands."""
+    suffix = [None] * len(rows)
+    suffix[-1] = rows[-1]
+    for k in range(len(rows) - 2, -1, -1):
+        suffix[k] = _combine(rows[k], suffix[k + 1], total_marks)
+
+    cells = []
+    remaining, covered = total_marks, 0
+    for k, row in enumerate(rows):
+        last = k == len(rows) - 1
+        options = []
+        for marks in np.flatnonzero(row[:remaining + 1]):
+            marks = int(marks)
+            for mask in _mask_bits(row[marks]):
+                new_cover = covered | mask
+                if last:
+                    ok = marks == remaining and new_cover == FULL_COVERAGE
+                else:
+                    ok = OR_SHIFT[new_cover][suffix[k + 1][remaining - marks]] & FULL_COVERAGE_BIT
+                if ok:
+                    options.append((marks, mask))
+        marks, mask = rng.choice(options)
+        cells.append((marks, mask))
+        remaining -= marks
+        covered |= mask
+    return cells
+
+def solve_paper(questions, total_marks, count=1, seed=None, target_difficulty=None, time_limit=DEFAULT_TIME_LIMIT):
+    """
+    Selects questions that satisfy validate_question_paper(): exact total marks, 40/30/30 difficulty
+    floors and low/medium/high Bloom coverage.
+
+    Returns {'papers': [[Question]], 'feasible': bool | None, 'reason': str | None, 'details': {...}}.
+    feasible is False when the bank provably has no valid paper, None when time_limit ran out first.
+    Up to `count` distinct papers are sampled; `seed` makes the sampling reproducible.
+    """
+    deadline = time.monotonic() + time_limit
+    rng = random.Random(seed)
+
+    # Questions that cannot be part of any paper of this total are skipped; questions whose marks
+    # the solver cannot represent exactly are unsupported and make a negative answer unproven
+    candidates = []
+    skipped = 0
+    unsupported = 0
+    for q in questions:
+        marks = question_marks(q)
+        if marks <= 0 or marks > total_marks:
+            skipped += 1
+            continue
+        exact = Fraction(marks)
+        if exact.denominator > MAX_MARKS_DENOMINATOR:
+            unsupported += 1
+            continue
+        candidates.append((q, exact))
+
+    scale = math.lcm(*(exact.denominator for _, exact in candidates)) if candidates else 1
+    if total_marks * scale > MAX_SCALED_TOTAL:
+        unsupported += sum(1 for _, exact in candidates if exact.denominator > 1)
+        candidates = [(q, exact) for q, exact in candidates if exact.denominator == 1]
+        scale = 1
+    target = total_marks * scale
+
+    entries = {g: [] for g in DIFFICULTY_GROUPS}
+    for q, exact in candidates:
+        entries[difficulty_group(q)].append((q, int(exact * scale), bloom_mask(q)))
+
+    eligible = [e for group in entries.values() for e in group]
+    details = {
+        'eligibleQuestions': len(eligible),
+        'skippedQuestions': skipped + unsupported,
+        'unsupportedMarks': unsupported,
+        'marksScale': scale,
+        'byDifficulty': {g: len(entries[g]) for g in DIFFICULTY_GROUPS},
+        'checkedSplits': 0
+    }
+
+    def result(papers, feasible, reason=None):
+        if feasible is False and unsupported:
+            feasible = None
+            reason += (f" {unsupported} question(s) with marks the solver cannot represent exactly were "
+                       f"left out, so this is not a proof that no paper exists.")
+        return {'papers': papers, 'feasible': feasible, 'reason': reason, 'details': details}
+
+    if total_marks <= 0:
+        return result([], False, "Total marks must be a positive whole number.")
+    if not eligible:
+        return result([], False, "No approved question has marks that fit within the requested total.")
+
+    coverage = 0
+    for _, _, mask in eligible:
+        coverage |= mask
+    missing = [name for bit, name in ((LOW_BLOOM, 'low (remember/understand)'),
+                                      (MEDIUM_BLOOM, 'medium (apply/analyze)'),
+                                      (HIGH_BLOOM, 'high (evaluate/create)')) if not coverage & bit]
+    if missing:
+        return result([], False, f"No eligible question covers the {', '.join(missing)} Bloom level(s).")
+
+    reachable = 1
+    for _, marks, _ in eligible:
+        reachable |= reachable << marks
+    if not (reachable >> target) & 1:
+        return result([], False, f"No subset of the eligible questions adds up to exactly {total_marks} marks.")
+
+    max_questions = min(len(eligible), target // min(marks for _, marks, _ in eligible))
+    available = {g: len(entries[g]) for g in DIFFICULTY_GROUPS}
+
+    try:
+        tables = {
+            g: _GroupTable(entries[g], min(available[g], max_questions if g != 'OTHER' else 2), target, deadline)
+            for g in DIFFICULTY_GROUPS
+        }
+
+        inner_cache = {}
+        feasible_splits = []
+        marks_only = False
+        for n in range(1, max_questions + 1):
+            for split in _count_splits(n, available):
+                if time.monotonic() > deadline:
+                    raise SolverTimeout()
+                details['checkedSplits'] += 1
+                rows = [tables[g].row(c) for g, c in zip(DIFFICULTY_GROUPS, split)]
+                if not rows[0].any():
+                    continue
+                key = split[1:]
+                if key not in inner_cache:
+                    inner_cache[key] = _combine(rows[1], _combine(rows[2], rows[3], target), target)
+                sets = _sets_at_total(rows[0], inner_cache[key], target)
+                if sets:
+                    marks_only = True
+                if sets & FULL_COVERAGE_BIT:
+                    feasible_splits.append(split)
+    except SolverTimeout:
+        return result([], None, f"Search stopped after {time_limit:g}s before a valid paper was found.")
+
+    details['feasibleSplits'] = len(feasible_splits)
+    if not feasible_splits:
+        if marks_only:
+            reason = (f"Papers of exactly {total_marks} marks meeting the 40/30/30 floors exist, "
+                      f"but none of them covers all three Bloom levels.")
+        else:
+            reason = (f"No combination of the {len(eligible)} eligible questions adds up to exactly {total_marks} "
+                      f"marks while meeting the 40/30/30 difficulty floors (every paper size up to "
+                      f"{max_questions} questions was checked).")
+        return result([], False, reason)
+
+    # Bias the flexible slots towards the requested difficulty, as the shuffle-based generator did
+    target_index = DIFFICULTY_GROUPS.index(target_difficulty) if target_difficulty in DIFFICULTY_GROUPS else None
+    weights = [1 + (split[target_index] if target_index is not None else 0) for split in feasible_splits]
+
+    papers = []
+    seen = set()
+    for _ in range(count * DISTINCT_ATTEMPTS):
+        if len(papers) >= count or time.monotonic() > deadline:
+            break
+        split = rng.choices(feasible_splits, weights=weights)[0]
+        rows = [tables[g].row(c) for g, c in zip(DIFFICULTY_GROUPS, split)]
+        cells = _choose_cells(rows, target, rng)
+        paper = []
+        for g, c, (marks, mask) in zip(DIFFICULTY_GROUPS, split, cells):
+            paper.extend(tables[g].pick(c, marks, mask, rng))
+        signature = frozenset(q.id for q in paper)
+        if signature in seen:
+            continue
+        seen.add(signature)
+        paper.sort(key=lambda q: (question_marks(q), DIFFICULTY_GROUPS.index(difficulty_group(q))))
+        papers.append(paper)
+
+    details['distinctPapers'] = len(papers)
+    return result(papers, True)
@@ -0,0 +1,94 @@
+import uuid
+from sqlalchemy import and_, case, exists, or_, update
+from sqlalchemy.orm import aliased
+from ..db import db
+from ..models import Section, PaperQuestion
+
+def _uuid_or_none(val):
+    try:
+        return val if isinstance(val, uuid.UUID) else uuid.UUID(str(val))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+def _positions(ordered_ids):
+    """{uuid: position} for a client ordering; unparseable ids are skipped, a repeated id keeps its last position."""
+    positions = {}
+    for idx, raw_id in enumerate(ordered_ids or []):
+        parsed = _uuid_or_none(raw_id)
+        if parsed is not None:
+            positions[parsed] = idx
+    return positions
+
+def _apply_positions(model, key_column, scope, positions):
+    """One UPDATE ... SET order_index = CASE key WHEN ... END over the rows named in `positions`."""
+    if not positions:
+        return 0
+    stmt = (
+        update(model)
+        .where(scope, key_column.in_(list(positions)))
+        .values(order_index=case(positions, value=key_column))
+        .execution_options(synchronize_session=False)
+    )
+    return db.session.execute(stmt).rowcount
+
+def reorder_sections(paper_id, ordered_section_ids):
+    """Sets each listed section of the paper to its position in the list. Unknown ids are ignored."""
+    paper_id = _uuid_or_none(paper_id)
+    updated = _apply_positions(Section, Section.id, Section.paper_id == paper_id, _positions(ordered_section_ids))
+    db.session.commit()
+    return updated
+
+def reorder_section_questions(section_id, ordered_question_ids):
+    """Sets each listed question of the section to its position in the list. Unknown ids are ignored."""
+    section_id = _uuid_or_none(section_id)
+    updated = _apply_positions(
+        PaperQuestion, PaperQuestion.question_id, PaperQuestion.section_id == section_id,
+        _positions(ordered_question_ids)
+    )
+    db.session.commit()
+    return updated
+
+def move_paper_question(paper_id, question_id, from_section_id, to_section_id, new_index):
+    """
+    Moves a question to `new_index` of another (or the same) section of the paper, shifting the
+    destination rows at or after that index down by one. The move and the shift are a single
+    UPDATE ... SET section_id = CASE ..., order_index = CASE ..., guarded by EXISTS checks on the
+    source row and the destination section; only a failed move costs an extra lookup to report why.
+    Raises LookupError if the question is not in the source section and ValueError if the
+    destination is not a section of this paper.
+    """
+    paper_id, question_id = _uuid_or_none(paper_id), _uuid_or_none(question_id)
+    from_section_id, to_section_id = _uuid_or_none(from_section_id), _uuid_or_none(to_section_id)
+    if None in (paper_id, from_section_id, question_id):
+        raise LookupError("Question not found in source section")
+    if to_section_id is None:
+        raise ValueError("Destination section invalid")
+
+    def is_moved_row(pq):
+        return and_(pq.paper_id == paper_id, pq.section_id == from_section_id, pq.question_id == question_id)
+
+    moved = is_moved_row(PaperQuestion)
+    # Aliased so the guard is not correlated with the row being updated
+    source_exists = exists().where(is_moved_row(aliased(PaperQuestion)))
+    dest_exists = exists().where(Section.id == to_section_id, Section.paper_id == paper_id)
+
+    updated = db.session.execute(
+        update(PaperQuestion)
+        .where(
+            or_(moved, and_(PaperQuestion.section_id == to_section_id, PaperQuestion.order_index >= new_index)),
+            source_exists,
+            dest_exists
+        )
+        .values(
+            section_id=case((moved, to_section_id), else_=PaperQuestion.section_id),
+            order_index=case((moved, new_index), else_=PaperQuestion.order_index + 1)
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    if not updated:
+        db.session.rollback()
+        if not db.session.query(source_exists).scalar():
+            raise LookupError("Question not found in source section")
+        raise ValueError("Destination section invalid")
+    db.session.commit()
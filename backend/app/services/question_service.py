@@ -1,7 +1,23 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+import base64
+import math
+import time
 import uuid
+from sqlalchemy import tuple_, select, exists, or_, false, insert
+from sqlalchemy.orm import aliased
 from ..db import db
-from ..models import AcademicYear, Semester, Subject, Question
+from ..models import AcademicYear, Semester, Subject, Question, CourseOutcome, User, Paper, QuestionUsage
+
+# Keyset listing page sizes for GET /api/questions?cursor=...
+LISTING_DEFAULT_LIMIT = 50
+LISTING_MAX_LIMIT = 200
+
+# Rows per INSERT executemany in bulk_insert_questions
+BULK_INSERT_CHUNK = 1000
+
+# A question is "recently used" if it appears in one of the subject's last papers or was used lately
+RECENT_PAPERS = 3
+RECENT_USAGE_DAYS = 30
 
 def create_question(data, user_id):
     # Extract data
@@ -156,7 +172,7 @@ def create_question(data, user_id):
     db.session.commit()
     
     # Return dict using local vars to avoid detached instance issues
-    return {
+    result = {
         "id": str(question.id),
         "subcode": sub_code,
         "academicYear": ay_label,
@@ -166,6 +182,11 @@ def create_question(data, user_id):
         "createdAt": question.created_at.isoformat()
     }
 
+    from .embedding_service import schedule_question_indexing
+    schedule_question_indexing([question.id])
+
+    return result
+
 def get_questions(filters):
     query = Question.query.join(Subject).join(AcademicYear).join(Semester)
 
@@ -179,3 +200,235 @@ def get_questions(filters):
         query = query.filter(AcademicYear.label == filters.get('academicYear'))
 
     return query.all()
+
+def encode_listing_cursor(created_at, question_id):
+    """Opaque cursor pointing at the last (created_at, id) pair of a listing page."""
+    raw = f"{created_at.isoformat()}|{question_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_listing_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at_str, id_str = raw.split('|', 1)
+        return datetime.fromisoformat(created_at_str), uuid.UUID(id_str)
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+def recently_used_condition(subject_id, now=None):
+    """
+    Correlated EXISTS over question_usages for the current Question row: true when the question
+    is in one of the subject's last RECENT_PAPERS papers or was used in the last RECENT_USAGE_DAYS.
+    Negate it to exclude recently used questions (an anti-join), or select it for isRecentlyUsed.
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=RECENT_USAGE_DAYS)
+    last_papers = (
+        select(Paper.id)
+        .where(Paper.subject_id == subject_id)
+        .order_by(Paper.created_at.desc())
+        .limit(RECENT_PAPERS)
+    )
+    return exists().where(
+        QuestionUsage.question_id == Question.id,
+        QuestionUsage.subject_id == subject_id,
+        or_(QuestionUsage.paper_id.in_(last_papers), QuestionUsage.used_at >= cutoff)
+    )
+
+def get_questions_page(query, cursor=None, limit=None, include_editor_data=False, recently_used=None):
+    """
+    Keyset-paginated, projection-only listing over an already filtered Question query.
+
+    Pages are ordered on (created_at DESC, id DESC) and fetched in a single SELECT that
+    joins subject / academic year / semester / course outcome / creator, so the cost of
+    a page does not depend on how deep the client has scrolled. editorData is only
+    selected when include_editor_data is set. recently_used is an optional SQL condition
+    (see recently_used_condition) selected as the isRecentlyUsed flag.
+    """
+    limit = min(max(limit or LISTING_DEFAULT_LIMIT, 1), LISTING_MAX_LIMIT)
+
+    # Aliased so the projection joins never clash with the semester/academicYear/subcode filter joins
+    sub = aliased(Subject)
+    ay = aliased(AcademicYear)
+    sem = aliased(Semester)
+    co = aliased(CourseOutcome)
+    creator = aliased(User)
+
+    columns = [
+        Question.id, Question.course_outcome_id, Question.creator_id, Question.source,
+        Question.difficulty, Question.bloom_level, Question.marks, Question.status, Question.review_comments,
+        Question.reviewed_by, Question.created_at,
+        sub.code.label('subcode'), ay.label.label('academic_year'), sem.number.label('semester'),
+        co.co_code.label('co_code'), creator.name.label('creator_name'),
+        (recently_used if recently_used is not None else false()).label('is_recently_used'),
+    ]
+    if include_editor_data:
+        columns.append(Question.editor_data)
+
+    listing = (
+        query
+        .outerjoin(sub, sub.id == Question.subject_id)
+        .outerjoin(ay, ay.id == sub.academic_year_id)
+        .outerjoin(sem, sem.id == sub.semester_id)
+        .outerjoin(co, co.id == Question.course_outcome_id)
+        .outerjoin(creator, creator.id == Question.creator_id)
+        .with_entities(*columns)
+    )
+
+    if cursor:
+        cursor_created_at, cursor_id = decode_listing_cursor(cursor)
+        listing = listing.filter(tuple_(Question.created_at, Question.id) < tuple_(cursor_created_at, cursor_id))
+
+    # Fetch one extra row to know whether another page exists without a COUNT
+    rows = listing.order_by(None).order_by(Question.created_at.desc(), Question.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    results = []
+    for row in rows:
+        item = {
+            "id": str(row.id),
+            "subcode": row.subcode,
+            "academicYear": row.academic_year,
+            "semester": row.semester,
+            "courseOutcomeId": str(row.course_outcome_id) if row.course_outcome_id else None,
+            "coCode": row.co_code,
+            "creatorId": str(row.creator_id) if row.creator_id else None,
+            "creatorName": row.creator_name,
+            "source": row.source,
+            "difficulty": row.difficulty,
+            "bloomLevel": row.bloom_level,
+            "marks": row.marks,
+            "status": row.status,
+            "reviewComments": row.review_comments,
+            "reviewedBy": str(row.reviewed_by) if row.reviewed_by else None,
+            "createdAt": row.created_at.isoformat(),
+            "isRecentlyUsed": bool(row.is_recently_used)
+        }
+        if include_editor_data:
+            item["editorData"] = row.editor_data
+        results.append(item)
+
+    next_cursor = encode_listing_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+    return {
+        "questions": results,
+        "nextCursor": next_cursor,
+        "hasMore": has_more,
+        "limit": limit
+    }
+
+def _parse_uuid(val):
+    if not val:
+        return None
+    if isinstance(val, uuid.UUID):
+        return val
+    try:
+        return uuid.UUID(str(val))
+    except ValueError:
+        return None
+
+def _marks_parseable(marks):
+    """Missing/blank marks, numbers and numeric strings ("5", "2.5") are accepted, as editor_data_marks parses them."""
+    if marks is None or marks == '':
+        return True
+    if isinstance(marks, bool):
+        return False
+    try:
+        return math.isfinite(float(marks))
+    except (ValueError, TypeError):
+        return False
+
+def bulk_insert_questions(subject_id, user_id, items, default_co_id=None):
+    """
+    Validates, classifies and inserts a batch of AI questions as DRAFTs of one subject.
+
+    The whole batch is checked up front (text present, marks numeric, course outcome belongs to
+    the subject), Bloom levels are computed in one classify_many() pass, and accepted rows go in
+    with one executemany INSERT per BULK_INSERT_CHUNK rows. Stats counters are bumped once and the
+    new rows queued for background embedding after the commit.
+    Returns (created_count, results) with one {'index', 'status', 'id' | 'error'} per item.
+    """
+    from .bloom_service import classify_many, extract_text_from_editor_data
+    from .stats_service import apply_question_count_deltas
+    from .validation_service import editor_data_marks
+
+    subject = db.session.get(Subject, subject_id)
+    if not subject:
+        raise LookupError("Subject not found")
+
+    valid_co_ids = {
+        co_id for (co_id,) in
+        db.session.query(CourseOutcome.id).filter(CourseOutcome.subject_id == subject_id)
+    }
+    if default_co_id not in valid_co_ids:
+        default_co_id = None
+
+    results = []
+    accepted = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not str(item.get('text') or '').strip():
+            results.append({'index': index, 'status': 'error', 'error': 'Missing question text'})
+            continue
+        if not _marks_parseable(item.get('marks')):
+            results.append({'index': index, 'status': 'error', 'error': 'marks must be a number'})
+            continue
+        co_id = default_co_id
+        if item.get('courseOutcomeId'):
+            co_id = _parse_uuid(item.get('courseOutcomeId'))
+            if co_id not in valid_co_ids:
+                results.append({'index': index, 'status': 'error', 'error': 'Course outcome does not belong to this subject'})
+                continue
+        results.append({'index': index, 'status': 'created'})
+        accepted.append((index, item, co_id))
+
+    classifications = classify_many([item['text'] for _, item, _ in accepted])
+
+    now = datetime.utcnow()
+    timestamp = int(time.time() * 1000)
+    rows = []
+    for position, ((index, item, co_id), classification) in enumerate(zip(accepted, classifications)):
+        question_id = uuid.uuid4()
+        editor_data = {
+            "time": timestamp,
+            "blocks": [
+                {
+                    "id": "genAI" + str(position),
+                    "type": "paragraph",
+                    "data": { "text": item['text'] }
+                }
+            ],
+            "version": "2.28.0",
+            "meta": {
+                "marks": item.get('marks'),
+                "difficulty": classification['difficulty'],
+                "bloomLevel": classification['bloomLevel']
+            }
+        }
+        rows.append({
+            'id': question_id,
+            'subject_id': subject_id,
+            'course_outcome_id': co_id,
+            'creator_id': user_id,
+            'source': 'AI',
+            'difficulty': classification['difficulty'],
+            'bloom_level': classification['bloomLevel'],
+            'status': 'DRAFT',
+            'editor_data': editor_data,
+            # Core inserts bypass the model's validator, so the derived columns are set here
+            'marks': editor_data_marks(editor_data),
+            'search_text': extract_text_from_editor_data(editor_data),
+            'created_at': now,
+            'updated_at': now
+        })
+        results[index]['id'] = str(question_id)
+
+    if rows:
+        for start in range(0, len(rows), BULK_INSERT_CHUNK):
+            db.session.execute(insert(Question), rows[start:start + BULK_INSERT_CHUNK])
+        # Core-level inserts bypass the ORM stats listeners
+        apply_question_count_deltas(db.session.connection(), {(subject_id, 'DRAFT'): len(rows)})
+    db.session.commit()
+
+    if rows:
+        from .embedding_service import schedule_question_indexing
+        schedule_question_indexing([row['id'] for row in rows])
+
+    return len(rows), results
@@ -1,5 +1,9 @@
+import time
 import uuid
 from datetime import datetime
+from flask import g, current_app, has_app_context
+from sqlalchemy import event, func
+from ..db import db
 from ..models import User, FacultyAssignment, SystemSetting
 
 def to_uuid(val):
@@ -12,110 +16,167 @@ def to_uuid(val):
     except ValueError:
         return None
 
+SETTINGS_CACHE_KEY = 'system_settings_cache'
+
+def _settings_stamp():
+    # Any insert/update/delete of a setting moves the row count or the updated_at high-water mark
+    return tuple(db.session.query(func.count(SystemSetting.id), func.max(SystemSetting.updated_at)).one())
+
 def get_settings():
-    """Retrieves all active system settings as a dictionary."""
-    settings_dict = {}
+    """
+    Retrieves all active system settings as a dictionary.
+    Served from a per-process cache; the table's (count, max(updated_at)) stamp is re-checked at most
+    every SETTINGS_CACHE_TTL seconds and the full table is re-read only when the stamp moved.
+    """
     try:
-        all_settings = SystemSetting.query.all()
-        for s in all_settings:
-            settings_dict[s.key] = s.value
+        cache = current_app.extensions.get(SETTINGS_CACHE_KEY)
+        now = time.monotonic()
+        if cache and now - cache['checked_at'] < current_app.config.get('SETTINGS_CACHE_TTL', 5):
+            return dict(cache['values'])
+
+        stamp = _settings_stamp()
+        if cache and cache['stamp'] == stamp:
+            cache['checked_at'] = now
+            return dict(cache['values'])
+
+        settings_dict = {s.key: s.value for s in SystemSetting.query.all()}
+        current_app.extensions[SETTINGS_CACHE_KEY] = {'stamp': stamp, 'values': settings_dict, 'checked_at': now}
+        return dict(settings_dict)
     except Exception as e:
         print(f"Error fetching system settings: {e}")
-    return settings_dict
+        return {}
 
-def get_user_effective_roles(user_id, subject_id=None, department=None):
+def invalidate_settings_cache(*args):
+    """Forces the next get_settings() to re-read the table (called on every settings write)."""
+    if has_app_context():
+        current_app.extensions.pop(SETTINGS_CACHE_KEY, None)
+
+ADMIN_ROLES = ['SUPER_ADMIN', 'ADMIN']
+# Super Admin and Admin possess all sub-roles globally
+GLOBAL_SUB_ROLES = ['FACULTY', 'SUBJECT_EXPERT', 'HOD', 'COE', 'STAFF']
+
+class PermissionResolver:
     """
-    Returns a set of active roles (system + contextual) for a user.
+    Effective roles of one user. The user row and all of their currently active assignments are
+    loaded once into {subject_id: roles} / {department: roles} maps; every check after that is a
+    dictionary lookup without database access.
     """
-    u_uuid = to_uuid(user_id)
-    if not u_uuid:
-        return set()
+    def __init__(self, user_id):
+        self.user_id = to_uuid(user_id)
+        user = db.session.get(User, self.user_id) if self.user_id else None
+        self.exists = user is not None
+        self.raw_role = user.role if user else None
 
-    user = User.query.get(u_uuid)
-    if not user:
-        return set()
+        # System roles: SUPER_ADMIN, ADMIN, ACADEMIC. Treat legacy FACULTY and STAFF as ACADEMIC.
+        self.system_role = 'ACADEMIC' if self.raw_role in ['FACULTY', 'STAFF'] else self.raw_role
+        self.is_admin = self.raw_role in ADMIN_ROLES
 
-    # System roles: SUPER_ADMIN, ADMIN, ACADEMIC. Treat legacy FACULTY and STAFF as ACADEMIC.
-    system_role = user.role
-    if system_role in ['FACULTY', 'STAFF']:
-        system_role = 'ACADEMIC'
-    roles = {system_role}
-    
-    # Super Admin and Admin possess all sub-roles globally
-    if system_role in ['SUPER_ADMIN', 'ADMIN']:
-        roles.update(['FACULTY', 'SUBJECT_EXPERT', 'HOD', 'COE', 'STAFF'])
-        return roles
+        self.by_subject = {}
+        self.by_department = {}
+        self.all_contextual = set()
+        if self.exists and not self.is_admin:
+            now = datetime.utcnow()
+            assignments = (
+                db.session.query(FacultyAssignment.subject_id, FacultyAssignment.department, FacultyAssignment.role_type)
+                .filter(
+                    FacultyAssignment.user_id == self.user_id,
+                    FacultyAssignment.is_active == True,
+                    FacultyAssignment.valid_from <= now,
+                    FacultyAssignment.valid_until >= now
+                )
+                .all()
+            )
+            for subject_id, department, role_type in assignments:
+                if subject_id:
+                    self.by_subject.setdefault(subject_id, set()).add(role_type)
+                if department:
+                    self.by_department.setdefault(department, set()).add(role_type)
+                self.all_contextual.add(role_type)
+
+    def roles(self, subject_id=None, department=None):
+        if not self.exists:
+            return set()
 
-    # Query active contextual assignments
-    now = datetime.utcnow()
-    query = FacultyAssignment.query.filter(
-        FacultyAssignment.user_id == u_uuid,
-        FacultyAssignment.is_active == True,
-        FacultyAssignment.valid_from <= now,
-        FacultyAssignment.valid_until >= now
-    )
-
-    if subject_id:
-        s_uuid = to_uuid(subject_id)
-        if s_uuid:
-            # Check assignments either specific to this subject, or department-wide
+        roles = {self.system_role}
+        if self.is_admin:
+            roles.update(GLOBAL_SUB_ROLES)
+            return roles
+
+        if subject_id:
+            # Assignments either specific to this subject, or department-wide
+            roles |= self.by_subject.get(to_uuid(subject_id), set())
             if department:
-                query = query.filter(
-                    (FacultyAssignment.subject_id == s_uuid) | 
-                    (FacultyAssignment.department == department)
-                )
-            else:
-                query = query.filter(FacultyAssignment.subject_id == s_uuid)
-    elif department:
-        query = query.filter(FacultyAssignment.department == department)
+                roles |= self.by_department.get(department, set())
+        elif department:
+            roles |= self.by_department.get(department, set())
+        else:
+            roles |= self.all_contextual
+        return roles
 
-    assignments = query.all()
-    for assign in assignments:
-        roles.add(assign.role_type)
-        
-    return roles
+    def has_subject_permission(self, subject_id, required_roles):
+        if not self.exists:
+            return False
+        if self.is_admin:
+            return True
+        effective_roles = self.roles(subject_id=subject_id)
+        return any(role in effective_roles for role in required_roles)
 
-def has_subject_permission(user_id, subject_id, required_roles: list) -> bool:
+    def has_department_permission(self, department, required_roles):
+        if not self.exists:
+            return False
+        if self.is_admin:
+            return True
+        effective_roles = self.roles(department=department)
+        return any(role in effective_roles for role in required_roles)
+
+def get_permission_resolver(user_id):
     """
-    Checks if the user has at least one of the required roles (system or contextual) for the subject.
+    Resolver for the user, memoized on flask.g for the rest of the request (see clear_permission_cache).
+    Outside an app context a fresh resolver is built on every call.
     """
     u_uuid = to_uuid(user_id)
-    if not u_uuid:
-        return False
+    if not has_app_context():
+        return PermissionResolver(u_uuid)
+    resolvers = g.setdefault('permission_resolvers', {})
+    resolver = resolvers.get(u_uuid)
+    if resolver is None:
+        resolver = resolvers[u_uuid] = PermissionResolver(u_uuid)
+    return resolver
+
+def clear_permission_cache(*args):
+    """Drops the request's memoized resolvers; registered as a teardown and on assignment/user writes."""
+    if has_app_context():
+        g.pop('permission_resolvers', None)
+
+def get_user_effective_roles(user_id, subject_id=None, department=None):
+    """
+    Returns a set of active roles (system + contextual) for a user.
+    """
+    if not to_uuid(user_id):
+        return set()
+    return get_permission_resolver(user_id).roles(subject_id=subject_id, department=department)
 
-    user = User.query.get(u_uuid)
-    if not user:
+def has_subject_permission(user_id, subject_id, required_roles: list) -> bool:
+    """
+    Checks if the user has at least one of the required roles (system or contextual) for the subject.
+    """
+    if not to_uuid(user_id):
         return False
-        
-    if user.role in ['SUPER_ADMIN', 'ADMIN']:
-        return True
-
-    s_uuid = to_uuid(subject_id)
-    effective_roles = get_user_effective_roles(u_uuid, subject_id=s_uuid)
-    has_perm = any(role in effective_roles for role in required_roles)
-    
-    if has_perm:
-        return True
-        
-    # Legacy fallback removed for security: only context assignments govern permissions
-    pass
-            
-    return False
+    # Only context assignments govern permissions (legacy fallback removed for security)
+    return get_permission_resolver(user_id).has_subject_permission(subject_id, required_roles)
 
 def has_department_permission(user_id, department, required_roles: list) -> bool:
     """
     Checks if the user has at least one of the required roles (system or contextual) for the department.
     """
-    u_uuid = to_uuid(user_id)
-    if not u_uuid:
+    if not to_uuid(user_id):
         return False
+    return get_permission_resolver(user_id).has_department_permission(department, required_roles)
 
-    user = User.query.get(u_uuid)
-    if not user:
-        return False
-        
-    if user.role in ['SUPER_ADMIN', 'ADMIN']:
-        return True
+# Role or assignment writes invalidate the memoized resolvers of the current request
+for _model in (User, FacultyAssignment):
+    for _event in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event, clear_permission_cache)
 
-    effective_roles = get_user_effective_roles(u_uuid, department=department)
-    return any(role in effective_roles for role in required_roles)
+for _event in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(SystemSetting, _event, invalidate_settings_cache)
@@ -0,0 +1,49 @@
+import re
+from sqlalchemy import select, func, table, column, literal_column, and_
+from ..db import db
+from ..models import Question
+
+# Caps the number of terms taken from q= so a pasted paragraph cannot build a huge query
+MAX_SEARCH_TERMS = 16
+
+# Must match the expression of ix_questions_search_tsv exactly for Postgres to use the index
+SEARCH_TSVECTOR = "to_tsvector('english', coalesce(questions.search_text, ''))"
+
+questions_fts = table('questions_fts', column('rowid'), column('search_text'))
+questions_fts_keys = table('questions_fts_keys', column('docid'), column('question_id'))
+
+def search_terms(text):
+    """Lower-cased word tokens of a search string (punctuation and FTS operators dropped)."""
+    return re.findall(r'\w+', (text or '').lower())[:MAX_SEARCH_TERMS]
+
+def apply_text_search(query, text):
+    """
+    Restricts a Question query to questions whose search_text matches every term of `text`.
+
+    Returns (query, rank_order): rank_order is an ORDER BY expression putting the best
+    matches first, or None when the backend cannot rank. Postgres uses the GIN-indexed
+    tsvector, SQLite the questions_fts FTS5 table, anything else a plain ILIKE per term.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return query, None
+
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        vector = literal_column(SEARCH_TSVECTOR)
+        tsquery = func.plainto_tsquery('english', ' '.join(terms))
+        return query.filter(vector.op('@@')(tsquery)), func.ts_rank_cd(vector, tsquery).desc()
+
+    if dialect == 'sqlite':
+        # Quoted terms are matched literally; adjacent terms are ANDed by FTS5
+        match = ' '.join(f'"{term}"' for term in terms)
+        hits = (
+            select(questions_fts_keys.c.question_id, func.bm25(literal_column('questions_fts')).label('rank'))
+            .select_from(questions_fts.join(questions_fts_keys, questions_fts_keys.c.docid == questions_fts.c.rowid))
+            .where(literal_column('questions_fts').op('MATCH')(match))
+            .subquery('search_hits')
+        )
+        query = query.join(hits, hits.c.question_id == Question.id)
+        return query, hits.c.rank.asc()
+
+    return query.filter(and_(*(Question.search_text.ilike(f'%{term}%') for term in terms))), None
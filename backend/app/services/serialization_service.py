@@ -0,0 +1,57 @@
+import uuid
+from sqlalchemy.orm import joinedload, selectinload
+from ..db import db
+from ..models import Paper, Section, PaperQuestion, Question, Subject
+
+# Loader strategies for each serialization entry point.
+#
+# Question.to_dict / Section.to_dict / Paper.to_dict walk relationships that are lazy by
+# default. Endpoints that serialize collections attach the matching options below so a
+# response is produced in a fixed number of SELECTs regardless of how many rows it holds:
+#   - many-to-one hops (subject, academic year, semester, course outcome, creator) are
+#     joinedload-ed into the parent row
+#   - one-to-many hops (sections, paper_questions) are selectinload-ed, one IN query per level
+
+def question_serialization_options():
+    """Options that make Question.to_dict() free of lazy loads."""
+    return [
+        joinedload(Question.subject).joinedload(Subject.academic_year),
+        joinedload(Question.subject).joinedload(Subject.semester),
+        joinedload(Question.course_outcome),
+        joinedload(Question.creator),
+    ]
+
+def paper_serialization_options():
+    """Options for Paper.to_dict() and the docx/LaTeX exporters (paper -> sections -> questions)."""
+    return [
+        joinedload(Paper.subject).joinedload(Subject.academic_year),
+        joinedload(Paper.subject).joinedload(Subject.semester),
+        selectinload(Paper.sections)
+            .selectinload(Section.paper_questions)
+            .selectinload(PaperQuestion.question)
+            .options(*question_serialization_options()),
+    ]
+
+def load_paper(paper_id, options=None):
+    """Fetch a paper by id (string or UUID) with the given loader options; None if missing or malformed."""
+    try:
+        p_uuid = uuid.UUID(str(paper_id))
+    except ValueError:
+        return None
+    return db.session.get(Paper, p_uuid, options=options or [])
+
+def load_question(question_id):
+    try:
+        q_uuid = uuid.UUID(str(question_id))
+    except ValueError:
+        return None
+    return db.session.get(Question, q_uuid, options=question_serialization_options())
+
+def load_paper_questions(paper_id):
+    """All questions placed in a paper, fetched in one joined SELECT (for validation/finalize)."""
+    return (
+        Question.query
+        .join(PaperQuestion, PaperQuestion.question_id == Question.id)
+        .filter(PaperQuestion.paper_id == paper_id)
+        .all()
+    )
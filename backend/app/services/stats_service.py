@@ -0,0 +1,121 @@
+from datetime import datetime
+from sqlalchemy import event, func, insert, select, update, delete, inspect
+from ..db import db
+from ..models import Question, SubjectQuestionStat
+
+stats_table = SubjectQuestionStat.__table__
+
+def apply_question_count_delta(connection, subject_id, status, delta):
+    """
+    Adds `delta` to the (subject_id, status) counter using the given connection.
+    Uses a native upsert on PostgreSQL/SQLite so concurrent writers never race on the insert.
+    """
+    if not subject_id or not status or not delta:
+        return
+
+    now = datetime.utcnow()
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(stats_table).values(
+            subject_id=subject_id, status=status, question_count=delta, updated_at=now
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['subject_id', 'status'],
+            set_={
+                'question_count': stats_table.c.question_count + stmt.excluded.question_count,
+                'updated_at': now
+            }
+        )
+        connection.execute(stmt)
+        return
+
+    result = connection.execute(
+        update(stats_table)
+        .where(stats_table.c.subject_id == subject_id, stats_table.c.status == status)
+        .values(question_count=stats_table.c.question_count + delta, updated_at=now)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(stats_table).values(
+            subject_id=subject_id, status=status, question_count=delta, updated_at=now
+        ))
+
+def apply_question_count_deltas(connection, deltas):
+    """deltas: {(subject_id, status): delta}"""
+    for (subject_id, status), delta in deltas.items():
+        apply_question_count_delta(connection, subject_id, status, delta)
+
+def rebuild_subject_question_stats():
+    """Recomputes the whole rollup from one GROUP BY subject_id, status over questions."""
+    db.session.execute(delete(stats_table))
+    grouped = (
+        select(
+            Question.subject_id,
+            Question.status,
+            func.count(Question.id),
+            func.max(func.coalesce(Question.updated_at, Question.created_at))
+        )
+        .group_by(Question.subject_id, Question.status)
+    )
+    db.session.execute(
+        insert(stats_table).from_select(['subject_id', 'status', 'question_count', 'updated_at'], grouped)
+    )
+    db.session.commit()
+    return db.session.query(func.count()).select_from(stats_table).scalar()
+
+def get_subject_question_stats():
+    """
+    Single read of the rollup.
+    Returns {subject_id: {'total', 'approved', 'pendingReview', 'byStatus'}}.
+    """
+    stats = {}
+    for subject_id, status, count in db.session.execute(
+        select(stats_table.c.subject_id, stats_table.c.status, stats_table.c.question_count)
+    ):
+        entry = stats.setdefault(subject_id, {'total': 0, 'approved': 0, 'pendingReview': 0, 'byStatus': {}})
+        entry['byStatus'][status] = count
+        entry['total'] += count
+        if status == 'APPROVED':
+            entry['approved'] += count
+        elif status == 'PENDING_REVIEW':
+            entry['pendingReview'] += count
+    return stats
+
+# ── Incremental maintenance from the ORM unit of work ──
+# Core-level bulk statements bypass these hooks; such paths call apply_question_count_delta
+# themselves or finish with rebuild_subject_question_stats().
+
+def _after_insert(mapper, connection, target):
+    apply_question_count_delta(connection, target.subject_id, target.status, 1)
+
+def _after_delete(mapper, connection, target):
+    apply_question_count_delta(connection, target.subject_id, target.status, -1)
+
+def _after_update(mapper, connection, target):
+    state = inspect(target)
+    status_hist = state.attrs.status.history
+    subject_hist = state.attrs.subject_id.history
+    if not status_hist.has_changes() and not subject_hist.has_changes():
+        return
+
+    old_status = status_hist.deleted[0] if status_hist.deleted else target.status
+    old_subject = subject_hist.deleted[0] if subject_hist.deleted else target.subject_id
+    if (old_subject, old_status) == (target.subject_id, target.status):
+        return
+
+    apply_question_count_delta(connection, old_subject, old_status, -1)
+    apply_question_count_delta(connection, target.subject_id, target.status, 1)
+
+def _track_previous_value(target, value, oldvalue, initiator):
+    # Registered with active_history=True so the replaced value is always loaded,
+    # even when the attribute was expired before being set (e.g. after a commit).
+    return value
+
+event.listen(Question, 'after_insert', _after_insert)
+event.listen(Question, 'after_delete', _after_delete)
+event.listen(Question, 'after_update', _after_update)
+event.listen(Question.status, 'set', _track_previous_value, active_history=True, retval=True)
+event.listen(Question.subject_id, 'set', _track_previous_value, active_history=True, retval=True)
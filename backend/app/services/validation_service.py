@@ -1,5 +1,42 @@
 import math
 
+LOW_BLOOM_LEVELS = ("remember", "understand")
+MEDIUM_BLOOM_LEVELS = ("apply", "analyze")
+HIGH_BLOOM_LEVELS = ("evaluate", "create")
+
+def difficulty_minimums(total_q):
+    """Floors of the 40/30/30 rule for a paper of `total_q` questions: (min_easy, min_medium, min_hard)."""
+    return (
+        math.floor(total_q * 0.40),
+        math.floor(total_q * 0.30),
+        math.floor(total_q * 0.30)
+    )
+
+def question_difficulty(q):
+    return q.difficulty.upper() if q.difficulty else "MEDIUM"
+
+def question_bloom(q):
+    return q.bloom_level.lower() if q.bloom_level else "understand"
+
+def editor_data_marks(editor_data):
+    """Marks stored in editor_data (top level or under meta); None when missing or unparseable."""
+    ed = editor_data if isinstance(editor_data, dict) else {}
+    marks_str = ed.get('marks')
+    if not marks_str:
+        meta = ed.get('meta') or {}
+        marks_str = meta.get('marks') if isinstance(meta, dict) else None
+    try:
+        return float(marks_str) if marks_str else None
+    except (ValueError, TypeError):
+        return None
+
+def question_marks(q):
+    """The question's marks column (kept in sync with editor_data), else parsed from editor_data; 0 when missing."""
+    marks = getattr(q, 'marks', None)
+    if marks is None:
+        marks = editor_data_marks(q.editor_data)
+    return marks or 0
+
 def validate_question_paper(questions, total_marks):
     """
     Validates a question paper based on the following constraints:
@@ -39,34 +76,22 @@ def validate_question_paper(questions, total_marks):
         seen_ids.add(q.id)
         
         # Check difficulty
-        diff = q.difficulty.upper() if q.difficulty else "MEDIUM"
+        diff = question_difficulty(q)
         if diff == "EASY": easy_count += 1
         elif diff == "MEDIUM": medium_count += 1
         elif diff == "HARD": hard_count += 1
         
         # Check Bloom
-        bloom = q.bloom_level.lower() if q.bloom_level else "understand"
-        if bloom in ["remember", "understand"]: has_low_bloom = True
-        if bloom in ["apply", "analyze"]: has_medium_bloom = True
-        if bloom in ["evaluate", "create"]: has_high_bloom = True
+        bloom = question_bloom(q)
+        if bloom in LOW_BLOOM_LEVELS: has_low_bloom = True
+        if bloom in MEDIUM_BLOOM_LEVELS: has_medium_bloom = True
+        if bloom in HIGH_BLOOM_LEVELS: has_high_bloom = True
         
         # Check Marks
-        ed = q.editor_data or {}
-        marks_str = ed.get('marks')
-        if not marks_str:
-            meta = ed.get('meta', {})
-            marks_str = meta.get('marks')
-            
-        try:
-            m = float(marks_str) if marks_str else 0
-            current_total_marks += m
-        except ValueError:
-            pass
+        current_total_marks += question_marks(q)
 
     # Threshold checks using math.floor
-    min_easy = math.floor(total_q * 0.40)
-    min_medium = math.floor(total_q * 0.30)
-    min_hard = math.floor(total_q * 0.30)
+    min_easy, min_medium, min_hard = difficulty_minimums(total_q)
     
     if easy_count < min_easy:
         errors.append(f"Easy questions insufficient: need {min_easy}, got {easy_count}")
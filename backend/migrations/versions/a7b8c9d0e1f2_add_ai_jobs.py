@@ -0,0 +1,40 @@
+"""add ai_jobs for background AI generation
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a7b8c9d0e1f2'
+down_revision = 'f6a7b8c9d0e1'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('ai_jobs',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('user_id', sa.Uuid(), nullable=False),
+        sa.Column('job_type', sa.String(length=30), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('ai_log_id', sa.Uuid(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['ai_log_id'], ['ai_logs.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ai_jobs_status', 'ai_jobs', ['status'], unique=False)
+    op.create_index('ix_ai_jobs_user_id', 'ai_jobs', ['user_id'], unique=False)
+
+def downgrade():
+    op.drop_index('ix_ai_jobs_user_id', table_name='ai_jobs')
+    op.drop_index('ix_ai_jobs_status', table_name='ai_jobs')
+    op.drop_table('ai_jobs')
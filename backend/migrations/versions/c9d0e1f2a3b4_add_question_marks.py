@@ -0,0 +1,68 @@
+"""add typed questions.marks column synced from editor_data
+
+Revision ID: c9d0e1f2a3b4
+Revises: b8c9d0e1f2a3
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+import json
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c9d0e1f2a3b4'
+down_revision = 'b8c9d0e1f2a3'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+def _marks(editor_data):
+    # Same rule as validation_service.editor_data_marks at the time of this migration
+    if isinstance(editor_data, str):
+        try:
+            editor_data = json.loads(editor_data)
+        except ValueError:
+            return None
+    ed = editor_data if isinstance(editor_data, dict) else {}
+    marks_str = ed.get('marks')
+    if not marks_str:
+        meta = ed.get('meta') or {}
+        marks_str = meta.get('marks') if isinstance(meta, dict) else None
+    try:
+        return float(marks_str) if marks_str else None
+    except (ValueError, TypeError):
+        return None
+
+def _backfill_in_python(bind):
+    questions = sa.table('questions', sa.column('id', sa.Uuid()), sa.column('editor_data', sa.JSON()), sa.column('marks', sa.Float()))
+    last_id = None
+    while True:
+        query = sa.select(questions.c.id, questions.c.editor_data).order_by(questions.c.id).limit(BATCH_SIZE)
+        if last_id is not None:
+            query = query.where(questions.c.id > last_id)
+        rows = bind.execute(query).fetchall()
+        if not rows:
+            break
+        changes = [{'b_id': row.id, 'b_marks': _marks(row.editor_data)} for row in rows]
+        changes = [c for c in changes if c['b_marks'] is not None]
+        if changes:
+            bind.execute(
+                questions.update().where(questions.c.id == sa.bindparam('b_id')).values(marks=sa.bindparam('b_marks')),
+                changes
+            )
+        last_id = rows[-1].id
+
+def upgrade():
+    op.add_column('questions', sa.Column('marks', sa.Float(), nullable=True))
+
+    # Same keyset Python backfill on every dialect, so the column agrees exactly with what
+    # Question's @validates('editor_data') writes (a SQL CASE/regex cannot mirror float() parsing)
+    _backfill_in_python(op.get_bind())
+
+    op.create_index('ix_questions_subject_status_difficulty_marks', 'questions',
+                    ['subject_id', 'status', 'difficulty', 'marks'], unique=False)
+
+def downgrade():
+    op.drop_index('ix_questions_subject_status_difficulty_marks', table_name='questions')
+    op.drop_column('questions', 'marks')
@@ -0,0 +1,43 @@
+"""add composite and partial indexes for the question bank query paths
+
+Revision ID: d0e1f2a3b4c5
+Revises: c9d0e1f2a3b4
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd0e1f2a3b4c5'
+down_revision = 'c9d0e1f2a3b4'
+branch_labels = None
+depends_on = None
+
+APPROVED_ONLY = sa.text("status = 'APPROVED'")
+
+def upgrade():
+    # (subject_id, status) counts are already served by ix_questions_subject_status_difficulty_marks
+    op.create_index('ix_questions_subject_created', 'questions', ['subject_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_questions_creator_created', 'questions', ['creator_id', 'created_at'], unique=False)
+    op.create_index('ix_questions_approved_subject_marks', 'questions', ['subject_id', 'marks'], unique=False,
+                    postgresql_where=APPROVED_ONLY, sqlite_where=APPROVED_ONLY)
+    op.create_index('ix_papers_subject_created', 'papers', ['subject_id', 'created_at'], unique=False)
+    op.create_index('ix_sections_paper_order', 'sections', ['paper_id', 'order_index'], unique=False)
+    op.create_index('ix_paper_questions_section_order', 'paper_questions', ['section_id', 'order_index'], unique=False)
+    op.create_index('ix_paper_questions_question_id', 'paper_questions', ['question_id'], unique=False)
+    op.create_index('ix_question_usages_subject_used', 'question_usages', ['subject_id', 'used_at'], unique=False)
+    op.create_index('ix_question_usages_paper_id', 'question_usages', ['paper_id'], unique=False)
+    op.create_index('ix_question_review_steps_question_id', 'question_review_steps', ['question_id'], unique=False)
+
+def downgrade():
+    op.drop_index('ix_question_review_steps_question_id', table_name='question_review_steps')
+    op.drop_index('ix_question_usages_paper_id', table_name='question_usages')
+    op.drop_index('ix_question_usages_subject_used', table_name='question_usages')
+    op.drop_index('ix_paper_questions_question_id', table_name='paper_questions')
+    op.drop_index('ix_paper_questions_section_order', table_name='paper_questions')
+    op.drop_index('ix_sections_paper_order', table_name='sections')
+    op.drop_index('ix_papers_subject_created', table_name='papers')
+    op.drop_index('ix_questions_approved_subject_marks', table_name='questions')
+    op.drop_index('ix_questions_creator_created', table_name='questions')
+    op.drop_index('ix_questions_subject_created', table_name='questions')
@@ -0,0 +1,34 @@
+"""add subject_question_stats rollup
+
+Revision ID: d4e5f6a7b8c9
+Revises: c3d4e5f6a7b8
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd4e5f6a7b8c9'
+down_revision = 'c3d4e5f6a7b8'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('subject_question_stats',
+        sa.Column('subject_id', sa.Uuid(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('question_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('subject_id', 'status')
+    )
+
+    # Backfill from the existing bank in a single GROUP BY
+    op.execute(
+        "INSERT INTO subject_question_stats (subject_id, status, question_count, updated_at) "
+        "SELECT subject_id, status, COUNT(*), MAX(COALESCE(updated_at, created_at)) "
+        "FROM questions GROUP BY subject_id, status"
+    )
+
+def downgrade():
+    op.drop_table('subject_question_stats')
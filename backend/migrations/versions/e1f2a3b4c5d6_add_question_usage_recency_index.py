@@ -0,0 +1,20 @@
+"""add (question_id, used_at) index for the recently used anti-join
+
+Revision ID: e1f2a3b4c5d6
+Revises: d0e1f2a3b4c5
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'e1f2a3b4c5d6'
+down_revision = 'd0e1f2a3b4c5'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index('ix_question_usages_question_used', 'question_usages', ['question_id', 'used_at'], unique=False)
+
+def downgrade():
+    op.drop_index('ix_question_usages_question_used', table_name='question_usages')
@@ -0,0 +1,33 @@
+"""add question_embeddings index
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e5f6a7b8c9d0'
+down_revision = 'd4e5f6a7b8c9'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Rows are filled on save and lazily by the first duplicate check per subject
+    op.create_table('question_embeddings',
+        sa.Column('question_id', sa.Uuid(), nullable=False),
+        sa.Column('model_key', sa.String(length=150), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('dimensions', sa.Integer(), nullable=False),
+        sa.Column('vector', sa.LargeBinary(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('question_id')
+    )
+    op.create_index('ix_question_embeddings_model_key', 'question_embeddings', ['model_key'], unique=False)
+
+def downgrade():
+    op.drop_index('ix_question_embeddings_model_key', table_name='question_embeddings')
+    op.drop_table('question_embeddings')
@@ -0,0 +1,103 @@
+"""add questions.search_text with full-text indexes (GIN on Postgres, FTS5 on SQLite)
+
+Revision ID: f2a3b4c5d6e7
+Revises: e1f2a3b4c5d6
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+import json
+import re
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f2a3b4c5d6e7'
+down_revision = 'e1f2a3b4c5d6'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# Same statements as models.QUESTIONS_FTS_DDL at the time of this migration
+QUESTIONS_FTS_DDL = (
+    "CREATE TABLE questions_fts_keys (docid INTEGER PRIMARY KEY, question_id CHAR(32) NOT NULL UNIQUE)",
+    "CREATE VIRTUAL TABLE questions_fts USING fts5(search_text, content='', tokenize='porter unicode61')",
+    "CREATE TRIGGER questions_fts_ai AFTER INSERT ON questions BEGIN "
+    "INSERT INTO questions_fts_keys(question_id) VALUES (new.id); "
+    "INSERT INTO questions_fts(rowid, search_text) "
+    "SELECT docid, new.search_text FROM questions_fts_keys WHERE question_id = new.id; END",
+    "CREATE TRIGGER questions_fts_ad AFTER DELETE ON questions BEGIN "
+    "INSERT INTO questions_fts(questions_fts, rowid, search_text) "
+    "SELECT 'delete', docid, old.search_text FROM questions_fts_keys WHERE question_id = old.id; "
+    "DELETE FROM questions_fts_keys WHERE question_id = old.id; END",
+    "CREATE TRIGGER questions_fts_au AFTER UPDATE OF search_text ON questions BEGIN "
+    "INSERT INTO questions_fts(questions_fts, rowid, search_text) "
+    "SELECT 'delete', docid, old.search_text FROM questions_fts_keys WHERE question_id = old.id; "
+    "INSERT INTO questions_fts(rowid, search_text) "
+    "SELECT docid, new.search_text FROM questions_fts_keys WHERE question_id = new.id; END",
+)
+
+def _search_text(editor_data):
+    # Same rule as bloom_service.extract_text_from_editor_data at the time of this migration
+    if isinstance(editor_data, str):
+        try:
+            editor_data = json.loads(editor_data)
+        except ValueError:
+            return ""
+    if not editor_data or not isinstance(editor_data, dict):
+        return ""
+    parts = []
+    for block in editor_data.get("blocks", []):
+        text = block.get("data", {}).get("text", "")
+        if text:
+            parts.append(re.sub(r'<[^>]+>', ' ', text))
+    return " ".join(parts)
+
+def _backfill(bind):
+    questions = sa.table('questions', sa.column('id', sa.Uuid()), sa.column('editor_data', sa.JSON()),
+                         sa.column('search_text', sa.Text()))
+    last_id = None
+    while True:
+        query = sa.select(questions.c.id, questions.c.editor_data).order_by(questions.c.id).limit(BATCH_SIZE)
+        if last_id is not None:
+            query = query.where(questions.c.id > last_id)
+        rows = bind.execute(query).fetchall()
+        if not rows:
+            break
+        bind.execute(
+            questions.update().where(questions.c.id == sa.bindparam('b_id')).values(search_text=sa.bindparam('b_text')),
+            [{'b_id': row.id, 'b_text': _search_text(row.editor_data)} for row in rows]
+        )
+        last_id = rows[-1].id
+
+def upgrade():
+    op.add_column('questions', sa.Column('search_text', sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+    _backfill(bind)
+
+    if bind.dialect.name == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index('ix_questions_search_tsv', 'questions',
+                        [sa.text("to_tsvector('english', coalesce(search_text, ''))")],
+                        unique=False, postgresql_using='gin')
+        op.create_index('ix_users_name_trgm', 'users', ['name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    elif bind.dialect.name == 'sqlite':
+        for statement in QUESTIONS_FTS_DDL:
+            op.execute(statement)
+        op.execute("INSERT INTO questions_fts_keys(question_id) SELECT id FROM questions")
+        op.execute("INSERT INTO questions_fts(rowid, search_text) SELECT k.docid, q.search_text "
+                   "FROM questions_fts_keys k JOIN questions q ON q.id = k.question_id")
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.drop_index('ix_users_name_trgm', table_name='users')
+        op.drop_index('ix_questions_search_tsv', table_name='questions')
+    elif bind.dialect.name == 'sqlite':
+        for trigger in ('questions_fts_ai', 'questions_fts_ad', 'questions_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS questions_fts")
+        op.execute("DROP TABLE IF EXISTS questions_fts_keys")
+    op.drop_column('questions', 'search_text')
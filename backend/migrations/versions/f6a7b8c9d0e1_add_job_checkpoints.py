@@ -0,0 +1,30 @@
+"""add job_checkpoints for resumable maintenance jobs
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f6a7b8c9d0e1'
+down_revision = 'e5f6a7b8c9d0'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('job_checkpoints',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('last_key', sa.String(length=64), nullable=True),
+        sa.Column('processed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+def downgrade():
+    op.drop_table('job_checkpoints')
@@ -1,4 +1,6 @@
 import pytest
+from contextlib import contextmanager
+from sqlalchemy import event
 from app import create_app, db
 from app.config import Config
 
@@ -6,6 +8,11 @@ class TestConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'  # Use in-memory SQLite for testing
     SQLALCHEMY_ENGINE_OPTIONS = {}
+    EMBED_QUESTIONS_ON_SAVE = False
+    CAPTCHA_STORE_BACKEND = 'memory'
+    CAPTCHA_POOL_SIZE = 0
+    AI_JOB_WORKERS = 0
+    EMBEDDING_INDEX_WORKERS = 0
 
 @pytest.fixture
 def app():
@@ -50,3 +57,28 @@ def authenticated_admin_client(app, client):
         
     client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
     return client
+
+@pytest.fixture
+def assert_max_queries(app):
+    """
+    Context manager asserting that the wrapped block issues at most `limit` SQL statements.
+    Yields the list of captured statements so tests can also compare counts.
+    """
+    @contextmanager
+    def _assert_max_queries(limit):
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', _record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', _record)
+        assert len(statements) <= limit, (
+            f"Expected at most {limit} queries, got {len(statements)}:\n" + "\n".join(statements)
+        )
+
+    return _assert_max_queries
@@ -0,0 +1,123 @@
+import uuid
+from app import db
+from app.models import Subject, AcademicYear, Semester, CourseOutcome, SystemSetting, AIJob, AILog, Question
+
+def _setup_subject():
+    ay = AcademicYear(label='2024-2025', start_year=2024, end_year=2025)
+    sem = Semester(number=5)
+    db.session.add_all([ay, sem])
+    db.session.flush()
+    subject = Subject(code='CS502', name='Computer Networks', semester_id=sem.id, academic_year_id=ay.id)
+    db.session.add(subject)
+    db.session.flush()
+    co = CourseOutcome(subject_id=subject.id, co_code='CO1', description='Describe protocols')
+    db.session.add_all([co, SystemSetting(key='active_ai_provider', value='STUB')])
+    db.session.commit()
+    return str(subject.id), str(co.id)
+
+def test_paper_job_runs_and_links_ai_log(app, authenticated_admin_client):
+    subject_id, co_id = _setup_subject()
+    resp = authenticated_admin_client.post('/api/ai/jobs', json={
+        "type": "paper",
+        "subjectId": subject_id,
+        "courseOutcomeIds": [co_id],
+        "marksDistribution": {"short": 2, "long": 1}
+    })
+    assert resp.status_code == 202
+    job_id = resp.get_json()['jobId']
+
+    job = authenticated_admin_client.get(f'/api/ai/jobs/{job_id}?wait=5').get_json()
+    assert job['status'] == 'SUCCEEDED'
+    assert len(job['result']['sectionA']) == 2 and len(job['result']['sectionB']) == 1
+    assert job['result']['sectionA'][0]['courseOutcomeId'] == co_id
+    log = db.session.get(AILog, uuid.UUID(job['aiLogId']))
+    assert 'Computer Networks' in log.input_prompt
+
+def test_question_job_saves_draft(app, authenticated_admin_client):
+    subject_id, _ = _setup_subject()
+    resp = authenticated_admin_client.post('/api/ai/jobs', json={
+        "type": "QUESTION", "subjectId": subject_id, "topic": "TCP congestion control", "marks": 5
+    })
+    assert resp.status_code == 202
+    job = authenticated_admin_client.get(f"/api/ai/jobs/{resp.get_json()['jobId']}").get_json()
+    assert job['status'] == 'SUCCEEDED'
+    assert job['result']['question']['status'] == 'DRAFT'
+    assert Question.query.count() == 1
+
+def test_job_validation_errors_are_synchronous(app, authenticated_admin_client):
+    subject_id, _ = _setup_subject()
+    assert authenticated_admin_client.post('/api/ai/jobs', json={"type": "ESSAY"}).status_code == 400
+    resp = authenticated_admin_client.post('/api/ai/jobs', json={"type": "QUESTION", "subjectId": subject_id})
+    assert resp.status_code == 400
+    assert AIJob.query.count() == 0
+    assert authenticated_admin_client.get('/api/ai/jobs/00000000-0000-0000-0000-000000000000').status_code == 404
+
+def test_jobs_run_on_worker_threads(app, authenticated_admin_client):
+    app.config['AI_JOB_WORKERS'] = 2
+    subject_id, co_id = _setup_subject()
+    resp = authenticated_admin_client.post('/api/ai/jobs', json={
+        "type": "PAPER", "subjectId": subject_id, "courseOutcomeIds": [co_id]
+    })
+    assert resp.status_code == 202
+    job = authenticated_admin_client.get(f"/api/ai/jobs/{resp.get_json()['jobId']}?wait=5").get_json()
+    assert job['status'] == 'SUCCEEDED'
+    assert job['result']['totalQuestions'] == 8
+
+def test_other_users_job_is_rejected_before_waiting(app, authenticated_admin_client):
+    import time
+    from flask_jwt_extended import create_access_token
+    from app.models import User
+    owner = User.query.filter_by(email='admin_test@test.com').first()
+    other = User(name='Faculty', email='fac_jobs@test.com', password_hash='x', role='FACULTY', is_approved=True)
+    job = AIJob(user_id=owner.id, job_type='PAPER', status='QUEUED', payload={})
+    db.session.add_all([other, job])
+    db.session.commit()
+
+    token = create_access_token(identity=str(other.id), additional_claims={'role': 'FACULTY'})
+    started = time.monotonic()
+    resp = authenticated_admin_client.get(f'/api/ai/jobs/{job.id}?wait=5', headers={'Authorization': f'Bearer {token}'})
+    assert resp.status_code == 403
+    assert time.monotonic() - started < 1
+
+def test_stale_jobs_are_reaped_and_queue_is_capped(app, authenticated_admin_client, runner):
+    from datetime import datetime, timedelta
+    from app.models import User
+    from app.services.ai_job_service import reap_stale_jobs
+    owner = User.query.filter_by(email='admin_test@test.com').first()
+    long_ago = datetime.utcnow() - timedelta(hours=2)
+    stale_queued = AIJob(user_id=owner.id, job_type='PAPER', status='QUEUED', payload={}, created_at=long_ago)
+    stale_running = AIJob(user_id=owner.id, job_type='PAPER', status='RUNNING', payload={},
+                          created_at=long_ago, started_at=long_ago)
+    fresh = AIJob(user_id=owner.id, job_type='PAPER', status='QUEUED', payload={})
+    db.session.add_all([stale_queued, stale_running, fresh])
+    db.session.commit()
+
+    assert reap_stale_jobs() == 2
+    db.session.expire_all()
+    assert [stale_queued.status, stale_running.status, fresh.status] == ['FAILED', 'FAILED', 'QUEUED']
+    assert 'worker stopped' in stale_running.error
+    assert 'Marked 0 stale' in runner.invoke(args=['reap-ai-jobs']).output
+
+    app.config['AI_JOB_MAX_PENDING'] = 1
+    subject_id, _ = _setup_subject()
+    resp = authenticated_admin_client.post('/api/ai/jobs', json={
+        "type": "QUESTION", "subjectId": subject_id, "topic": "Routing", "marks": 5
+    })
+    assert resp.status_code == 429
+    assert AIJob.query.count() == 3
+
+def test_long_poll_is_capped_and_hints_retry(app, authenticated_admin_client, monkeypatch):
+    import time
+    from app.models import User
+    from app.services import ai_job_service
+    monkeypatch.setattr(ai_job_service, 'MAX_WAIT_SECONDS', 0.2)
+    owner = User.query.filter_by(email='admin_test@test.com').first()
+    job = AIJob(user_id=owner.id, job_type='PAPER', status='QUEUED', payload={})
+    db.session.add(job)
+    db.session.commit()
+
+    started = time.monotonic()
+    resp = authenticated_admin_client.get(f'/api/ai/jobs/{job.id}?wait=30')
+    assert time.monotonic() - started < 2
+    assert resp.get_json()['status'] == 'QUEUED'
+    assert resp.headers['Retry-After'] == str(ai_job_service.RETRY_AFTER_SECONDS)
@@ -0,0 +1,64 @@
+import json
+from unittest.mock import MagicMock, patch
+from app import db
+from app.models import Subject, AcademicYear, Semester, CourseOutcome
+from app.services.ai_generation_service import PaperStreamParser
+
+def _events(body):
+    events = []
+    for block in body.strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+def test_parser_emits_each_question_once_complete():
+    text = '```json\n{"sectionA": [{"text": "What is {TCP}? \\"quoted\\"", "marks": 5}, {"text": "B", "marks": 2}],' \
+           ' "sectionB": [{"text": "Design [x]", "marks": 10, "coCode": "CO1"}], "totalQuestions": 3}\n```'
+    parser = PaperStreamParser()
+    seen = []
+    for i in range(0, len(text), 7):
+        seen.extend(parser.feed(text[i:i + 7]))
+    assert [s for s, _ in seen] == ['sectionA', 'sectionA', 'sectionB']
+    assert seen[0][1]['text'] == 'What is {TCP}? "quoted"'
+    assert seen[2][1]['coCode'] == 'CO1'
+
+def test_generate_paper_stream_over_sse(app, authenticated_admin_client):
+    ay = AcademicYear(label='2024-2025', start_year=2024, end_year=2025)
+    sem = Semester(number=5)
+    db.session.add_all([ay, sem])
+    db.session.flush()
+    subject = Subject(code='CS502', name='Computer Networks', semester_id=sem.id, academic_year_id=ay.id)
+    db.session.add(subject)
+    db.session.flush()
+    co = CourseOutcome(subject_id=subject.id, co_code='CO1', description='Describe protocols')
+    db.session.add(co)
+    db.session.commit()
+
+    completion = json.dumps({
+        "sectionA": [{"text": "What is TCP?", "marks": 5, "coCode": "CO1"}],
+        "sectionB": [{"text": "Design a socket server.", "marks": 10, "coCode": "CO9"}],
+        "totalQuestions": 2
+    })
+    chunks = []
+    for i in range(0, len(completion), 10):
+        chunk = MagicMock()
+        chunk.choices = [MagicMock()]
+        chunk.choices[0].delta.content = completion[i:i + 10]
+        chunks.append(chunk)
+
+    with patch('app.routes.ai.InferenceClient') as client_class:
+        client_class.return_value.chat_completion.return_value = iter(chunks)
+        resp = authenticated_admin_client.post('/admin/ai/generate-paper/stream', json={
+            "subjectId": str(subject.id), "courseOutcomeIds": [str(co.id)],
+            "marksDistribution": {"short": 1, "long": 1}
+        })
+        assert resp.status_code == 200
+        assert resp.mimetype == 'text/event-stream'
+        events = _events(resp.get_data(as_text=True))
+        assert client_class.return_value.chat_completion.call_args[1]['stream'] is True
+
+    assert [e for e, _ in events] == ['question', 'question', 'done']
+    assert events[0][1]['section'] == 'sectionA' and events[0][1]['question']['courseOutcomeId'] == str(co.id)
+    # Unknown CO codes fall back to the first requested outcome, as in generate-paper
+    assert events[1][1]['question']['courseOutcomeId'] == str(co.id)
+    assert events[2][1]['totalQuestions'] == 2
@@ -0,0 +1,151 @@
+from unittest.mock import MagicMock, patch
+from app.services.ai_provider import get_active_ai_provider, provider_metrics, OnPremiseProvider, GeminiProvider
+
+def _response(payload):
+    resp = MagicMock()
+    resp.status_code = 200
+    resp.json.return_value = payload
+    return resp
+
+def test_registry_reuses_provider_and_session(app):
+    settings = {"active_ai_provider": "ON_PREMISE", "ai_endpoint_url": "http://pool-test:8000/v1"}
+    provider = get_active_ai_provider(settings)
+    assert isinstance(provider, OnPremiseProvider)
+    assert get_active_ai_provider(dict(settings)) is provider
+    assert get_active_ai_provider({**settings, "ai_endpoint_url": "http://other:8000/v1"}) is not provider
+
+    session = provider.session
+    assert session.get_adapter('http://pool-test:8000')._pool_maxsize >= 1
+    provider_metrics.reset()
+    with patch.object(session, 'post', return_value=_response({"data": [{"embedding": [1.0, 0.0]}]})) as post:
+        provider.get_embeddings(["a"])
+        provider.get_embeddings(["b"])
+    assert post.call_count == 2
+    assert provider.session is session
+
+    stats = provider_metrics.snapshot()['ON_PREMISE']['embed']
+    assert stats['calls'] == 2 and stats['errors'] == 0
+
+def test_huggingface_client_is_cached_per_model(app):
+    provider = get_active_ai_provider({"active_ai_provider": "HUGGING_FACE"})
+    output = MagicMock()
+    output.choices = [MagicMock()]
+    output.choices[0].message.content = '{"text": "Q"}'
+    with patch('app.routes.ai.InferenceClient') as client_class:
+        client_class.return_value.chat_completion.return_value = output
+        provider.generate_questions("s", "u")
+        provider.generate_questions("s", "u")
+    assert client_class.call_count == 1
+
+def test_provider_metrics_endpoint(app, authenticated_admin_client):
+    provider_metrics.reset()
+    provider_metrics.record('STUB', 'generate', 0.25)
+    resp = authenticated_admin_client.get('/admin/ai-provider-metrics')
+    assert resp.status_code == 200
+    assert resp.get_json()['STUB']['generate']['avgMs'] == 250.0
+
+def test_on_premise_embeddings_are_batched_with_chunk_fallback(app):
+    provider = get_active_ai_provider({"active_ai_provider": "ON_PREMISE", "ai_endpoint_url": "http://batch-test:8000/v1"})
+    calls = []
+
+    def fake_post(url, json=None, **kwargs):
+        calls.append(json['input'])
+        if json['input'] == ['c', 'd']:
+            return MagicMock(status_code=500, text='overloaded')
+        # Items may come back out of order; the index field restores input order
+        data = [{"index": i, "embedding": [float(ord(t))]} for i, t in enumerate(json['input'])]
+        return _response({"data": list(reversed(data))})
+
+    with patch('app.services.ai_provider.EMBED_BATCH_SIZE', 2), \
+            patch.object(provider.session, 'post', side_effect=fake_post):
+        vectors = provider.get_embeddings(['a', 'b', 'c', 'd', 'e'])
+
+    assert vectors == [[97.0], [98.0], [99.0], [100.0], [101.0]]
+    # Three batch calls, then only the failed chunk is retried text by text
+    assert sorted(calls, key=str) == sorted([['a', 'b'], ['c', 'd'], ['e'], ['c'], ['d']], key=str)
+
+def test_gemini_uses_batch_endpoint(app):
+    provider = GeminiProvider(api_key='test-key')
+    with patch.object(provider.session, 'post', return_value=_response(
+            {"embeddings": [{"values": [1.0]}, {"values": [2.0]}]})) as post:
+        assert provider.get_embeddings(['x', 'y']) == [[1.0], [2.0]]
+    url = post.call_args[0][0]
+    assert ':batchEmbedContents' in url
+    assert len(post.call_args[1]['json']['requests']) == 2
+
+def test_embedding_cache_serves_repeat_texts(app):
+    from app.models import EmbeddingCacheEntry
+    from app.services.embedding_service import get_embedding_cache
+    provider = get_active_ai_provider({"active_ai_provider": "ON_PREMISE", "ai_endpoint_url": "http://cache-test:8000/v1"})
+
+    def fake_post(url, json=None, **kwargs):
+        vectors = [[0.0] if t == 'blank' else [float(len(t))] for t in json['input']]
+        return _response({"data": [{"index": i, "embedding": v} for i, v in enumerate(vectors)]})
+
+    with patch.object(provider.session, 'post', side_effect=fake_post) as post:
+        assert provider.get_embeddings(['alpha', 'beta', 'alpha', 'blank']) == [[5.0], [4.0], [5.0], [0.0]]
+        assert post.call_args[1]['json']['input'] == ['alpha', 'beta', 'blank']
+        # Whitespace differences hash the same; zero vectors were not cached
+        assert provider.get_embeddings(['  alpha ', 'beta', 'blank']) == [[5.0], [4.0], [0.0]]
+        assert post.call_args[1]['json']['input'] == ['blank']
+    assert EmbeddingCacheEntry.query.count() == 2
+
+    # A fresh process (empty LRU) still finds the vectors in the table
+    get_embedding_cache().clear()
+    with patch.object(provider.session, 'post', side_effect=fake_post) as post:
+        assert provider.get_embeddings(['beta']) == [[4.0]]
+        assert post.call_count == 0
+    assert get_embedding_cache().metrics()['dbHits'] == 1
+
+def test_response_cache_reuses_identical_paper_prompts(app, authenticated_admin_client):
+    from app import db
+    from app.models import Subject, AcademicYear, Semester, CourseOutcome, SystemSetting
+    from app.services.ai_provider import StubProvider
+    app.config['AI_RESPONSE_CACHE_TTL'] = 60
+
+    ay = AcademicYear(label='2024-2025', start_year=2024, end_year=2025)
+    sem = Semester(number=5)
+    db.session.add_all([ay, sem])
+    db.session.flush()
+    subject = Subject(code='CS502', name='Computer Networks', semester_id=sem.id, academic_year_id=ay.id)
+    db.session.add(subject)
+    db.session.flush()
+    co = CourseOutcome(subject_id=subject.id, co_code='CO1', description='Describe protocols')
+    db.session.add_all([co, SystemSetting(key='active_ai_provider', value='STUB')])
+    db.session.commit()
+    payload = {"subjectId": str(subject.id), "courseOutcomeIds": [str(co.id)], "marksDistribution": {"short": 1, "long": 1}}
+
+    with patch.object(StubProvider, '_generate', autospec=True, side_effect=StubProvider._generate) as generate:
+        first = authenticated_admin_client.post('/admin/ai/generate-paper', json=payload)
+        second = authenticated_admin_client.post('/admin/ai/generate-paper', json=payload)
+        assert generate.call_count == 1
+        assert first.get_json() == second.get_json()
+
+        authenticated_admin_client.post('/admin/ai/generate-paper', json={**payload, "fresh": True})
+        authenticated_admin_client.post('/admin/ai/generate-paper', json={**payload, "difficulty": "hard"})
+        assert generate.call_count == 3
+
+def test_response_cache_skips_invalid_completions_and_keys_on_endpoint(app):
+    import json
+    import pytest
+    app.config['AI_RESPONSE_CACHE_TTL'] = 60
+    provider = OnPremiseProvider(endpoint_url="http://gpu-a:8000/v1")
+
+    with patch.object(OnPremiseProvider, '_generate', side_effect=['{"sectionA": [', '{"sectionA": []}']) as generate:
+        with pytest.raises(ValueError):
+            provider.generate_questions("s", "u", use_cache=True, validate=json.loads)
+        assert provider.generate_questions("s", "u", use_cache=True, validate=json.loads) == '{"sectionA": []}'
+        assert provider.generate_questions("s", "u", use_cache=True, validate=json.loads) == '{"sectionA": []}'
+        assert generate.call_count == 2
+
+    other = OnPremiseProvider(endpoint_url="http://gpu-b:8000/v1")
+    assert other.response_cache_key("s", "u") != provider.response_cache_key("s", "u")
+
+def test_stub_provider_requires_testing_or_flag(app):
+    from app.services.ai_provider import StubProvider, HuggingFaceProvider, provider_registry
+    app.config['TESTING'] = False
+    provider_registry.clear()
+    assert isinstance(provider_registry.get('STUB'), HuggingFaceProvider)
+    app.config['AI_STUB_ENABLED'] = True
+    assert isinstance(provider_registry.get('STUB'), StubProvider)
+    provider_registry.clear()
@@ -0,0 +1,55 @@
+from app.models import User, Subject, AcademicYear, Semester, Question, JobCheckpoint, db
+from app.services.backfill_service import run_bloom_backfill, BLOOM_BACKFILL_JOB
+
+def _question(subject, admin, text, bloom_level, difficulty):
+    return Question(subject_id=subject.id, creator_id=admin.id, bloom_level=bloom_level, difficulty=difficulty,
+                    editor_data={'blocks': [{'type': 'paragraph', 'data': {'text': text}}],
+                                 'meta': {'bloomLevel': bloom_level, 'difficulty': difficulty}})
+
+def test_bloom_backfill_chunks_and_resumes(app, authenticated_admin_client):
+    with app.app_context():
+        admin = User.query.filter_by(email='admin_test@test.com').first()
+        ay = AcademicYear(label='2024-2025', start_year=2024, end_year=2025)
+        sem = Semester(number=3)
+        db.session.add_all([ay, sem])
+        db.session.flush()
+        subject = Subject(code='CS301', name='Data Structures', semester_id=sem.id, academic_year_id=ay.id)
+        db.session.add(subject)
+        db.session.flush()
+
+        # 5 stale rows, 2 already correct
+        for i in range(5):
+            db.session.add(_question(subject, admin, f'Design a balanced tree variant {i}.', 'understand', 'EASY'))
+        for i in range(2):
+            db.session.add(_question(subject, admin, f'Define a stack {i}.', 'remember', 'EASY'))
+        db.session.commit()
+
+        # 1. First run stops after one chunk and leaves an open checkpoint
+        first = run_bloom_backfill(chunk_size=3, max_chunks=1)
+        assert first['processed'] == 3
+        assert first['completed'] is False
+        checkpoint = db.session.get(JobCheckpoint, BLOOM_BACKFILL_JOB)
+        assert checkpoint.processed == 3 and checkpoint.completed_at is None
+        resume_key = checkpoint.last_key
+
+        # 2. Second run resumes after the checkpoint and finishes
+        second = run_bloom_backfill(chunk_size=3)
+        assert second['resumedFrom'] == resume_key
+        assert second['processed'] == 4
+        assert second['completed'] is True
+        assert first['updated'] + second['updated'] == 5
+
+        designs = Question.query.filter(Question.bloom_level == 'create').all()
+        assert len(designs) == 5
+        assert all(q.difficulty == 'HARD' and q.editor_data['meta']['bloomLevel'] == 'create' for q in designs)
+
+        # 3. A finished job starts over and finds nothing left to change
+        third = run_bloom_backfill(chunk_size=3)
+        assert third['resumedFrom'] is None
+        assert third['processed'] == 7
+        assert third['updated'] == 0
+
+def test_backfill_bloom_command(app, runner):
+    result = runner.invoke(args=['backfill-bloom', '--chunk-size', '10'])
+    assert result.exit_code == 0
+    assert 'Backfill complete!' in result.output
@@ -0,0 +1,23 @@
+from app.services.bloom_service import classify_bloom_level, classify_many, analyze_text
+
+def test_single_pass_scores_and_keywords():
+    scores, keywords = analyze_text("Compare and contrast TCP and UDP; give examples.")
+    # "compare"/"contrast" count for both understand and analyze, "give examples" for understand only
+    assert scores['understand'] == 3
+    assert scores['analyze'] == 2
+    assert keywords == ['compare', 'contrast', 'give examples']
+    assert classify_bloom_level("Compare and contrast TCP and UDP; give examples.") == 'understand'
+
+def test_classify_many_batch():
+    results = classify_many(["Design a compiler pass.", "", "Justify and assess the design."])
+    assert [r['bloomLevel'] for r in results] == ['create', 'understand', 'evaluate']
+    assert [r['difficulty'] for r in results] == ['HARD', 'EASY', 'HARD']
+    assert results[1]['keywordsFound'] == []
+
+def test_analyze_bloom_endpoint(authenticated_admin_client):
+    resp = authenticated_admin_client.post('/api/questions/analyze-bloom', json={'text': 'Design and build a cache.'})
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data['bloomLevel'] == 'create'
+    assert data['keywordsFound'] == ['design', 'build']
+    assert data['scores']['create'] == 2
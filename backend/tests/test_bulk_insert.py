@@ -0,0 +1,49 @@
+import uuid
+from app import db
+from app.models import Subject, AcademicYear, Semester, CourseOutcome, Question
+from app.services.stats_service import get_subject_question_stats
+
+def _subject():
+    ay = AcademicYear(label='2024-2025', start_year=2024, end_year=2025)
+    sem = Semester(number=5)
+    db.session.add_all([ay, sem])
+    db.session.flush()
+    subject = Subject(code='CS502', name='Computer Networks', semester_id=sem.id, academic_year_id=ay.id)
+    other = Subject(code='CS503', name='Compilers', semester_id=sem.id, academic_year_id=ay.id)
+    db.session.add_all([subject, other])
+    db.session.flush()
+    co = CourseOutcome(subject_id=subject.id, co_code='CO1', description='Describe protocols')
+    foreign_co = CourseOutcome(subject_id=other.id, co_code='CO1', description='Parse grammars')
+    db.session.add_all([co, foreign_co])
+    db.session.commit()
+    return subject, co, foreign_co
+
+def test_bulk_save_inserts_archive_in_few_statements(app, authenticated_admin_client, assert_max_queries):
+    subject, co, foreign_co = _subject()
+    questions = [{"text": f"Explain protocol layer {i}.", "marks": 5} for i in range(2000)]
+    questions[10] = {"text": "   "}
+    questions[20] = {"text": "Design a router.", "marks": "ten"}
+    questions[30] = {"text": "Compare parsers.", "courseOutcomeId": str(foreign_co.id)}
+    questions[40] = {"text": "Define ARP.", "courseOutcomeId": str(co.id), "marks": 2}
+    questions[50] = {"text": "Define RARP.", "marks": " 2.5 "}
+
+    with assert_max_queries(25):
+        resp = authenticated_admin_client.post('/api/questions/bulk', json={
+            "subjectId": str(subject.id), "questions": questions
+        })
+    assert resp.status_code == 201
+    body = resp.get_json()
+    assert body['count'] == 1997
+    results = body['results']
+    assert len(results) == 2000
+    assert [r['index'] for r in results if r['status'] == 'error'] == [10, 20, 30]
+    assert 'id' not in results[10]
+
+    arp = db.session.get(Question, uuid.UUID(results[40]['id']))
+    assert arp.course_outcome_id == co.id
+    assert arp.status == 'DRAFT' and arp.source == 'AI'
+    assert arp.editor_data['meta']['marks'] == 2
+    # Numeric strings (common in model output) are kept and parsed into the marks column
+    assert db.session.get(Question, uuid.UUID(results[50]['id'])).marks == 2.5
+    assert Question.query.count() == 1997
+    assert get_subject_question_stats()[subject.id]['byStatus']['DRAFT'] == 1997
@@ -0,0 +1,108 @@
+import time
+from app.services.captcha_service import MemoryCaptchaStore, SQLiteCaptchaStore, get_captcha_store
+
+def test_memory_store_single_use_and_expiry():
+    store = MemoryCaptchaStore(ttl=0.05)
+    store.put('a', 'ABC123')
+    assert store.pop('a') == 'ABC123'
+    assert store.pop('a') is None
+
+    store.put('b', 'XYZ789')
+    time.sleep(0.06)
+    assert store.pop('b') is None
+    # Expired entries are dropped from the front of the deque on the next issue
+    store.put('old', 'OLD111')
+    time.sleep(0.06)
+    store.put('new', 'NEW222')
+    assert len(store) == 1
+
+def test_sqlite_store_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / 'captcha.sqlite3')
+    worker_a = SQLiteCaptchaStore(path)
+    worker_b = SQLiteCaptchaStore(path)
+
+    worker_a.put('c1', 'QWE456')
+    assert worker_b.pop('c1') == 'QWE456'
+    assert worker_a.pop('c1') is None
+
+    short = SQLiteCaptchaStore(path, ttl=-1)
+    short.put('c2', 'EXP000')
+    assert worker_b.pop('c2') is None
+
+def test_sqlite_store_defaults_to_private_instance_file(tmp_path):
+    import os
+    import stat
+    import pytest
+    from app.services.captcha_service import create_captcha_store
+
+    instance = tmp_path / 'instance'
+    store = create_captcha_store({'CAPTCHA_STORE_BACKEND': 'sqlite'}, str(instance))
+    assert store.path == str(instance / 'captcha.sqlite3')
+    assert stat.S_IMODE(os.stat(store.path).st_mode) == 0o600
+
+    # A pre-existing file is tightened to 0600 too
+    planted = tmp_path / 'planted.sqlite3'
+    planted.touch(mode=0o666)
+    create_captcha_store({'CAPTCHA_STORE_BACKEND': 'sqlite', 'CAPTCHA_STORE_PATH': str(planted)})
+    assert stat.S_IMODE(os.stat(planted).st_mode) == 0o600
+
+    with pytest.raises(ValueError):
+        create_captcha_store({'CAPTCHA_STORE_BACKEND': 'sqlite'})
+
+def test_captcha_endpoint_uses_configured_store(app, client):
+    resp = client.get('/auth/captcha')
+    assert resp.status_code == 200
+    captcha_id = resp.get_json()['captchaId']
+    store = get_captcha_store()
+    assert isinstance(store, MemoryCaptchaStore)
+    assert len(store.pop(captcha_id)) == 6
+
+def test_captcha_pool_serves_prerendered_challenges():
+    from app.services.captcha_service import CaptchaPool
+    pool = CaptchaPool(size=3, refill_interval=0.05)
+    pool.start()
+    deadline = time.time() + 10
+    while pool.metrics()['ready'] < 3 and time.time() < deadline:
+        time.sleep(0.02)
+    assert pool.metrics()['ready'] == 3
+
+    code, image = pool.take()
+    assert len(code) == 6 and image
+    metrics = pool.metrics()
+    assert metrics['hits'] == 1 and metrics['misses'] == 0
+    assert metrics['hitRate'] == 1.0
+    assert metrics['avgRenderMs'] > 0
+
+def test_captcha_pool_disabled_renders_inline(app, authenticated_admin_client):
+    resp = authenticated_admin_client.get('/auth/captcha')
+    assert resp.status_code == 200
+    metrics = authenticated_admin_client.get('/admin/captcha-metrics').get_json()
+    assert metrics['poolSize'] == 0
+    assert metrics['misses'] == 1 and metrics['rendered'] == 1
+
+def _from_concurrent_first_requests(app, getter, count=8):
+    import threading
+    results = []
+    barrier = threading.Barrier(count)
+
+    def first_request():
+        with app.app_context():
+            barrier.wait()
+            results.append(getter())
+
+    threads = [threading.Thread(target=first_request) for _ in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+def test_concurrent_first_requests_share_one_store(app):
+    from app.services.captcha_service import get_captcha_store
+    stores = _from_concurrent_first_requests(app, get_captcha_store)
+    assert len({id(store) for store in stores}) == 1
+
+def test_concurrent_first_requests_share_one_pool(app):
+    from app.services.captcha_service import get_captcha_pool
+    pools = _from_concurrent_first_requests(app, get_captcha_pool)
+    assert len({id(pool) for pool in pools}) == 1
@@ -0,0 +1,125 @@
+import hashlib
+from unittest.mock import MagicMock, patch
+from app.models import User, Subject, AcademicYear, Semester, Question, QuestionEmbedding, db
+
+def _fake_vector(text):
+    # Deterministic bag-of-words embedding so identical texts score 1.0
+    vec = [0.0] * 64
+    for word in text.lower().split():
+        vec[int(hashlib.md5(word.encode()).hexdigest(), 16) % 64] += 1.0
+    return vec
+
+def _fake_client(calls):
+    client = MagicMock()
+    def feature_extraction(texts):
+        batch = texts if isinstance(texts, list) else [texts]
+        calls.append(list(batch))
+        return [_fake_vector(t) for t in batch]
+    client.feature_extraction.side_effect = feature_extraction
+    return client
+
+def test_duplicate_check_uses_persistent_index(app, authenticated_admin_client, monkeypatch):
+    monkeypatch.setenv('HF_API_KEY', 'test-key')
+
+    with app.app_context():
+        admin = User.query.filter_by(email='admin_test@test.com').first()
+        ay = AcademicYear(label='2024-2025', start_year=2024, end_year=2025)
+        sem = Semester(number=5)
+        db.session.add_all([ay, sem])
+        db.session.flush()
+        subject = Subject(code='CS801', name='Information Retrieval', semester_id=sem.id, academic_year_id=ay.id)
+        db.session.add(subject)
+        db.session.flush()
+
+        # More than the 20 most recent questions the old scan looked at; the duplicate is the oldest
+        texts = ['Explain the vector space model for ranked retrieval.'] + \
+                [f'Topic {i}: describe inverted index compression scheme number {i}.' for i in range(30)]
+        for text in texts:
+            db.session.add(Question(subject_id=subject.id, creator_id=admin.id,
+                                    editor_data={'blocks': [{'type': 'paragraph', 'data': {'text': text}}]}))
+        db.session.commit()
+        subject_id = str(subject.id)
+
+    calls = []
+    payload = {'subjectId': subject_id, 'questionText': 'Explain the vector space model for ranked retrieval.'}
+    with patch('app.routes.ai.InferenceClient') as mock_client_class:
+        mock_client_class.return_value = _fake_client(calls)
+
+        # 1. First check backfills the subject index; the new text matches a stored question
+        #    word for word, so its embedding comes from the embedding cache
+        resp = authenticated_admin_client.post('/faculty/ai/check-duplicate', json=payload)
+        assert resp.status_code == 200
+        data = resp.get_json()
+        assert data['isDuplicate'] is True
+        assert data['similarityScore'] == 1.0
+        assert len(data['similarQuestions']) == 1
+        assert sum(len(c) for c in calls) == len(texts)
+
+        with app.app_context():
+            assert QuestionEmbedding.query.count() == len(texts)
+
+        # 2. Second check embeds a single text against the stored index
+        calls.clear()
+        resp = authenticated_admin_client.post('/faculty/ai/check-duplicate', json={
+            'subjectId': subject_id, 'questionText': 'Define precision and recall for search engines.'
+        })
+        assert resp.status_code == 200
+        assert resp.get_json()['isDuplicate'] is False
+        assert calls == [['Define precision and recall for search engines.']]
+
+def test_failed_embeddings_back_off(app, runner):
+    from app.models import SystemSetting
+    from app.services.ai_provider import OnPremiseProvider
+    from app.services.embedding_service import ensure_subject_indexed, get_embedding_failures
+
+    admin = User(name='Admin', email='embed@test.com', password_hash='x', role='ADMIN', is_approved=True)
+    ay = AcademicYear(label='2024-2025', start_year=2024, end_year=2025)
+    sem = Semester(number=5)
+    db.session.add_all([admin, ay, sem, SystemSetting(key='active_ai_provider', value='ON_PREMISE')])
+    db.session.flush()
+    subject = Subject(code='CS802', name='Data Mining', semester_id=sem.id, academic_year_id=ay.id)
+    db.session.add(subject)
+    db.session.flush()
+    for text in ('Explain the apriori algorithm.', 'Unembeddable question.'):
+        db.session.add(Question(subject_id=subject.id, creator_id=admin.id,
+                                editor_data={'blocks': [{'type': 'paragraph', 'data': {'text': text}}]}))
+    db.session.commit()
+
+    def embed(self, texts):
+        return [[0.0] * 64 if t.startswith('Unembeddable') else _fake_vector(t) for t in texts]
+
+    provider = OnPremiseProvider(endpoint_url='http://backoff-test:8000/v1')
+    with patch.object(OnPremiseProvider, '_embed', autospec=True, side_effect=embed) as embed_mock:
+        assert ensure_subject_indexed(subject.id, provider) == 1
+        assert embed_mock.call_count == 1
+
+        # The failed question is not resent while it backs off
+        assert ensure_subject_indexed(subject.id, provider) == 0
+        assert embed_mock.call_count == 1
+
+        # The maintenance command does the catch-up outside any request
+        get_embedding_failures().clear(provider.embedding_model_key, [q.id for q in Question.query])
+        result = runner.invoke(args=['index-embeddings', '--subject-id', str(subject.id)])
+        assert 'Indexed 0 question embeddings across 1 subject(s)' in result.output
+        assert embed_mock.call_count == 2
+
+def test_saves_queue_embeddings_instead_of_calling_the_provider(app, authenticated_admin_client):
+    ay = AcademicYear(label='2024-2025', start_year=2024, end_year=2025)
+    sem = Semester(number=5)
+    db.session.add_all([ay, sem])
+    db.session.flush()
+    subject = Subject(code='CS803', name='Web Mining', semester_id=sem.id, academic_year_id=ay.id)
+    db.session.add(subject)
+    db.session.commit()
+
+    app.config['EMBED_QUESTIONS_ON_SAVE'] = True
+    indexer = app.extensions['subject_indexer'] = MagicMock()
+    with patch('app.services.embedding_service.index_questions') as index_questions:
+        resp = authenticated_admin_client.post('/api/questions/bulk', json={
+            'subjectId': str(subject.id),
+            'questions': [{'text': 'Explain PageRank.', 'marks': 5}, {'text': 'Define HITS.', 'marks': 2}]
+        })
+    assert resp.status_code == 201
+    index_questions.assert_not_called()
+    (queued,), _ = indexer.schedule_questions.call_args
+    assert sorted(str(qid) for qid in queued) == sorted(r['id'] for r in resp.get_json()['results'])
@@ -0,0 +1,46 @@
+from app import db
+from app.models import User, Subject, AcademicYear, Semester, Question, SystemSetting
+from app.services import ai_generation_service
+from app.services.ai_generation_service import prepare_question_generation, _existing_question_texts
+from app.services.ai_provider import StubProvider
+from app.services.embedding_service import ensure_subject_indexed
+
+def _bank(admin_id, count=40):
+    ay = AcademicYear(label='2024-2025', start_year=2024, end_year=2025)
+    sem = Semester(number=5)
+    db.session.add_all([ay, sem])
+    db.session.flush()
+    subject = Subject(code='CS502', name='Computer Networks', semester_id=sem.id, academic_year_id=ay.id)
+    db.session.add(subject)
+    db.session.flush()
+    texts = [f'Describe routing table entry format number {i}.' for i in range(count)]
+    texts[3] = 'Explain TCP congestion control and slow start.'
+    for text in texts:
+        db.session.add(Question(subject_id=subject.id, creator_id=admin_id,
+                                editor_data={'blocks': [{'type': 'paragraph', 'data': {'text': text}}]}))
+    db.session.add(SystemSetting(key='active_ai_provider', value='STUB'))
+    db.session.commit()
+    return subject
+
+def test_prompt_lists_most_similar_questions(app, authenticated_admin_client):
+    admin = User.query.filter_by(email='admin_test@test.com').first()
+    subject = _bank(admin.id)
+    ensure_subject_indexed(subject.id, StubProvider())
+
+    texts = _existing_question_texts(subject.id, 'TCP congestion control', 5)
+    assert len(texts) == 5
+    assert texts[0] == 'Explain TCP congestion control and slow start.'
+
+    spec = prepare_question_generation(admin.id, {'subjectId': str(subject.id), 'topic': 'TCP congestion control'})
+    assert 'Explain TCP congestion control and slow start.' in spec['userPrompt']
+    assert spec['userPrompt'].count('Describe routing table') == ai_generation_service.QUESTION_CONTEXT_QUESTIONS - 1
+
+def test_unindexed_subject_falls_back_to_latest_questions(app, authenticated_admin_client, assert_max_queries):
+    admin = User.query.filter_by(email='admin_test@test.com').first()
+    subject = _bank(admin.id)
+
+    with assert_max_queries(6) as statements:
+        texts = _existing_question_texts(subject.id, 'TCP congestion control', 5)
+    assert len(texts) == 5
+    # Only the k requested rows are read, never the whole bank
+    assert any('LIMIT' in s for s in statements)
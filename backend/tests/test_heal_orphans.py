@@ -0,0 +1,52 @@
+import uuid
+from app.models import User, Subject, AcademicYear, Semester, Question, db
+from app.services.integrity_service import heal_orphaned_questions, count_orphaned_questions
+from app.services.stats_service import get_subject_question_stats
+
+def _orphan(admin, meta):
+    return Question(subject_id=uuid.uuid4(), creator_id=admin.id, status='APPROVED', editor_data={
+        'blocks': [{'type': 'paragraph', 'data': {'text': 'Explain paging.'}}], 'meta': meta
+    })
+
+def test_heal_orphans_set_based(app, authenticated_admin_client, runner):
+    with app.app_context():
+        admin = User.query.filter_by(email='admin_test@test.com').first()
+        ay = AcademicYear(label='2024-2025', start_year=2024, end_year=2025)
+        sem4 = Semester(number=4)
+        sem6 = Semester(number=6)
+        db.session.add_all([ay, sem4, sem6])
+        db.session.flush()
+        os_sem4 = Subject(code='CS401', name='Operating Systems', semester_id=sem4.id, academic_year_id=ay.id)
+        db.session.add(os_sem4)
+        db.session.flush()
+        os_sem6 = Subject(code='CS401', name='Operating Systems (Elective)', semester_id=sem6.id, academic_year_id=ay.id)
+        db.session.add(os_sem6)
+        db.session.flush()
+
+        db.session.add_all([
+            # Exact match: semester as a string in one, as a number in the other
+            _orphan(admin, {'subcode': 'CS401', 'semester': '6', 'academicYear': '2024-2025'}),
+            _orphan(admin, {'subcode': 'CS401', 'semester': 6, 'academicYear': '2024-2025'}),
+            # Padded forms that int() accepts
+            _orphan(admin, {'subcode': 'CS401', 'semester': '06', 'academicYear': '2024-2025'}),
+            _orphan(admin, {'subcode': 'CS401', 'semester': ' 6', 'academicYear': '2024-2025'}),
+            # Non-numeric semester falls through to the code-only fallback
+            _orphan(admin, {'subcode': 'CS401', 'semester': 'six', 'academicYear': '2024-2025'}),
+            # Fallback by code only
+            _orphan(admin, {'subcode': 'CS401'}),
+            # Unknown code stays orphaned
+            _orphan(admin, {'subcode': 'ZZ999', 'semester': '6', 'academicYear': '2024-2025'}),
+        ])
+        db.session.commit()
+        assert count_orphaned_questions() == 7
+
+        result = heal_orphaned_questions()
+        assert result == {'orphans': 7, 'healed': 4, 'fallbackHealed': 2, 'remaining': 1}
+        assert Question.query.filter_by(subject_id=os_sem6.id).count() == 4
+        assert Question.query.filter_by(subject_id=os_sem4.id).count() == 2
+        # Stats rollup follows the moved questions
+        assert get_subject_question_stats()[os_sem6.id]['approved'] == 4
+
+    result = runner.invoke(args=['heal-orphans'])
+    assert result.exit_code == 0
+    assert '1 still orphaned' in result.output
@@ -0,0 +1,98 @@
+import uuid
+from app.models import User, Subject, AcademicYear, Semester, Question, Paper, PaperQuestion, db
+from app.services.validation_service import validate_question_paper
+
+def _seed_bank(admin, blooms):
+    ay = AcademicYear(label='2024-2025', start_year=2024, end_year=2025)
+    sem = Semester(number=6)
+    db.session.add_all([ay, sem])
+    db.session.flush()
+    subject = Subject(code='CS901', name='Compiler Design', semester_id=sem.id, academic_year_id=ay.id)
+    db.session.add(subject)
+    db.session.flush()
+
+    # A bank where most shuffles overshoot: one exact 50-mark combination per difficulty mix
+    specs = [('EASY', 2), ('EASY', 2), ('EASY', 5), ('EASY', 5), ('EASY', 3), ('EASY', 7),
+             ('MEDIUM', 5), ('MEDIUM', 10), ('MEDIUM', 4), ('MEDIUM', 6),
+             ('HARD', 10), ('HARD', 8), ('HARD', 6), ('HARD', 12)]
+    for i, (difficulty, marks) in enumerate(specs):
+        db.session.add(Question(
+            subject_id=subject.id, creator_id=admin.id, status='APPROVED',
+            difficulty=difficulty, bloom_level=blooms[i % len(blooms)],
+            editor_data={'blocks': [{'type': 'paragraph', 'data': {'text': f'Q{i}'}}], 'meta': {'marks': marks}}
+        ))
+    db.session.commit()
+    return str(subject.id)
+
+def test_auto_generate_returns_distinct_valid_papers(app, authenticated_admin_client):
+    with app.app_context():
+        admin = User.query.filter_by(email='admin_test@test.com').first()
+        subject_id = _seed_bank(admin, ['remember', 'apply', 'create'])
+
+    resp = authenticated_admin_client.post('/api/papers/auto-generate', json={
+        'subjectId': subject_id, 'totalMarks': 50, 'count': 3, 'seed': 7
+    })
+    assert resp.status_code == 201
+    data = resp.get_json()
+    assert data['paperId'] == data['paperIds'][0]
+    assert len(data['paperIds']) == 3
+
+    with app.app_context():
+        selections = set()
+        for paper_id in data['paperIds']:
+            paper = db.session.get(Paper, uuid.UUID(paper_id))
+            questions = [pq.question for pq in PaperQuestion.query.filter_by(paper_id=paper.id).all()]
+            assert validate_question_paper(questions, 50)['valid']
+            selections.add(frozenset(q.id for q in questions))
+        assert len(selections) == 3
+
+    # Same seed, same first paper
+    again = authenticated_admin_client.post('/api/papers/auto-generate', json={
+        'subjectId': subject_id, 'totalMarks': 50, 'seed': 7
+    })
+    assert again.status_code == 201
+    with app.app_context():
+        def ids(pid):
+            return {pq.question_id for pq in PaperQuestion.query.filter_by(paper_id=uuid.UUID(pid)).all()}
+        assert ids(again.get_json()['paperId']) == ids(data['paperId'])
+
+def test_auto_generate_reports_infeasible_bank(app, authenticated_admin_client):
+    with app.app_context():
+        admin = User.query.filter_by(email='admin_test@test.com').first()
+        subject_id = _seed_bank(admin, ['remember', 'apply'])
+
+    resp = authenticated_admin_client.post('/api/papers/auto-generate', json={
+        'subjectId': subject_id, 'totalMarks': 50
+    })
+    assert resp.status_code == 400
+    data = resp.get_json()
+    assert data['provenInfeasible'] is True
+    assert 'evaluate/create' in data['error']
+
+    resp = authenticated_admin_client.post('/api/papers/auto-generate', json={
+        'subjectId': subject_id, 'totalMarks': 50, 'count': 'many'
+    })
+    assert resp.status_code == 400
+
+def test_solver_handles_half_marks(app):
+    from app.services.paper_generation_service import solve_paper
+
+    def q(difficulty, bloom, marks):
+        return Question(id=uuid.uuid4(), difficulty=difficulty, bloom_level=bloom,
+                        editor_data={'blocks': [], 'marks': marks})
+
+    bank = [q('EASY', 'remember', 2.5), q('EASY', 'understand', 2.5), q('MEDIUM', 'apply', 2.5),
+            q('HARD', 'create', 2.5), q('HARD', 'evaluate', 7)]
+    solution = solve_paper(bank, 10, seed=1)
+    assert solution['feasible'] is True
+    assert solution['details']['marksScale'] == 2
+    paper = solution['papers'][0]
+    assert validate_question_paper(paper, 10)['valid']
+    assert sum(question.marks for question in paper) == 10
+
+    # A mark the solver cannot represent exactly makes "no paper" unproven rather than infeasible
+    thirds = [q('EASY', 'remember', 1 / 3), q('MEDIUM', 'apply', 1 / 3), q('HARD', 'create', 1 / 3)]
+    solution = solve_paper(thirds + [q('EASY', 'remember', 2)], 1)
+    assert solution['papers'] == []
+    assert solution['feasible'] is None
+    assert solution['details']['unsupportedMarks'] == 3
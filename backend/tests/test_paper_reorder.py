@@ -0,0 +1,92 @@
+from app import db
+from app.models import User, Subject, AcademicYear, Semester, Question, Paper, Section, PaperQuestion
+
+def _paper_with_questions(count):
+    admin = User.query.filter_by(email='admin_test@test.com').first()
+    ay = AcademicYear(label='2024-2025', start_year=2024, end_year=2025)
+    sem = Semester(number=2)
+    db.session.add_all([ay, sem])
+    db.session.flush()
+    subject = Subject(code='CS202', name='Data Structures', semester_id=sem.id, academic_year_id=ay.id)
+    db.session.add(subject)
+    db.session.flush()
+    paper = Paper(subject_id=subject.id, title='End Term')
+    db.session.add(paper)
+    db.session.flush()
+    sections = [Section(paper_id=paper.id, title=f'Part {c}', order_index=i) for i, c in enumerate('ABC')]
+    db.session.add_all(sections)
+    questions = [
+        Question(subject_id=subject.id, creator_id=admin.id,
+                 editor_data={'blocks': [{'type': 'paragraph', 'data': {'text': f'Q{i}'}}], 'marks': 1})
+        for i in range(count)
+    ]
+    db.session.add_all(questions)
+    db.session.flush()
+    for i, q in enumerate(questions):
+        db.session.add(PaperQuestion(paper_id=paper.id, section_id=sections[0].id, question_id=q.id, order_index=i))
+    db.session.commit()
+    return paper, sections, questions
+
+def _order(section_id):
+    db.session.expire_all()
+    rows = PaperQuestion.query.filter_by(section_id=section_id).order_by(PaperQuestion.order_index).all()
+    return [(row.question_id, row.order_index) for row in rows]
+
+def test_reorder_questions_is_one_update(app, authenticated_admin_client, assert_max_queries):
+    paper, sections, questions = _paper_with_questions(60)
+    reversed_ids = [str(q.id) for q in reversed(questions)]
+
+    with assert_max_queries(10) as statements:
+        resp = authenticated_admin_client.put(f'/api/sections/{sections[0].id}/reorder-questions',
+                                              json={'orderedQuestionIds': reversed_ids + ['not-a-uuid']})
+    assert resp.status_code == 200
+    assert len([s for s in statements if s.startswith('UPDATE')]) == 1
+    assert [str(qid) for qid, _ in _order(sections[0].id)] == reversed_ids
+
+def test_reorder_sections_is_one_update(app, authenticated_admin_client, assert_max_queries):
+    paper, sections, _ = _paper_with_questions(1)
+    new_order = [str(sections[2].id), str(sections[0].id), str(sections[1].id)]
+
+    with assert_max_queries(10) as statements:
+        resp = authenticated_admin_client.put(f'/api/papers/{paper.id}/reorder-sections',
+                                              json={'orderedSectionIds': new_order})
+    assert resp.status_code == 200
+    assert len([s for s in statements if s.startswith('UPDATE')]) == 1
+    db.session.expire_all()
+    ordered = Section.query.filter_by(paper_id=paper.id).order_by(Section.order_index).all()
+    assert [str(s.id) for s in ordered] == new_order
+
+def test_move_question_shifts_destination_in_sql(app, authenticated_admin_client, assert_max_queries):
+    paper, sections, questions = _paper_with_questions(5)
+    # Section B holds the last three questions at 0, 1, 2
+    for i, q in enumerate(questions[2:]):
+        pq = PaperQuestion.query.filter_by(question_id=q.id).first()
+        pq.section_id, pq.order_index = sections[1].id, i
+    db.session.commit()
+
+    with assert_max_queries(10) as statements:
+        resp = authenticated_admin_client.put(f'/api/papers/{paper.id}/move-question', json={
+            'questionId': str(questions[0].id), 'fromSectionId': str(sections[0].id),
+            'toSectionId': str(sections[1].id), 'newIndex': 1
+        })
+    assert resp.status_code == 200
+    # The move, the shift and both existence checks are one statement
+    assert len([s for s in statements if 'paper_questions' in s]) == 1
+    assert len([s for s in statements if s.startswith('UPDATE')]) == 1
+    assert _order(sections[1].id) == [
+        (questions[2].id, 0), (questions[0].id, 1), (questions[3].id, 2), (questions[4].id, 3)
+    ]
+    assert _order(sections[0].id) == [(questions[1].id, 1)]
+
+    resp = authenticated_admin_client.put(f'/api/papers/{paper.id}/move-question', json={
+        'questionId': str(questions[0].id), 'fromSectionId': str(sections[0].id),
+        'toSectionId': str(sections[1].id), 'newIndex': 0
+    })
+    assert resp.status_code == 404
+
+    resp = authenticated_admin_client.put(f'/api/papers/{paper.id}/move-question', json={
+        'questionId': str(questions[1].id), 'fromSectionId': str(sections[0].id),
+        'toSectionId': str(questions[1].id), 'newIndex': 0
+    })
+    assert resp.status_code == 400
+    assert _order(sections[0].id) == [(questions[1].id, 1)]
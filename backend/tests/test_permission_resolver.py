@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+from app.models import User, Subject, AcademicYear, Semester, FacultyAssignment, Question, db
+from app.services.rbac_service import get_permission_resolver, has_subject_permission, get_user_effective_roles
+
+def _setup(app):
+    with app.app_context():
+        admin = User(name='Admin', email='admin_perm@msruas.ac.in', password_hash='x', role='ADMIN', is_approved=True)
+        fac = User(name='Faculty', email='fac_perm@msruas.ac.in', password_hash='x', role='FACULTY', is_approved=True)
+        db.session.add_all([admin, fac])
+        db.session.flush()
+        ay = AcademicYear(label='2024-2025', start_year=2024, end_year=2025)
+        sem = Semester(number=5)
+        db.session.add_all([ay, sem])
+        db.session.flush()
+        subjects = [Subject(code=f'CS5{i}', name=f'Subject {i}', semester_id=sem.id, academic_year_id=ay.id) for i in range(4)]
+        db.session.add_all(subjects)
+        db.session.flush()
+        until = datetime.utcnow() + timedelta(days=30)
+        db.session.add_all([
+            FacultyAssignment(user_id=fac.id, subject_id=subjects[0].id, role_type='FACULTY', valid_until=until, assigned_by=admin.id),
+            FacultyAssignment(user_id=fac.id, subject_id=subjects[1].id, role_type='SUBJECT_EXPERT', valid_until=until, assigned_by=admin.id),
+            FacultyAssignment(user_id=fac.id, department='CSE', role_type='HOD', valid_until=until, assigned_by=admin.id),
+            # Expired assignments never count
+            FacultyAssignment(user_id=fac.id, subject_id=subjects[2].id, role_type='FACULTY',
+                              valid_until=datetime.utcnow() - timedelta(days=1), assigned_by=admin.id),
+        ])
+        questions = [
+            Question(subject_id=subjects[i % 2].id, creator_id=fac.id, editor_data={'blocks': [], 'meta': {'marks': 2}})
+            for i in range(30)
+        ]
+        db.session.add_all(questions)
+        db.session.commit()
+        return str(fac.id), [s.id for s in subjects], [str(q.id) for q in questions]
+
+def test_resolver_roles_map(app):
+    fac_id, subject_ids, _ = _setup(app)
+    with app.app_context():
+        assert get_user_effective_roles(fac_id, subject_id=subject_ids[0]) == {'ACADEMIC', 'FACULTY'}
+        assert get_user_effective_roles(fac_id, subject_id=subject_ids[1], department='CSE') == {'ACADEMIC', 'SUBJECT_EXPERT', 'HOD'}
+        assert get_user_effective_roles(fac_id, department='CSE') == {'ACADEMIC', 'HOD'}
+        assert not has_subject_permission(fac_id, subject_ids[2], ['FACULTY'])
+
+        # Memoized for the rest of the request / context, and dropped when assignments change
+        resolver = get_permission_resolver(fac_id)
+        assert get_permission_resolver(fac_id) is resolver
+        admin = User.query.filter_by(role='ADMIN').first()
+        db.session.add(FacultyAssignment(user_id=resolver.user_id, subject_id=subject_ids[3], role_type='FACULTY',
+                                         valid_until=datetime.utcnow() + timedelta(days=1), assigned_by=admin.id))
+        db.session.commit()
+        assert get_permission_resolver(fac_id) is not resolver
+        assert has_subject_permission(fac_id, subject_ids[3], ['FACULTY'])
+
+def test_validate_draft_checks_are_constant_queries(app, client, assert_max_queries):
+    fac_id, _, question_ids = _setup(app)
+    with app.app_context():
+        token = create_access_token(identity=fac_id, additional_claims={'role': 'FACULTY'})
+
+    # questions + user + assignments, independent of the number of questions
+    with assert_max_queries(3):
+        resp = client.post('/api/papers/validate-draft', json={'questionIds': question_ids, 'totalMarks': 60},
+                           headers={'Authorization': f'Bearer {token}'})
+    assert resp.status_code == 200
+    assert resp.get_json()['details']['current_total_marks'] == 60
+
+    # The next request resolves permissions again (no stale cache across requests)
+    with assert_max_queries(3):
+        resp = client.post('/api/papers/validate-draft', json={'questionIds': question_ids, 'totalMarks': 60},
+                           headers={'Authorization': f'Bearer {token}'})
+    assert resp.status_code == 200
@@ -0,0 +1,83 @@
+from app.models import User, Subject, AcademicYear, Semester, Question, Paper, Section, PaperQuestion, CourseOutcome, db
+
+def _seed_paper(app):
+    with app.app_context():
+        admin = User.query.filter_by(email='admin_test@test.com').first()
+
+        ay = AcademicYear(label='2024-2025', start_year=2024, end_year=2025)
+        sem = Semester(number=5)
+        db.session.add_all([ay, sem])
+        db.session.flush()
+
+        sub = Subject(code='CS601', name='Compiler Design', semester_id=sem.id, academic_year_id=ay.id)
+        db.session.add(sub)
+        db.session.flush()
+
+        co = CourseOutcome(subject_id=sub.id, co_code='CO1', description='Construct parsers')
+        db.session.add(co)
+
+        paper = Paper(subject_id=sub.id, title='Compiler Design Final', status='DRAFT')
+        db.session.add(paper)
+        db.session.flush()
+
+        ids = (str(paper.id), str(sub.id), str(co.id), str(admin.id))
+        db.session.commit()
+        return ids
+
+def _add_questions(app, paper_id, subject_id, co_id, creator_id, count):
+    """Adds a new section holding `count` fresh questions to the paper."""
+    import uuid
+    with app.app_context():
+        paper_uuid = uuid.UUID(paper_id)
+        sec = Section(paper_id=paper_uuid, title='Section', order_index=Section.query.filter_by(paper_id=paper_uuid).count())
+        db.session.add(sec)
+        db.session.flush()
+        for i in range(count):
+            q = Question(
+                subject_id=uuid.UUID(subject_id),
+                creator_id=uuid.UUID(creator_id),
+                course_outcome_id=uuid.UUID(co_id),
+                difficulty='EASY',
+                bloom_level='remember',
+                editor_data={'blocks': [{'type': 'paragraph', 'data': {'text': f'Define term {uuid.uuid4()}'}}], 'marks': '2'}
+            )
+            db.session.add(q)
+            db.session.flush()
+            db.session.add(PaperQuestion(paper_id=paper_uuid, section_id=sec.id, question_id=q.id, order_index=i))
+        db.session.commit()
+
+def test_paper_and_listing_query_counts_are_constant(app, authenticated_admin_client, assert_max_queries):
+    client = authenticated_admin_client
+    paper_id, subject_id, co_id, admin_id = _seed_paper(app)
+    _add_questions(app, paper_id, subject_id, co_id, admin_id, 2)
+
+    endpoints = [
+        f'/api/papers/{paper_id}',
+        f'/api/papers/{paper_id}/export/docx',
+        f'/api/papers/{paper_id}/export/latex',
+        '/api/questions',
+        '/api/questions?page=1&limit=50',
+    ]
+
+    # paper -> sections -> paper_questions -> questions(+subject/CO/creator) is 4 SELECTs
+    small_counts = {}
+    for url in endpoints:
+        with assert_max_queries(4) as statements:
+            resp = client.get(url)
+            assert resp.status_code == 200
+        small_counts[url] = len(statements)
+
+    # Growing the paper/bank must not change the number of queries
+    _add_questions(app, paper_id, subject_id, co_id, admin_id, 15)
+    for url in endpoints:
+        with assert_max_queries(small_counts[url]):
+            resp = client.get(url)
+            assert resp.status_code == 200
+
+    resp = client.get(f'/api/papers/{paper_id}')
+    body = resp.get_json()
+    assert sum(len(s['questions']) for s in body['sections']) == 17
+    first_q = body['sections'][0]['questions'][0]
+    assert first_q['subcode'] == 'CS601'
+    assert first_q['coCode'] == 'CO1'
+    assert first_q['creatorName'] == 'Admin User'
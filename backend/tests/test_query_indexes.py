@@ -0,0 +1,162 @@
+import os
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, select, text
+from app import create_app, db
+from app.models import (
+    User, Subject, AcademicYear, Semester, Question, Paper, Section, PaperQuestion,
+    QuestionUsage, QuestionReviewStep
+)
+from tests.conftest import TestConfig
+
+# Set to a throwaway Postgres database (e.g. postgresql://localhost/qpaper_test) to check the plans there too
+POSTGRES_URL = os.environ.get('TEST_POSTGRES_URL')
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def seeded_db(request):
+    if request.param == 'postgresql' and not POSTGRES_URL:
+        pytest.skip('TEST_POSTGRES_URL not set')
+
+    class PlanConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = POSTGRES_URL if request.param == 'postgresql' else 'sqlite:///:memory:'
+
+    app = create_app(PlanConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        ids = _seed()
+        token = create_access_token(identity=str(ids['user_id']), additional_claims={'role': 'ADMIN'})
+        ids['client'] = app.test_client()
+        ids['client'].environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        if request.param == 'postgresql':
+            db.session.execute(text('ANALYZE'))
+            # Seeded tables are tiny; make the planner show which index it would use at scale
+            db.session.execute(text('SET enable_seqscan = off'))
+        yield ids
+        db.session.rollback()
+        db.session.remove()
+        db.drop_all()
+
+def _seed():
+    ay = AcademicYear(label='2024-2025', start_year=2024, end_year=2025)
+    sem = Semester(number=3)
+    user = User(name='Planner', email='planner@test.com', password_hash='x', role='ADMIN', is_approved=True)
+    db.session.add_all([ay, sem, user])
+    db.session.flush()
+    subjects = [
+        Subject(code=f'CS30{i}', name=f'Subject {i}', semester_id=sem.id, academic_year_id=ay.id) for i in range(3)
+    ]
+    db.session.add_all(subjects)
+    db.session.flush()
+
+    now = datetime.utcnow()
+    questions = []
+    for i in range(60):
+        questions.append(Question(
+            subject_id=subjects[i % 3].id, creator_id=user.id, created_at=now - timedelta(hours=i),
+            difficulty=('EASY', 'MEDIUM', 'HARD')[i % 3], status=('DRAFT', 'APPROVED')[i % 2],
+            editor_data={'blocks': [], 'marks': (i % 10) + 1}
+        ))
+    db.session.add_all(questions)
+    db.session.flush()
+
+    paper = Paper(subject_id=subjects[0].id, title='Mid Term', created_at=now)
+    db.session.add(paper)
+    db.session.flush()
+    section = Section(paper_id=paper.id, title='Part A', order_index=0)
+    db.session.add(section)
+    db.session.flush()
+    for i, q in enumerate(questions[:6]):
+        db.session.add(PaperQuestion(paper_id=paper.id, section_id=section.id, question_id=q.id, order_index=i))
+        db.session.add(QuestionUsage(question_id=q.id, paper_id=paper.id, subject_id=q.subject_id, used_at=now))
+        db.session.add(QuestionReviewStep(question_id=q.id, stage_name='HOD'))
+    db.session.commit()
+    return {'subject_id': subjects[0].id, 'user_id': user.id, 'paper_id': paper.id,
+            'section_id': section.id, 'question_id': questions[0].id}
+
+def _explain(sql, parameters=None):
+    """Plan of a SQL string as one string (EXPLAIN QUERY PLAN on SQLite, EXPLAIN on Postgres)."""
+    connection = db.session.connection()
+    if db.engine.dialect.name == 'sqlite':
+        return '\n'.join(row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}', parameters or ()))
+    return '\n'.join(row[0] for row in connection.exec_driver_sql(f'EXPLAIN {sql}', parameters or {}))
+
+def _plan(stmt):
+    return _explain(str(stmt.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})))
+
+@contextmanager
+def _issued_statements():
+    """Captures (statement, parameters) of everything the wrapped code sends, to explain the real queries."""
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', _record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _record)
+
+def _plan_of_issued(statements, *fragments):
+    """Plan of the one captured statement containing every fragment."""
+    matches = [(sql, params) for sql, params in statements if all(f in sql for f in fragments)]
+    assert len(matches) == 1, f"Expected one statement with {fragments}, got {len(matches)}"
+    return _explain(*matches[0])
+
+def test_question_listing_uses_subject_created_index(seeded_db):
+    client = seeded_db['client']
+    # Same request the question bank sends: subject filter, recently-used anti-join, keyset page
+    with _issued_statements() as statements:
+        resp = client.get(f"/api/questions?subjectId={seeded_db['subject_id']}&cursor=&limit=20")
+    assert resp.status_code == 200
+    plan = _plan_of_issued(statements, 'FROM questions', 'question_usages', 'ORDER BY questions.created_at DESC')
+    assert 'ix_questions_subject_created' in plan
+    assert 'TEMP B-TREE' not in plan  # no sort step on SQLite
+    # The recently-used EXISTS probes usages by index (which one is the planner's choice) and the last papers by subject
+    assert 'ix_question_usages_' in plan and 'SCAN question_usages' not in plan
+    assert 'ix_papers_subject_created' in plan
+
+    with _issued_statements() as statements:
+        resp = client.get(f"/api/questions?creatorId={seeded_db['user_id']}&cursor=")
+    assert resp.status_code == 200
+    assert 'ix_questions_creator_created' in _plan_of_issued(statements, 'FROM questions', 'ORDER BY questions.created_at DESC')
+
+def test_dashboard_counts_use_subject_status_prefix(seeded_db):
+    from app.services.stats_service import rebuild_subject_question_stats
+    # The dashboard reads the rollup; this GROUP BY is what (re)builds it
+    with _issued_statements() as statements:
+        rebuild_subject_question_stats()
+    plan = _plan_of_issued(statements, 'GROUP BY questions.subject_id, questions.status')
+    assert 'ix_questions_subject_status_difficulty_marks' in plan
+    assert 'TEMP B-TREE FOR GROUP BY' not in plan
+
+def test_auto_generate_pool_uses_partial_index(seeded_db):
+    with _issued_statements() as statements:
+        seeded_db['client'].post('/api/papers/auto-generate', json={
+            'subjectId': str(seeded_db['subject_id']), 'totalMarks': 10
+        })
+    assert 'ix_questions_approved_subject_marks' in _plan_of_issued(statements, 'FROM questions', 'questions.marks >')
+
+def test_usage_and_paper_lookups_use_indexes(seeded_db):
+    by_paper = select(QuestionUsage.question_id).where(QuestionUsage.paper_id == seeded_db['paper_id'])
+    assert 'ix_question_usages_paper_id' in _plan(by_paper)
+
+def test_paper_structure_lookups_use_indexes(seeded_db):
+    sections = select(Section.id).where(Section.paper_id == seeded_db['paper_id']).order_by(Section.order_index)
+    assert 'ix_sections_paper_order' in _plan(sections)
+
+    section_questions = (
+        select(PaperQuestion.id).where(PaperQuestion.section_id == seeded_db['section_id'])
+        .order_by(PaperQuestion.order_index)
+    )
+    assert 'ix_paper_questions_section_order' in _plan(section_questions)
+
+    by_question = select(PaperQuestion.id).where(PaperQuestion.question_id == seeded_db['question_id'])
+    assert 'ix_paper_questions_question_id' in _plan(by_question)
+
+    steps = select(QuestionReviewStep.id).where(QuestionReviewStep.question_id == seeded_db['question_id'])
+    assert 'ix_question_review_steps_question_id' in _plan(steps)
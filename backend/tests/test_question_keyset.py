@@ -0,0 +1,103 @@
+from app.models import User, Subject, AcademicYear, Semester, FacultyAssignment, Question, db
+from app.routes.auth import bcrypt
+from flask_jwt_extended import create_access_token
+from datetime import datetime, timedelta
+
+def test_keyset_question_listing(client, app):
+    with app.app_context():
+        hashed = bcrypt.hashpw(b'pass', bcrypt.gensalt()).decode('utf-8')
+
+        fac = User(name='Faculty K', email='fac_k@msruas.ac.in', password_hash=hashed, role='FACULTY', is_approved=True)
+        db.session.add(fac)
+        db.session.flush()
+
+        ay = AcademicYear(label='2024-2025', start_year=2024, end_year=2025)
+        sem = Semester(number=5)
+        db.session.add_all([ay, sem])
+        db.session.flush()
+
+        sub = Subject(code='CS401', name='Operating Systems', semester_id=sem.id, academic_year_id=ay.id)
+        db.session.add(sub)
+        db.session.flush()
+
+        assign = FacultyAssignment(
+            user_id=fac.id,
+            subject_id=sub.id,
+            role_type='FACULTY',
+            valid_until=datetime.utcnow() + timedelta(days=365),
+            assigned_by=fac.id
+        )
+        db.session.add(assign)
+
+        # 7 questions, two of them sharing a created_at to exercise the id tie-breaker
+        base = datetime(2025, 1, 1, 10, 0, 0)
+        stamps = [base + timedelta(minutes=i) for i in range(6)] + [base + timedelta(minutes=5)]
+        for i, ts in enumerate(stamps):
+            db.session.add(Question(
+                subject_id=sub.id,
+                creator_id=fac.id,
+                difficulty='EASY',
+                bloom_level='remember',
+                editor_data={'blocks': [{'type': 'paragraph', 'data': {'text': f'Keyset question {i}'}}], 'marks': '5'},
+                created_at=ts
+            ))
+
+        fac_id = str(fac.id)
+        sub_id = str(sub.id)
+        db.session.commit()
+
+    token = create_access_token(identity=fac_id, additional_claims={'role': 'FACULTY'})
+    headers = {'Authorization': f'Bearer {token}'}
+
+    # 1. Walk all pages with limit=3: every question exactly once, newest first
+    seen = []
+    cursor = ''
+    pages = 0
+    while True:
+        resp = client.get(f'/api/questions?subjectId={sub_id}&limit=3&cursor={cursor}', headers=headers)
+        assert resp.status_code == 200
+        body = resp.get_json()
+        pages += 1
+        seen.extend(body['questions'])
+        if not body['hasMore']:
+            assert body['nextCursor'] is None
+            break
+        cursor = body['nextCursor']
+
+    assert pages == 3
+    assert len(seen) == 7
+    assert len({q['id'] for q in seen}) == 7
+    created = [q['createdAt'] for q in seen]
+    assert created == sorted(created, reverse=True)
+
+    # 2. Slim shape: listing columns resolved by the joins, no editorData by default
+    first = seen[0]
+    assert 'editorData' not in first
+    assert first['subcode'] == 'CS401'
+    assert first['academicYear'] == '2024-2025'
+    assert first['semester'] == 5
+    assert first['creatorName'] == 'Faculty K'
+    assert first['isRecentlyUsed'] is False
+
+    # 3. editorData is returned only when asked for
+    resp = client.get(f'/api/questions?subjectId={sub_id}&limit=2&cursor=&includeEditorData=true', headers=headers)
+    assert resp.status_code == 200
+    assert 'editorData' in resp.get_json()['questions'][0]
+
+    # 4. A malformed cursor is rejected
+    resp = client.get(f'/api/questions?subjectId={sub_id}&cursor=not-a-cursor', headers=headers)
+    assert resp.status_code == 400
+
+def test_unassigned_faculty_gets_empty_page_shapes(client, app):
+    with app.app_context():
+        fac = User(name='Faculty U', email='fac_u@msruas.ac.in', password_hash='x', role='FACULTY', is_approved=True)
+        db.session.add(fac)
+        db.session.commit()
+        token = create_access_token(identity=str(fac.id), additional_claims={'role': 'FACULTY'})
+    headers = {'Authorization': f'Bearer {token}'}
+
+    body = client.get('/api/questions?cursor=', headers=headers).get_json()
+    assert body['questions'] == [] and body['hasMore'] is False and body['nextCursor'] is None
+    body = client.get('/api/questions?page=1&limit=10', headers=headers).get_json()
+    assert body['questions'] == [] and body['total'] == 0
+    assert client.get('/api/questions', headers=headers).get_json() == []
@@ -0,0 +1,43 @@
+from app import db
+from app.models import User, Subject, AcademicYear, Semester, Question
+
+def _subject():
+    ay = AcademicYear(label='2024-2025', start_year=2024, end_year=2025)
+    sem = Semester(number=5)
+    db.session.add_all([ay, sem])
+    db.session.flush()
+    subject = Subject(code='CS502', name='Computer Networks', semester_id=sem.id, academic_year_id=ay.id)
+    db.session.add(subject)
+    db.session.commit()
+    return subject
+
+def _question(subject, creator, editor_data, status='APPROVED'):
+    q = Question(subject_id=subject.id, creator_id=creator.id, status=status, editor_data=editor_data)
+    db.session.add(q)
+    return q
+
+def test_marks_column_follows_editor_data(app, authenticated_admin_client):
+    admin = User.query.filter_by(email='admin_test@test.com').first()
+    subject = _subject()
+    top = _question(subject, admin, {'blocks': [], 'marks': '5'})
+    meta = _question(subject, admin, {'blocks': [], 'meta': {'marks': 2.5}})
+    junk = _question(subject, admin, {'blocks': [], 'marks': 'ten'})
+    db.session.commit()
+    assert (top.marks, meta.marks, junk.marks) == (5.0, 2.5, None)
+
+    resp = authenticated_admin_client.put(f'/api/questions/{top.id}', json={
+        'editorData': {'blocks': [{'type': 'paragraph', 'data': {'text': 'Define TCP.'}}], 'marks': 10}
+    })
+    assert resp.status_code == 200
+    db.session.expire_all()
+    assert db.session.get(Question, top.id).marks == 10.0
+
+def test_bank_filters_on_marks_column(app, authenticated_admin_client):
+    admin = User.query.filter_by(email='admin_test@test.com').first()
+    subject = _subject()
+    for marks in (2, 5, 10, 50):
+        _question(subject, admin, {'blocks': [{'type': 'paragraph', 'data': {'text': f'Q {marks}'}}], 'marks': marks})
+    db.session.commit()
+
+    resp = authenticated_admin_client.get(f'/api/questions?subjectId={subject.id}&minMarks=5&maxMarks=10')
+    assert sorted(q['marks'] for q in resp.get_json()) == [5.0, 10.0]
@@ -0,0 +1,101 @@
+from app import db
+from app.models import User, Subject, AcademicYear, Semester, Question
+
+def _subject():
+    ay = AcademicYear(label='2024-2025', start_year=2024, end_year=2025)
+    sem = Semester(number=4)
+    db.session.add_all([ay, sem])
+    db.session.flush()
+    subject = Subject(code='CS402', name='Computer Networks', semester_id=sem.id, academic_year_id=ay.id)
+    db.session.add(subject)
+    db.session.commit()
+    return subject
+
+def _question(subject, creator, text):
+    q = Question(subject_id=subject.id, creator_id=creator.id, status='APPROVED',
+                 editor_data={'blocks': [{'type': 'paragraph', 'data': {'text': text}}], 'marks': 5})
+    db.session.add(q)
+    return q
+
+def test_search_text_follows_editor_data(app):
+    admin = User(name='Admin', email='a@test.com', password_hash='x', role='ADMIN', is_approved=True)
+    db.session.add(admin)
+    db.session.commit()
+    q = _question(_subject(), admin, 'Explain <b>TCP</b> congestion control.')
+    db.session.commit()
+    assert q.search_text.split() == ['Explain', 'TCP', 'congestion', 'control.']
+
+def test_q_returns_ranked_matches(app, authenticated_admin_client):
+    admin = User.query.filter_by(email='admin_test@test.com').first()
+    subject = _subject()
+    once = _question(subject, admin, 'Compare TCP with UDP for streaming.')
+    twice = _question(subject, admin, 'Explain TCP flow control and TCP congestion windows.')
+    _question(subject, admin, 'Define a binary search tree.')
+    db.session.commit()
+
+    resp = authenticated_admin_client.get(f'/api/questions?subjectId={subject.id}&q=tcp')
+    assert resp.status_code == 200
+    assert [q['id'] for q in resp.get_json()] == [str(twice.id), str(once.id)]
+
+    # Every term must match; stemming matches "windows" with "window"
+    resp = authenticated_admin_client.get(f'/api/questions?subjectId={subject.id}&q=TCP+window')
+    assert [q['id'] for q in resp.get_json()] == [str(twice.id)]
+
+    resp = authenticated_admin_client.get(f'/api/questions?subjectId={subject.id}&q=tcp&page=1&limit=1')
+    body = resp.get_json()
+    assert body['total'] == 2
+    assert body['questions'][0]['id'] == str(twice.id)
+
+    resp = authenticated_admin_client.get(f'/api/questions?subjectId={subject.id}&q=udp&cursor=')
+    assert [q['id'] for q in resp.get_json()['questions']] == [str(once.id)]
+
+def test_search_index_tracks_updates_and_bulk_inserts(app, authenticated_admin_client):
+    admin = User.query.filter_by(email='admin_test@test.com').first()
+    subject = _subject()
+    q = _question(subject, admin, 'Describe the OSI model.')
+    db.session.commit()
+
+    resp = authenticated_admin_client.put(f'/api/questions/{q.id}', json={
+        'editorData': {'blocks': [{'type': 'paragraph', 'data': {'text': 'Describe subnetting.'}}], 'marks': 5}
+    })
+    assert resp.status_code == 200
+    resp = authenticated_admin_client.get(f'/api/questions?subjectId={subject.id}&q=osi')
+    assert resp.get_json() == []
+    resp = authenticated_admin_client.get(f'/api/questions?subjectId={subject.id}&q=subnetting')
+    assert [item['id'] for item in resp.get_json()] == [str(q.id)]
+
+    resp = authenticated_admin_client.post('/api/questions/bulk', json={
+        'subjectId': str(subject.id),
+        'questions': [{'text': 'What is ARP spoofing?', 'marks': 2}]
+    })
+    assert resp.status_code == 201
+    resp = authenticated_admin_client.get(f'/api/questions?subjectId={subject.id}&q=arp')
+    assert len(resp.get_json()) == 1
+
+def test_q_ignores_search_syntax(app, authenticated_admin_client):
+    admin = User.query.filter_by(email='admin_test@test.com').first()
+    subject = _subject()
+    _question(subject, admin, 'Explain NOT gates.')
+    db.session.commit()
+
+    resp = authenticated_admin_client.get(f'/api/questions?subjectId={subject.id}&q=' + '"NOT*(')
+    assert resp.status_code == 200
+    assert len(resp.get_json()) == 1
+
+    # Nothing searchable: behaves as if q was not given
+    resp = authenticated_admin_client.get(f'/api/questions?subjectId={subject.id}&q=%3F%3F')
+    assert len(resp.get_json()) == 1
+
+def test_search_index_survives_delete_and_vacuum(app, authenticated_admin_client):
+    admin = User.query.filter_by(email='admin_test@test.com').first()
+    subject = _subject()
+    gone = _question(subject, admin, 'Explain DNS caching.')
+    kept = _question(subject, admin, 'Explain DNS zone transfers.')
+    db.session.commit()
+
+    resp = authenticated_admin_client.delete(f'/api/questions/{gone.id}')
+    assert resp.status_code == 200
+    # VACUUM may renumber the implicit rowids of questions; the index is keyed on question ids
+    db.session.execute(db.text('VACUUM'))
+    resp = authenticated_admin_client.get(f'/api/questions?subjectId={subject.id}&q=dns')
+    assert [item['id'] for item in resp.get_json()] == [str(kept.id)]
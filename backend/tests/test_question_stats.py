@@ -0,0 +1,70 @@
+from app.models import User, Subject, AcademicYear, Semester, Question, SubjectQuestionStat, db
+from app.services.stats_service import get_subject_question_stats, rebuild_subject_question_stats
+
+def _stats_rows():
+    return {(r.subject_id, r.status): r.question_count for r in SubjectQuestionStat.query.all() if r.question_count}
+
+def test_subject_question_stats_rollup(app, authenticated_admin_client):
+    with app.app_context():
+        admin = User.query.filter_by(email='admin_test@test.com').first()
+
+        ay = AcademicYear(label='2024-2025', start_year=2024, end_year=2025)
+        sem = Semester(number=5)
+        db.session.add_all([ay, sem])
+        db.session.flush()
+
+        sub_a = Subject(code='CS701', name='Distributed Systems', semester_id=sem.id, academic_year_id=ay.id)
+        sub_b = Subject(code='CS702', name='Cloud Computing', semester_id=sem.id, academic_year_id=ay.id)
+        db.session.add_all([sub_a, sub_b])
+        db.session.flush()
+
+        def make(sub, status):
+            return Question(subject_id=sub.id, creator_id=admin.id, status=status,
+                            editor_data={'blocks': [{'type': 'paragraph', 'data': {'text': 'Explain consensus.'}}]})
+
+        questions = [make(sub_a, 'APPROVED'), make(sub_a, 'APPROVED'), make(sub_a, 'PENDING_REVIEW'),
+                     make(sub_a, 'DRAFT'), make(sub_b, 'PENDING_REVIEW')]
+        db.session.add_all(questions)
+        db.session.commit()
+
+        # 1. Maintained on insert
+        stats = get_subject_question_stats()
+        assert stats[sub_a.id]['total'] == 4
+        assert stats[sub_a.id]['approved'] == 2
+        assert stats[sub_a.id]['pendingReview'] == 1
+        assert stats[sub_b.id]['total'] == 1
+
+        # 2. Maintained on status change (attribute expired by the commit above)
+        draft = questions[3]
+        draft.status = 'APPROVED'
+        db.session.commit()
+        assert get_subject_question_stats()[sub_a.id]['approved'] == 3
+
+        # 3. Maintained on delete
+        db.session.delete(questions[4])
+        db.session.commit()
+        assert get_subject_question_stats().get(sub_b.id, {'total': 0})['total'] == 0
+
+        # 4. Rebuild from one GROUP BY matches the incrementally maintained rows
+        incremental = _stats_rows()
+        rebuild_subject_question_stats()
+        assert _stats_rows() == incremental
+
+        sub_a_code = sub_a.code
+
+    # 5. Dashboard staff tracker and HOD stats are served from the rollup
+    resp = authenticated_admin_client.get('/api/dashboard/academic')
+    assert resp.status_code == 200
+    data = resp.get_json()
+    row = next(r for r in data['staffTracker'] if r['subjectCode'] == sub_a_code)
+    assert row['totalQuestions'] == 4
+    assert row['approvedQuestions'] == 3
+    assert row['pendingQuestions'] == 1
+    assert row['completionPercentage'] == 75
+    assert data['hodStats']['totalQuestions'] == 4
+    assert data['hodStats']['approvedQuestions'] == 3
+
+def test_rebuild_question_stats_command(app, runner):
+    result = runner.invoke(args=['rebuild-question-stats'])
+    assert result.exit_code == 0
+    assert 'Rebuilt subject question stats' in result.output
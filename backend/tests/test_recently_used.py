@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models import User, Subject, AcademicYear, Semester, Question, Paper, QuestionUsage
+
+def _seed_usage_history():
+    """
+    Six questions: q0 used long ago in the newest paper, q1 used lately in an old paper,
+    q2 used long ago in an old paper (not recent), q3-q5 never used.
+    """
+    admin = User.query.filter_by(email='admin_test@test.com').first()
+    ay = AcademicYear(label='2024-2025', start_year=2024, end_year=2025)
+    sem = Semester(number=6)
+    db.session.add_all([ay, sem])
+    db.session.flush()
+    subject = Subject(code='CS601', name='Compilers', semester_id=sem.id, academic_year_id=ay.id)
+    db.session.add(subject)
+    db.session.flush()
+
+    now = datetime.utcnow()
+    questions = [
+        Question(subject_id=subject.id, creator_id=admin.id, created_at=now - timedelta(minutes=i),
+                 editor_data={'blocks': [{'type': 'paragraph', 'data': {'text': f'Q{i}'}}], 'marks': 5})
+        for i in range(6)
+    ]
+    db.session.add_all(questions)
+    # Four papers: only the newest three count as "last papers"
+    papers = [Paper(subject_id=subject.id, title=f'P{i}', created_at=now - timedelta(days=100 - i)) for i in range(4)]
+    db.session.add_all(papers)
+    db.session.flush()
+
+    old = now - timedelta(days=90)
+    db.session.add_all([
+        QuestionUsage(question_id=questions[0].id, paper_id=papers[3].id, subject_id=subject.id, used_at=old),
+        QuestionUsage(question_id=questions[1].id, paper_id=papers[0].id, subject_id=subject.id, used_at=now),
+        QuestionUsage(question_id=questions[2].id, paper_id=papers[0].id, subject_id=subject.id, used_at=old),
+    ])
+    db.session.commit()
+    return subject, questions
+
+def test_recently_used_questions_are_excluded_in_sql(app, authenticated_admin_client, assert_max_queries):
+    subject, questions = _seed_usage_history()
+    expected = {str(q.id) for q in questions[2:]}
+
+    with assert_max_queries(3) as statements:
+        resp = authenticated_admin_client.get(f'/api/questions?subjectId={subject.id}')
+    assert resp.status_code == 200
+    assert {q['id'] for q in resp.get_json()} == expected
+    assert not any(q['isRecentlyUsed'] for q in resp.get_json())
+
+    # Usages are only touched inside the listing SELECT, never loaded into an id list first
+    usage_statements = [s for s in statements if 'question_usages' in s]
+    assert len(usage_statements) == 1
+    assert 'NOT (EXISTS' in usage_statements[0] and 'FROM questions' in usage_statements[0]
+
+    resp = authenticated_admin_client.get(f'/api/questions?subjectId={subject.id}&cursor=&limit=10')
+    assert {q['id'] for q in resp.get_json()['questions']} == expected
+
+def test_include_used_flags_recent_questions(app, authenticated_admin_client):
+    subject, questions = _seed_usage_history()
+    recent = {str(questions[0].id), str(questions[1].id)}
+
+    resp = authenticated_admin_client.get(f'/api/questions?subjectId={subject.id}&includeUsed=true')
+    flags = {q['id']: q['isRecentlyUsed'] for q in resp.get_json()}
+    assert len(flags) == 6
+    assert {qid for qid, used in flags.items() if used} == recent
+
+    resp = authenticated_admin_client.get(f'/api/questions?subjectId={subject.id}&includeUsed=true&page=1&limit=4')
+    body = resp.get_json()
+    assert body['total'] == 6
+    assert [q['isRecentlyUsed'] for q in body['questions']] == [True, True, False, False]
+
+    resp = authenticated_admin_client.get(f'/api/questions?subjectId={subject.id}&includeUsed=true&cursor=&limit=10')
+    flags = {q['id']: q['isRecentlyUsed'] for q in resp.get_json()['questions']}
+    assert {qid for qid, used in flags.items() if used} == recent
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+from sqlalchemy import update
+from app.models import SystemSetting, db
+from app.services.rbac_service import get_settings
+
+def test_settings_served_from_cache(app, client, assert_max_queries):
+    with app.app_context():
+        token = create_access_token(identity='00000000-0000-0000-0000-000000000001', additional_claims={'role': 'SUPER_ADMIN'})
+    headers = {'Authorization': f'Bearer {token}'}
+
+    resp = client.put('/api/settings', json={'active_ai_provider': 'GEMINI'}, headers=headers)
+    assert resp.status_code == 200
+    assert resp.get_json()['settings'] == {'active_ai_provider': 'GEMINI'}
+
+    # Warm: no queries at all within the TTL
+    assert get_settings()['active_ai_provider'] == 'GEMINI'
+    with assert_max_queries(0):
+        assert get_settings()['active_ai_provider'] == 'GEMINI'
+
+    # A write through the API invalidates immediately
+    resp = client.put('/api/settings', json={'active_ai_provider': 'ON_PREMISE'}, headers=headers)
+    assert resp.get_json()['settings']['active_ai_provider'] == 'ON_PREMISE'
+    assert client.get('/api/settings', headers=headers).get_json()['active_ai_provider'] == 'ON_PREMISE'
+
+def test_settings_cache_follows_change_stamp(app):
+    app.config['SETTINGS_CACHE_TTL'] = 0
+    db.session.add(SystemSetting(key='allowed_domains', value=['msruas.ac.in']))
+    db.session.commit()
+    assert get_settings()['allowed_domains'] == ['msruas.ac.in']
+
+    # Simulate another worker's write: Core UPDATE bypasses this process's ORM invalidation
+    db.session.execute(
+        update(SystemSetting)
+        .where(SystemSetting.key == 'allowed_domains')
+        .values(value=['example.edu'], updated_at=datetime.utcnow() + timedelta(seconds=1))
+    )
+    db.session.commit()
+    assert get_settings()['allowed_domains'] == ['example.edu']